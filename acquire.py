@@ -9,83 +9,300 @@ To create the `data.json` file that contains the data.
 
 import os
 import json
-from typing import Dict, List, Optional, Union, cast
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union, cast
 import re
 import requests
-from bs4 import BeautifulSoup
+import requests.adapters
 
-from env import github_token, github_username
-from repos import REPOS
+# env.py is read on first use, so importing this module needs no
+# credentials and has no side effects
+from repo_cache import RepoCache
+from corpus import RAW_CORPUS, JsonlWriter
+from instrument import stage
 
 # TODO: Make a github personal access token.
 #     1. Go here and generate a personal access token https://github.com/settings/tokens
 #        You do _not_ need select any scopes, i.e. leave all the checkboxes unchecked
 #     2. Save it in your env.py file under the variable `github_token`
 # TODO: Add your github username to your env.py file under the variable `github_username`
-# TODO: Add more repositories to the `REPOS` list below.
+# TODO: Add more repositories to repos.txt, one per line, or harvest them
+#       from topic pages with harvest_topics.
 
 
 #################### Get Repo Links ####################
 
 
-def get_repo_links(github_token=github_token, github_username=github_username,
-                                         topic='covid-19', number_of_pages=10):
+# repos to scrape, one "owner/name" per line, appended to by harvest_topics
+REPOS_FILE = "repos.txt"
+TOPICS_URL = "https://github.com/topics"
+# a topic page lists each repo as an <h3> holding a link to the owner,
+# "/owner", followed by a link to the repo, "/owner/name"
+TOPIC_HEADING_RE = re.compile(r"<h3\b[^>]*>(.*?)</h3>", re.S | re.I)
+REPO_LINKS_RE = re.compile(
+    r"""\bhref=["']/([\w.-]+)["'].*?\bhref=["']/\1/([\w.-]+)["']""", re.S)
+
+
+def load_repos(path: str = REPOS_FILE) -> List[str]:
+    """
+    Returns the repo names saved in `path`, one per line, in file order
+    """
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def append_repos(repos: List[str], path: str = REPOS_FILE,
+                 known: Optional[set] = None) -> List[str]:
+    """
+    Appends the repos of `repos` not already in `known` (read from `path`
+    when not given) to `path` and adds them to `known`. Returns the repos
+    that were appended.
+    """
+    if known is None:
+        known = set(load_repos(path)) if os.path.isfile(path) else set()
+    new = []
+    for repo in repos:
+        if repo not in known:
+            known.add(repo)
+            new.append(repo)
+    if new:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{repo}\n" for repo in new))
+    return new
+
+
+def parse_topic_page(html: str) -> List[str]:
+    """
+    Returns the "owner/name" of every repo listed on a github topic page,
+    in page order, by selecting the repo link of each <h3> heading
+    """
+    repos = []
+    for heading in TOPIC_HEADING_RE.findall(html):
+        match = REPO_LINKS_RE.search(heading)
+        if match is not None:
+            repos.append(f"{match.group(1)}/{match.group(2)}")
+    return repos
+
+
+def fetch_topic_page(topic: str, page: int, session: requests.Session,
+                     limiter: Optional["RateLimiter"] = None,
+                     topics_url: str = TOPICS_URL,
+                     max_retries: int = 3) -> List[str]:
+    """
+    Fetches one page of a topic's repos, sorted by stars, and returns the
+    repos listed on it; a page past the last one returns an empty list
+    """
+    url = f"{topics_url}/{topic}?s=stars&page={page}"
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.wait()
+        response = session.get(url)
+        if limiter is None or not limiter.update(response) or attempt == max_retries:
+            break
+    if response.status_code != 200:
+        return []
+    return parse_topic_page(response.text)
+
+
+def harvest_topics(topics: Union[str, List[str]] = "covid-19",
+                   number_of_pages: int = 25, workers: int = 8,
+                   path: Optional[str] = REPOS_FILE,
+                   topics_url: str = TOPICS_URL,
+                   verbose: bool = True) -> List[str]:
+    """
+    Fetches `number_of_pages` pages of every topic with a pool of `workers`
+    threads sharing one keep-alive session. Returns the repos found, in
+    topic and page order, with repos listed on several pages or topics kept
+    once.
+
+    When a `path` is given, repos not already saved there are appended as
+    soon as their page is parsed, in page order, so an interrupted harvest
+    keeps the pages it finished.
+    """
+    if isinstance(topics, str):
+        topics = [topics]
+    known = set(load_repos(path)) if path and os.path.isfile(path) else set()
+    pages = [(topic, page) for topic in topics
+             for page in range(1, number_of_pages + 1)]
+    session = make_session(pool_size=workers, auth=False)
+    limiter = RateLimiter()
+    found, seen, added = [], set(), 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map yields the pages in order, each as soon as it and those
+        # before it are done
+        results = executor.map(
+            lambda task: fetch_topic_page(*task, session, limiter, topics_url),
+            pages)
+        for (topic, page), repos in zip(pages, results):
+            repos = [repo for repo in repos if repo not in seen]
+            seen.update(repos)
+            found.extend(repos)
+            if path:
+                added += len(append_repos(repos, path, known))
+            if verbose:
+                print(f"{topic} page {page}: {len(repos)} repos")
+    session.close()
+    if verbose:
+        elapsed = time.perf_counter() - start
+        print(f"Harvested {len(found)} repos from {len(pages)} pages in "
+              f"{elapsed:.1f}s, {added} new")
+    return found
+
+
+def get_repo_links(topic='covid-19', number_of_pages=10, workers=8,
+                   path=REPOS_FILE):
     '''
     
-    Takes in a topic, your unique github API token, and your github username as
-    strings and an interger for the number of pages to query
+    Takes in a topic as a string and an integer for the number of pages to
+    query, fetched by `workers` threads
     
     Returns: list of repositories from GitHub in the form of
-    '<username>/<repo_name>'
+    '<username>/<repo_name>', the new ones appended to `path`
     
     '''
     
-    # set URL without page number
-    url = f'https://github.com/topics/{topic}?&s=stars&page='
-    # set header for github auth
-    headers = {"Authorization": f"token {github_token}",
-               "User-Agent": github_username}
-    # set empty list for total repos scraped
-    list_of_repos = []
-    # for each page in range of provided number
-    for i in range(1, number_of_pages + 1):
-        # obtain page data
-        response = requests.get(url + str(i), headers)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        content = soup.find_all('h3')
-        # set empty list to agg for each page
-        page_list = []
-        for repo in content:
-            # confirms that h3 tag contains repo information
-            if [re.search(r'(\S+)', x.text).group(1) for x in repo.find_all('a')] != []:
-                # returns owner username and repo name
-                user_name, repo_name = [re.search(r'(\S+)', x.text)\
-                                         .group(1) for x in repo.find_all('a')]
-                # add to page list for each repo on page
-                page_list.extend([f'{user_name}/{repo_name}'])
-        # add new page list into existing list for total repos
-        list_of_repos.extend(page_list)
-        print(f'Page {i} Completed')
-    # saves returned list into .py file for calling in later functions
-    with open("repos.py", "w") as repos:
-        repos.write(f'REPOS = {list_of_repos}')
-    
-    return list_of_repos
+    return harvest_topics(topic, number_of_pages, workers, path)
 
 
 ##########################################################
 
 
-headers = {"Authorization": f"token {github_token}", "User-Agent": github_username}
+@lru_cache(maxsize=None)
+def auth_headers() -> Dict[str, str]:
+    """
+    Returns the github auth headers built from env.py, read on first use.
+    Raises an Exception when the credentials have not been filled in.
+    """
+    from env import github_token, github_username
 
-if headers["Authorization"] == "token " or headers["User-Agent"] == "":
-    raise Exception(
-        "You need to follow the instructions marked TODO in this script before trying to use it"
-    )
+    headers = {"Authorization": f"token {github_token}", "User-Agent": github_username}
+    if headers["Authorization"] == "token " or headers["User-Agent"] == "":
+        raise Exception(
+            "You need to follow the instructions marked TODO in this script before trying to use it"
+        )
+    return headers
+
+
+#################### Acquisition Engine ####################
+
+
+API_URL = "https://api.github.com"
+
+
+class RateLimiter:
+    '''
+    Shares GitHub's rate limit state between worker threads.
+
+    Reads the X-RateLimit-Remaining and X-RateLimit-Reset headers from every
+    response. Once the remaining quota drops under `slow_below`, requests are
+    spread evenly over the time left until the reset; once it reaches
+    `reserve`, all workers pause until the reset time.
+    '''
 
+    def __init__(self, reserve=5, slow_below=100, max_wait=3600):
+        self.reserve = reserve
+        self.slow_below = slow_below
+        self.max_wait = max_wait
+        self.remaining = None
+        self.reset = None
+        self.waited = 0.0
+        self._next_request = 0.0
+        self._lock = threading.Lock()
 
-def github_api_request(url: str) -> Union[List, Dict]:
-    response = requests.get(url, headers=headers)
+    def wait(self):
+        '''
+        Blocks the calling thread until it is allowed to make a request
+        '''
+
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_request)
+            # spread the remaining quota over the time left until reset
+            if (self.remaining is not None and self.reset is not None
+                    and self.reset > now):
+                if self.remaining <= self.reserve:
+                    start = max(start, self.reset + 1)
+                elif self.remaining < self.slow_below:
+                    interval = (self.reset - now) / (self.remaining - self.reserve)
+                    start = max(start, self._next_request + interval)
+            start = min(start, now + self.max_wait)
+            self._next_request = start
+        delay = start - time.time()
+        if delay > 0:
+            self.waited += delay
+            time.sleep(delay)
+
+    def update(self, response):
+        '''
+        Records the rate limit headers of a response. Returns True when the
+        request was rejected by the rate limit and should be retried.
+        '''
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        retry_after = response.headers.get("Retry-After")
+        limited = response.status_code == 429 or (
+            response.status_code == 403 and (remaining == "0" or retry_after))
+        with self._lock:
+            if remaining is not None:
+                self.remaining = int(remaining)
+            if reset is not None:
+                self.reset = float(reset)
+            if limited:
+                # secondary limits send Retry-After instead of a reset time
+                resume = (time.time() + float(retry_after) if retry_after
+                          else (self.reset or time.time()) + 1)
+                self._next_request = max(self._next_request, resume)
+        return limited
+
+
+def make_session(pool_size=16, auth=True):
+    '''
+    Returns a requests Session with keep-alive connection pools sized for
+    `pool_size` concurrent workers and, when `auth` is True, the github
+    auth headers set; pass auth=False for servers other than the github api
+    '''
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size,
+                                            pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if auth:
+        session.headers.update(auth_headers())
+    return session
+
+
+def github_get(url: str, session: Optional[requests.Session] = None,
+               limiter: Optional[RateLimiter] = None, etag: Optional[str] = None,
+               max_retries: int = 3) -> requests.Response:
+    """
+    Makes a GET request to the github api, waiting on and retrying against
+    the rate limiter when one is given. When `etag` is given the request is
+    conditional and a 304 response means the cached copy is still current.
+    """
+    http = session or requests
+    # only the github api gets the credentials, so a stub server needs none
+    request_headers = dict(auth_headers()) if url.startswith(API_URL) else {}
+    if etag:
+        request_headers["If-None-Match"] = etag
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.wait()
+        response = http.get(url, headers=request_headers)
+        if limiter is None or not limiter.update(response) or attempt == max_retries:
+            break
+    return response
+
+
+def github_api_request(url: str, session: Optional[requests.Session] = None,
+                       limiter: Optional[RateLimiter] = None,
+                       max_retries: int = 3) -> Union[List, Dict]:
+    response = github_get(url, session, limiter, max_retries=max_retries)
     response_data = response.json()
     if response.status_code != 200:
         raise Exception(
@@ -95,9 +312,31 @@ def github_api_request(url: str) -> Union[List, Dict]:
     return response_data
 
 
-def get_repo_language(repo: str) -> str:
-    url = f"https://api.github.com/repos/{repo}"
-    repo_info = github_api_request(url)
+def github_conditional_request(url: str, etag: Optional[str],
+                               session: Optional[requests.Session] = None,
+                               limiter: Optional[RateLimiter] = None
+                               ) -> Tuple[Union[List, Dict, None], Optional[str]]:
+    """
+    Revalidates a cached api response. Returns (None, etag) when github
+    answers 304 Not Modified, otherwise the new data and its ETag.
+    """
+    response = github_get(url, session, limiter, etag=etag)
+    if response.status_code == 304:
+        return None, etag
+    response_data = response.json()
+    if response.status_code != 200:
+        raise Exception(
+            f"Error response from github api! status code: {response.status_code}, "
+            f"response: {json.dumps(response_data)}"
+        )
+    return response_data, response.headers.get("ETag")
+
+
+def get_repo_language(repo: str, session: Optional[requests.Session] = None,
+                      limiter: Optional[RateLimiter] = None,
+                      api_url: str = API_URL) -> str:
+    url = f"{api_url}/repos/{repo}"
+    repo_info = github_api_request(url, session, limiter)
     if type(repo_info) is dict:
         repo_info = cast(Dict, repo_info)
         return repo_info.get("language", None)
@@ -106,9 +345,11 @@ def get_repo_language(repo: str) -> str:
     )
 
 
-def get_repo_contents(repo: str) -> List[Dict[str, str]]:
-    url = f"https://api.github.com/repos/{repo}/contents/"
-    contents = github_api_request(url)
+def get_repo_contents(repo: str, session: Optional[requests.Session] = None,
+                      limiter: Optional[RateLimiter] = None,
+                      api_url: str = API_URL) -> List[Dict[str, str]]:
+    url = f"{api_url}/repos/{repo}/contents/"
+    contents = github_api_request(url, session, limiter)
     if type(contents) is list:
         contents = cast(List, contents)
         return contents
@@ -128,37 +369,191 @@ def get_readme_download_url(files: List[Dict[str, str]]) -> str:
     return ""
 
 
-def process_repo(repo: str) -> Dict[str, str]:
+def process_repo(repo: str, session: Optional[requests.Session] = None,
+                 limiter: Optional[RateLimiter] = None,
+                 api_url: str = API_URL) -> Dict[str, str]:
     """
     Takes a repo name like "gocodeup/codeup-setup-script" and returns a
     dictionary with the language of the repo and the readme contents.
     """
-    contents = get_repo_contents(repo)
-    if get_readme_download_url(contents) == '':
+    http = session or requests
+    contents = get_repo_contents(repo, session, limiter, api_url)
+    download_url = get_readme_download_url(contents)
+    if download_url == '':
         return
-    readme_contents = requests.get(get_readme_download_url(contents)).text
+    readme_contents = http.get(download_url).text
     return {
         "repo": repo,
-        "language": get_repo_language(repo),
+        "language": get_repo_language(repo, session, limiter, api_url),
         "readme_contents": readme_contents,
     }
 
 
-def scrape_github_data() -> List[Dict[str, str]]:
+def revalidate_repo(repo: str, cached: Optional[Dict] = None,
+                    session: Optional[requests.Session] = None,
+                    limiter: Optional[RateLimiter] = None,
+                    api_url: str = API_URL) -> Dict:
+    """
+    Takes a repo name and its cached record (or None) and returns a fresh
+    cache record. Both api calls are conditional on the cached ETags, and the
+    README is only downloaded again when the repo contents changed.
     """
-    Loop through all of the repos and process them. Returns the processed data.
+    cached = cached or {}
+    http = session or requests
+    record = {"repo": repo, "fetched_at": time.time(), "not_modified": 0}
+    # contents listing: an unchanged ETag means an unchanged README
+    url = f"{api_url}/repos/{repo}/contents/"
+    contents, record["contents_etag"] = github_conditional_request(
+        url, cached.get("contents_etag"), session, limiter)
+    if contents is None:
+        record["not_modified"] += 1
+        record["has_readme"] = cached["has_readme"]
+        record["readme_contents"] = cached["readme_contents"]
+    else:
+        if type(contents) is not list:
+            raise Exception(
+                f"Expecting a list response from {url}, instead got {json.dumps(contents)}"
+            )
+        download_url = get_readme_download_url(contents)
+        record["has_readme"] = download_url != ""
+        record["readme_contents"] = (http.get(download_url).text
+                                     if record["has_readme"] else None)
+    if not record["has_readme"]:
+        record["language"] = record["repo_etag"] = None
+        return record
+    # repo info: only needed for the language
+    url = f"{api_url}/repos/{repo}"
+    repo_info, record["repo_etag"] = github_conditional_request(
+        url, cached.get("repo_etag"), session, limiter)
+    if repo_info is None:
+        record["not_modified"] += 1
+        record["language"] = cached["language"]
+    elif type(repo_info) is dict:
+        record["language"] = repo_info.get("language", None)
+    else:
+        raise Exception(
+            f"Expecting a dictionary response from {url}, instead got {json.dumps(repo_info)}"
+        )
+    return record
+
+
+def scrape_github_data(repos: Optional[List[str]] = None, workers: int = 8,
+                       api_url: str = API_URL, verbose: bool = True,
+                       cache: Optional[RepoCache] = None,
+                       output: Optional[str] = None) -> List[Dict[str, str]]:
     """
+    Processes all of the repos with a pool of `workers` threads sharing one
+    keep-alive session and rate limiter. Returns the processed data in the
+    same order as `repos` (defaults to the repos of repos.txt).
+
+    When an `output` path is given, a new JSON lines corpus is started there
+    and every repo with a README is appended as soon as it finishes, so the
+    corpus can be read while the scrape runs.
 
-    lst = []
-    total = len(REPOS)
-    for repo in REPOS:
-        total -= 1
-        lst.append(process_repo(repo))
-        print(total)
-    return lst
-    return [process_repo(repo) for repo in REPOS]
+    When a RepoCache is given, every finished repo is saved to it right away,
+    cached repos are revalidated with conditional requests, and repos already
+    fetched by an unfinished previous run are skipped so the run resumes.
+
+    A repo whose fetch raises is printed and returned as None; the others
+    are still scraped.
+    """
+
+    if repos is None:
+        repos = load_repos()
+    results = [None] * len(repos)
+    cached = {}
+    todo = list(enumerate(repos))
+    if cache is not None:
+        resume_from = cache.start_run()
+        cached = cache.get_many(repos)
+        # resume: repos fetched since the unfinished run started are current
+        for i, repo in todo:
+            record = cached.get(repo)
+            if record is not None and record["fetched_at"] >= resume_from:
+                results[i] = _record_to_data(record)
+        todo = [(i, repo) for i, repo in todo
+                if cached.get(repo, {}).get("fetched_at", -1) < resume_from]
+    skipped = len(repos) - len(todo)
+    not_modified = 0
+    failed = 0
+    # the repos of this run with a README, the stage's rows out
+    scraped = []
+    # github_get adds the token to api requests only, so README downloads
+    # from the raw host go without it
+    session = make_session(pool_size=workers, auth=False)
+    limiter = RateLimiter()
+    writer = JsonlWriter(output) if output is not None else None
+    try:
+        if writer is not None:
+            for result in results:
+                writer.write(result)
+        start = time.perf_counter()
+        with stage("scrape_github_data", todo) as timing, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            if cache is None:
+                futures = {executor.submit(process_repo, repo, session,
+                                           limiter, api_url): (i, repo)
+                           for i, repo in todo}
+            else:
+                futures = {executor.submit(revalidate_repo, repo,
+                                           cached.get(repo), session,
+                                           limiter, api_url): (i, repo)
+                           for i, repo in todo}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i, repo = futures[future]
+                # an empty or deleted repo must not end the whole run
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"Failed to scrape {repo}: {e}")
+                else:
+                    if cache is not None:
+                        not_modified += result.pop("not_modified")
+                        cache.put(result)
+                        result = _record_to_data(result)
+                    results[i] = result
+                    if result is not None:
+                        scraped.append(result)
+                    if writer is not None:
+                        writer.write(result)
+                # failed repos count towards the progress too
+                if verbose:
+                    elapsed = time.perf_counter() - start
+                    print(f"{len(todo) - done} remaining, "
+                          f"{done / elapsed:.1f} repos/s")
+            timing.output(scraped)
+    finally:
+        session.close()
+        if writer is not None:
+            writer.close()
+    if cache is not None:
+        cache.finish_run()
+    if verbose:
+        elapsed = time.perf_counter() - start
+        print(f"Scraped {len(todo)} repos in {elapsed:.1f}s "
+              f"({len(todo) / max(elapsed, 1e-9):.1f} repos/s, "
+              f"{limiter.waited:.1f}s waiting on rate limit)")
+        if cache is not None:
+            print(f"{skipped} resumed from cache, "
+                  f"{not_modified} requests answered 304 Not Modified")
+        if failed:
+            print(f"{failed} repos failed and were recorded as None")
+    return results
+
+
+def _record_to_data(record: Dict) -> Optional[Dict[str, str]]:
+    """
+    Converts a cache record to the dictionary returned by process_repo
+    """
+    if not record["has_readme"]:
+        return None
+    return {
+        "repo": record["repo"],
+        "language": record["language"],
+        "readme_contents": record["readme_contents"],
+    }
 
 
 if __name__ == "__main__":
-    data = scrape_github_data()
-    json.dump(data, open("data2.json", "w"), indent=1)
\ No newline at end of file
+    scrape_github_data(cache=RepoCache(), output=RAW_CORPUS)
@@ -0,0 +1,383 @@
+'''
+Per-language word and bigram frequencies of the prepared READMEs.
+
+The lemmatized READMEs are split into words once, and the unigrams and
+bigrams of every README are counted into one sparse (language, term)
+count matrix, bigrams not crossing from one README into the next. Top
+terms, the terms every language uses and how distinctive a term is of a
+language are then array operations on its rows:
+
+    top_k        - most frequent terms, overall or of one language
+    common_terms - terms used in every language, by total count
+    log_ratio    - log2 ratio of a term's rate in a language to its rate
+                   in the other languages, smoothed by alpha
+    chi2         - chi-squared statistic of a term being in a language
+                   or the others
+    distinctive  - the terms most over-represented in a language by
+                   either score
+
+Counts of new READMEs merge into existing counts, over the union of
+their languages and terms, so a growing corpus is counted once.
+
+    counts = count_terms(X_train.lemmatized_readme,
+                         y_train.programming_language)
+    counts.top_k(20, language='Python')
+    counts = counts.merge(count_terms(new.lemmatized_readme,
+                                      new.programming_language))
+'''
+
+
+# import standard libraries
+import itertools
+import json
+import os
+
+# import data tools
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# import memory-mapped matrix storage
+from features import load_csr, save_csr
+
+
+COUNTS_DIR = 'term_counts'
+
+
+#################### Counting ####################
+
+
+def _words(text):
+    '''
+    Returns the words of a lemmatized README, dropping apostrophes as the
+    report's word counts do
+    '''
+
+    return text.replace('\'', '').split()
+
+
+def count_terms(texts, languages, ngrams=2):
+    '''
+    Takes a sequence of lemmatized README texts and a sequence of their
+    programming languages and returns the TermCounts of their unigrams,
+    and bigrams when ngrams is 2
+    '''
+
+    texts, languages = list(texts), np.asarray(languages, dtype=object)
+    language_names, language_ids = np.unique(languages, return_inverse=True)
+    word_lists = [_words(text) for text in texts]
+    lengths = np.array([len(words) for words in word_lists], dtype=np.int64)
+    documents = np.bincount(language_ids, minlength=len(language_names))
+    # number every distinct word once; the language of each word follows
+    # from its README
+    ids, words = pd.factorize(pd.Series(
+        list(itertools.chain.from_iterable(word_lists)), dtype=object))
+    words = np.asarray(words, dtype=object)
+    owners = np.repeat(np.arange(len(texts)), lengths)
+    rows, columns = [language_ids[owners]], [ids]
+    terms, sizes = [words], [np.ones(len(words), dtype=np.int8)]
+    if ngrams == 2:
+        # adjacent words of the same README, keyed by their pair of ids
+        pairs = owners[:-1] == owners[1:]
+        keys = ids[:-1][pairs] * len(words) + ids[1:][pairs]
+        bigram_ids, keys = pd.factorize(keys)
+        first, second = np.divmod(np.asarray(keys), len(words))
+        rows.append(language_ids[owners[:-1][pairs]])
+        columns.append(bigram_ids + len(words))
+        terms.append(words[first] + ' ' + words[second])
+        sizes.append(np.full(len(keys), 2, dtype=np.int8))
+    counts = sp.csr_matrix((np.ones(sum(map(len, rows)), dtype=np.int64),
+                            (np.concatenate(rows), np.concatenate(columns))),
+                           shape=(len(language_names),
+                                  sum(map(len, terms))))
+    counts.sum_duplicates()
+
+    return TermCounts(language_names, np.concatenate(terms),
+                      np.concatenate(sizes), counts, documents)
+
+
+def count_frames(frames, column='lemmatized_readme',
+                 language_column='programming_language', ngrams=2):
+    '''
+    Takes an iterable of repos DataFrames, such as chunks of a corpus too
+    large to hold at once, and returns the TermCounts of all of them,
+    merging the counts of each frame as it is read
+    '''
+
+    total = None
+    for df in frames:
+        counts = count_terms(df[column], df[language_column], ngrams)
+        total = counts if total is None else total.merge(counts)
+
+    return total
+
+
+def _extend(names, more):
+    '''
+    Takes an array of names and an array of more names and returns the
+    position of each of more in the extended names and the extended
+    names, those of more not in names added at the end in their order
+    '''
+
+    positions = pd.Index(names).get_indexer(more)
+    new = positions < 0
+    positions[new] = len(names) + np.arange(new.sum())
+
+    return positions, np.concatenate([names, more[new]])
+
+
+#################### Scores ####################
+
+
+def _log_ratio(counts, rest, totals, rest_totals, alpha=0.5):
+    '''
+    Returns the (languages, terms) array of the log2 ratio of the
+    smoothed rate of each term in a language to that in the others
+    '''
+
+    smoothing = alpha * counts.shape[1]
+
+    return np.log2((counts + alpha) / (totals + smoothing)) - \
+           np.log2((rest + alpha) / (rest_totals + smoothing))
+
+
+def _chi2(counts, rest, totals, rest_totals):
+    '''
+    Returns the (languages, terms) array of the chi-squared statistic of
+    each term's 2x2 table of counts in a language and in the others
+    '''
+
+    a, b = counts, rest
+    c, d = totals - a, rest_totals - b
+    denominator = (a + b) * (c + d) * (a + c) * (b + d)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0,
+                        (a + b + c + d) * (a * d - b * c) ** 2 / denominator,
+                        0.0)
+
+
+#################### Term Counts ####################
+
+
+class TermCounts:
+    '''
+    Unigram and bigram counts per programming language.
+
+    counts is the (languages, terms) CSR count matrix, languages and
+    terms its row and column names in the order they were first counted,
+    ngrams the number of words of each term and documents the number of
+    READMEs of each language.
+    '''
+
+    def __init__(self, languages, terms, ngrams, counts, documents):
+        self.languages = languages
+        self.terms = terms
+        self.ngrams = ngrams
+        self.counts = counts
+        self.documents = documents
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _row(self, language):
+        '''
+        Returns the row number of language
+        '''
+
+        return list(self.languages).index(language)
+
+    def merge(self, other):
+        '''
+        Takes other TermCounts and returns new TermCounts of both. The
+        languages and terms of other not counted yet are added after the
+        existing ones, so the existing counts keep their rows and columns
+        and only other's counts are placed
+        '''
+
+        rows, languages = _extend(self.languages, other.languages)
+        columns, terms = _extend(self.terms, other.terms)
+        ngrams = np.concatenate([self.ngrams,
+                                 other.ngrams[columns >= len(self.terms)]])
+        shape = (len(languages), len(terms))
+        # new rows of the existing counts are empty
+        indptr = np.r_[self.counts.indptr,
+                       np.full(shape[0] - self.counts.shape[0],
+                               self.counts.indptr[-1])]
+        counts = sp.csr_matrix((self.counts.data, self.counts.indices, indptr),
+                               shape=shape)
+        coo = other.counts.tocoo()
+        counts = counts + sp.csr_matrix((coo.data, (rows[coo.row],
+                                                    columns[coo.col])),
+                                        shape=shape)
+        documents = np.r_[self.documents,
+                          np.zeros(shape[0] - len(self.documents),
+                                   dtype=np.int64)]
+        np.add.at(documents, rows, other.documents)
+
+        return TermCounts(languages, terms, ngrams, counts, documents)
+
+    def _select(self, ngram=1, min_count=1):
+        '''
+        Returns the column numbers of the terms of ngram words, or of
+        every term when ngram is None, counted at least min_count times
+        '''
+
+        keep = np.asarray(self.counts.sum(axis=0)).ravel() >= min_count
+        if ngram is not None:
+            keep &= self.ngrams == ngram
+
+        return np.flatnonzero(keep)
+
+    def frequencies(self, ngram=1):
+        '''
+        Returns a DataFrame of the count of every term of ngram words,
+        overall in the all column and per language, most frequent first
+        '''
+
+        columns = self._select(ngram)
+        counts = self.counts[:, columns].toarray().T
+        df = pd.DataFrame(counts, index=self.terms[columns],
+                          columns=self.languages)
+        df.insert(0, 'all', counts.sum(axis=1))
+
+        return df.sort_values('all', ascending=False, kind='stable')
+
+    def top_k(self, k=20, language=None, ngram=1):
+        '''
+        Returns a Series of the k most frequent terms of ngram words and
+        their counts, overall or of one language, most frequent first
+        '''
+
+        columns = self._select(ngram)
+        if language is None:
+            counts = np.asarray(self.counts[:, columns].sum(axis=0)).ravel()
+        else:
+            row = self._row(language)
+            counts = self.counts[row, columns].toarray().ravel()
+        top = np.argsort(-counts, kind='stable')[:k]
+        top = top[counts[top] > 0]
+
+        return pd.Series(counts[top], index=self.terms[columns[top]],
+                         name=language or 'all')
+
+    def common_terms(self, ngram=1, k=None):
+        '''
+        Returns a Series of the total counts of the terms of ngram words
+        that every language uses, most frequent first, the first k when
+        given
+        '''
+
+        columns = self._select(ngram)
+        counts = self.counts[:, columns]
+        used = np.diff((counts > 0).tocsc().indptr) == len(self.languages)
+        totals = np.asarray(counts.sum(axis=0)).ravel()
+        common = np.flatnonzero(used)
+        common = common[np.argsort(-totals[common], kind='stable')][:k]
+
+        return pd.Series(totals[common], index=self.terms[columns[common]],
+                         name='all')
+
+    def _table(self, ngram, min_count):
+        '''
+        Returns the selected columns, their dense (languages, terms) count
+        array, the counts of the other languages, and (languages, 1)
+        arrays of the total count of each language and of the others
+        '''
+
+        columns = self._select(ngram, min_count)
+        counts = self.counts[:, columns].toarray().astype(np.float64)
+        rest = counts.sum(axis=0) - counts
+        totals = counts.sum(axis=1, keepdims=True)
+        rest_totals = totals.sum() - totals
+
+        return columns, counts, rest, totals, rest_totals
+
+    def log_ratio(self, ngram=1, alpha=0.5, min_count=1):
+        '''
+        Returns a (terms, languages) DataFrame of the log2 ratio of each
+        term's rate in a language to its rate in the other languages, with
+        alpha added to every count
+        '''
+
+        columns, *table = self._table(ngram, min_count)
+
+        return pd.DataFrame(_log_ratio(*table, alpha).T,
+                            index=self.terms[columns], columns=self.languages)
+
+    def chi2(self, ngram=1, min_count=1):
+        '''
+        Returns a (terms, languages) DataFrame of the chi-squared
+        statistic of the 2x2 table of a term's count and all other counts
+        in a language and in the other languages
+        '''
+
+        columns, *table = self._table(ngram, min_count)
+
+        return pd.DataFrame(_chi2(*table).T, index=self.terms[columns],
+                            columns=self.languages)
+
+    def distinctive(self, language, k=20, ngram=1, method='log_ratio',
+                    min_count=5):
+        '''
+        Returns a DataFrame of the k terms of ngram words, counted at
+        least min_count times, most over-represented in language by
+        method, 'log_ratio' or 'chi2', with both scores and the term's
+        count in the language and in the others
+        '''
+
+        row = self._row(language)
+        columns, *table = self._table(ngram, min_count)
+        counts, rest, totals, rest_totals = (part[row] for part in table)
+        df = pd.DataFrame({'count': counts.astype(np.int64),
+                           'other_count': rest.astype(np.int64),
+                           'log_ratio': _log_ratio(*table)[row],
+                           'chi2': _chi2(*table)[row]},
+                          index=self.terms[columns])
+        # chi2 is as large for terms a language uses less than the others
+        over = counts * rest_totals > rest * totals
+
+        return df[over].sort_values(method, ascending=False,
+                                    kind='stable').head(k)
+
+    def save(self, path=COUNTS_DIR):
+        '''
+        Saves the counts under the directory path as .npy arrays and the
+        language and term names as JSON
+        '''
+
+        os.makedirs(path, exist_ok=True)
+        save_csr(self.counts, os.path.join(path, 'counts'))
+        np.save(os.path.join(path, 'ngrams.npy'), self.ngrams)
+        np.save(os.path.join(path, 'documents.npy'), self.documents)
+        with open(os.path.join(path, 'names.json'), 'w') as f:
+            json.dump({'languages': self.languages.tolist(),
+                       'terms': self.terms.tolist()}, f)
+
+
+def load_counts(path=COUNTS_DIR):
+    '''
+    Returns the TermCounts saved under path
+    '''
+
+    with open(os.path.join(path, 'names.json')) as f:
+        names = json.load(f)
+    load = lambda name: np.load(os.path.join(path, f'{name}.npy'))
+
+    return TermCounts(np.array(names['languages'], dtype=object),
+                      np.array(names['terms'], dtype=object), load('ngrams'),
+                      load_csr(os.path.join(path, 'counts'), None),
+                      load('documents'))
+
+
+def count_github_repos(ngrams=2):
+    '''
+    Returns the TermCounts of the train split of wrangle_github_repos,
+    the READMEs the report explores
+    '''
+
+    from wrangle import wrangle_github_repos
+
+    X_train, y_train, _, _, _, _ = wrangle_github_repos()
+
+    return count_terms(X_train.lemmatized_readme,
+                       y_train.programming_language, ngrams)
@@ -0,0 +1,1677 @@
+'''
+Benchmarks for the project pipeline.
+
+The suite generates synthetic corpora with the statistics of repos.pickle
+and times scraping against a local stub GitHub server, every wrangle
+stage, every prepare function, vectorizing and prediction, writing the
+results to JSON so runs on two commits can be compared.
+
+Run from the command line:
+    python benchmark.py --sizes 1000 10000 100000 1000000
+    python benchmark.py --compare before.json after.json
+    python benchmark.py --components
+'''
+
+
+# import standard libraries
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+#################### Stub GitHub Server ####################
+
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    '''
+    Answers the three github endpoints used by acquire.process_repo and
+    the topic pages read by acquire.harvest_topics with canned data after
+    an artificial `latency`, and reports a rate limit that never runs out
+    '''
+
+    latency = 0.0
+    readme = '# Stub repository\n\nThis README is served by a stub server.\n'
+    language = 'Python'
+    # topic pages have this many pages of repos, half of them listed under
+    # every topic, and are padded to the size of a real page
+    topic_pages = 30
+    repos_per_page = 20
+    page_padding = 300_000
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        base = f'http://{self.headers["Host"]}'
+        path, _, query = self.path.partition('?')
+        parts = path.strip('/').split('/')
+        if parts[0] == 'topics':
+            page = int(dict(pair.split('=') for pair in
+                            query.split('&') if '=' in pair).get('page', 1))
+            if page > self.topic_pages:
+                self._send(b'Not Found', 'text/html', status=404)
+            else:
+                self._send(self._topic_page(parts[1], page).encode(),
+                           'text/html')
+        elif parts[0] == 'raw':
+            self._send(self.readme.encode(), 'text/plain')
+        elif parts[0] == 'repos' and parts[-1] == 'contents':
+            repo = '/'.join(parts[1:3])
+            body = [{'name': 'README.md',
+                     'download_url': f'{base}/raw/{repo}/README.md'}]
+            self._send(json.dumps(body).encode(), 'application/json')
+        elif parts[0] == 'repos':
+            body = {'full_name': '/'.join(parts[1:3]),
+                    'language': self.language}
+            self._send(json.dumps(body).encode(), 'application/json')
+        else:
+            self._send(b'{}', 'application/json', status=404)
+
+    @classmethod
+    def _topic_page(cls, topic, page):
+        '''
+        Returns the html of a topic page laid out like github's
+        '''
+
+        headings = []
+        for i in range(cls.repos_per_page):
+            owner = 'shared' if i % 2 else f'{topic}-owner'
+            name = f'repo-{page}-{i}'
+            headings.append(
+                f'<article class="border rounded"><div class="d-flex">'
+                f'<h3 class="f3 color-fg-muted text-normal lh-condensed">\n'
+                f'  <a data-hydro-click="{{&quot;event_type&quot;:&quot;'
+                f'explore.click&quot;}}" data-turbo="false" '
+                f'href="/{owner}">\n    {owner}\n  </a>\n  /\n'
+                f'  <a data-hydro-click="{{}}" href="/{owner}/{name}" '
+                f'class="text-bold wb-break-word">\n    {name}\n  </a>\n'
+                f'</h3></div><p class="color-fg-muted">A stub repository '
+                f'about {topic}.</p></article>\n')
+        padding = '<div class="d-none"><span>filler</span></div>\n' * \
+                  (cls.page_padding // 44)
+
+        return (f'<html><head><title>{topic}</title></head><body>'
+                f'<h1>{topic}</h1>{padding}{"".join(headings)}'
+                f'<h3>Related topics</h3></body></html>')
+
+    def _send(self, body, content_type, status=200):
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        # conditional requests for unchanged bodies get an empty 304
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('X-RateLimit-Remaining', '5000')
+        self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubReadmeHandler(StubGitHubHandler):
+    '''
+    Serves /raw/<owner>/repo-<i>/README.md as the i-th of `readmes`, with
+    its ETag, and every other path as the stub github server does
+    '''
+
+    readmes = []
+    # headers and body go out as separate writes, which a keep-alive
+    # client would otherwise wait on a delayed ack for
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if parts[0] != 'raw' or not self.readmes:
+            return super().do_GET()
+        time.sleep(self.latency)
+        i = int(parts[2].rsplit('-', 1)[-1])
+        self._send(self.readmes[i % len(self.readmes)].encode(), 'text/plain')
+
+
+def start_stub_server(latency=0.0, readmes=None):
+    '''
+    Starts a stub github server on a free local port in a daemon thread
+    and returns the server and its base url; given readmes, its raw
+    README urls serve them
+    '''
+
+    handler = type('Handler', (StubReadmeHandler,),
+                   {'latency': latency, 'readmes': readmes or []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+#################### Synthetic Corpus ####################
+
+
+class ReadmeGenerator:
+    '''
+    Generates synthetic READMEs whose language, length, line lengths and
+    word frequencies follow the READMEs of the prepared repos DataFrame.
+
+    Each README samples a source repo for its language and word count,
+    then draws its words from the word frequencies of that language and
+    breaks them into lines of sampled lengths, so corpora of any size
+    keep the statistics of the real one without repeating its documents.
+    The same source and seed give the same corpora.
+    '''
+
+    def __init__(self, source='repos.pickle', seed=19):
+        import numpy as np
+        import pandas as pd
+
+        self.df = pd.read_pickle(source)
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.languages = self.df.programming_language.tolist()
+        self.lengths = np.array([len(text.split())
+                                 for text in self.df.original_readme])
+        self.line_lengths = np.array([len(line.split())
+                                      for text in self.df.original_readme
+                                      for line in text.split('\n')
+                                      if line.strip()])
+        # words of each language and their cumulative frequencies
+        self.vocabularies = {}
+        for language, texts in self.df.groupby('programming_language') \
+                                      .original_readme:
+            counts = pd.Series(' '.join(texts).split()).value_counts()
+            self.vocabularies[language] = (
+                counts.index.to_numpy(dtype=object),
+                (counts.cumsum() / counts.sum()).to_numpy())
+
+    def record(self, i):
+        '''
+        Returns one data2.json style record with a synthetic README
+        '''
+
+        import numpy as np
+
+        source = self.rng.integers(len(self.languages))
+        language = self.languages[source]
+        words, cumulative = self.vocabularies[language]
+        n_words = max(int(self.lengths[source]), 1)
+        drawn = words[np.minimum(np.searchsorted(
+            cumulative, self.rng.random(n_words), side='right'),
+            len(words) - 1)]
+        # cut the words into lines of sampled lengths
+        ends = self.rng.choice(self.line_lengths, n_words).cumsum()
+        ends = np.r_[ends[ends < n_words], n_words]
+        starts = np.r_[0, ends[:-1]]
+        lines = [' '.join(drawn[start:end])
+                 for start, end in zip(starts.tolist(), ends.tolist())]
+
+        return {'repo': f'synthetic/repo-{i}', 'language': language,
+                'readme_contents': '\n'.join(lines)}
+
+    def records(self, n_docs, start=0):
+        '''
+        Yields n_docs synthetic records, numbered from start
+        '''
+
+        for i in range(start, start + n_docs):
+            yield self.record(i)
+
+    def readmes(self, n_docs):
+        '''
+        Returns a list of n_docs synthetic README texts
+        '''
+
+        return [record['readme_contents'] for record in self.records(n_docs)]
+
+    def near_duplicates(self, n_docs, n_words=120, dup_rate=0.2,
+                        edit_rate=0.01):
+        '''
+        Returns a list of n_docs texts of n_words words drawn from the
+        lemmatized vocabulary, and an array of the original each text was
+        copied from; a dup_rate share of the texts are copies of an
+        earlier text with an edit_rate share of their words replaced
+        '''
+
+        import numpy as np
+
+        vocabulary = self.df.lemmatized_readme.str.split().explode() \
+                         .dropna().unique()
+        texts, origin = [], np.arange(n_docs)
+        for i in range(n_docs):
+            if i and self.rng.random() < dup_rate:
+                origin[i] = origin[self.rng.integers(i)]
+                words = texts[origin[i]].split()
+                for j in self.rng.integers(n_words, size=max(
+                        1, int(n_words * edit_rate))):
+                    words[j] = vocabulary[self.rng.integers(len(vocabulary))]
+            else:
+                words = vocabulary[self.rng.integers(len(vocabulary),
+                                                     size=n_words)]
+            texts.append(' '.join(words))
+
+        return texts, origin
+
+    def repos(self, scale):
+        '''
+        Returns a prepared repos DataFrame scale times the size of the
+        source, sampling rows with replacement and shuffling the words of
+        each text column so rows do not repeat
+        '''
+
+        if scale == 1:
+            return self.df
+        df = self.df.sample(len(self.df) * scale, replace=True,
+                            random_state=self.seed).reset_index(drop=True)
+        for column in ('original_readme', 'cleaned_readme',
+                       'lemmatized_readme'):
+            shuffled = []
+            for text in df[column].tolist():
+                words = text.split(' ')
+                self.rng.shuffle(words)
+                shuffled.append(' '.join(words))
+            df[column] = shuffled
+
+        return df
+
+
+def _best_of(func, repeat=3):
+    '''
+    Returns the fastest wall time in seconds of `repeat` calls to func
+    '''
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+#################### Benchmarks ####################
+
+
+def benchmark_scrape(n_repos=200, workers=(1, 8, 32), latency=0.02):
+    '''
+    Scrapes `n_repos` fake repos from the stub server with each worker
+    count and returns a list of dicts with the repos per second reached
+    '''
+
+    from acquire import scrape_github_data
+
+    server, url = start_stub_server(latency=latency)
+    repos = [f'owner/repo-{i}' for i in range(n_repos)]
+    results = []
+    for n in workers:
+        start = time.perf_counter()
+        data = scrape_github_data(repos, workers=n, api_url=url,
+                                  verbose=False)
+        elapsed = time.perf_counter() - start
+        assert len(data) == n_repos and None not in data
+        results.append({'workers': n, 'repos': n_repos,
+                        'seconds': round(elapsed, 3),
+                        'repos_per_second': round(n_repos / elapsed, 1)})
+        print(f'scrape  workers={n:<3} {n_repos / elapsed:8.1f} repos/s')
+    server.shutdown()
+
+    return results
+
+
+def benchmark_revalidate(n_repos=200, workers=32, latency=0.02):
+    '''
+    Scrapes `n_repos` fake repos into an empty RepoCache, then scrapes them
+    again so every request is revalidated, and returns the timings of both
+    '''
+
+    import os
+    import tempfile
+    from acquire import scrape_github_data
+    from repo_cache import RepoCache
+
+    server, url = start_stub_server(latency=latency)
+    repos = [f'owner/repo-{i}' for i in range(n_repos)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = RepoCache(os.path.join(tmp, 'repo_cache.sqlite'))
+        for run in ('cold', 'revalidate'):
+            start = time.perf_counter()
+            data = scrape_github_data(repos, workers=workers, api_url=url,
+                                      verbose=False, cache=cache)
+            elapsed = time.perf_counter() - start
+            assert len(data) == n_repos and None not in data
+            results.append({'run': run, 'repos': n_repos,
+                            'seconds': round(elapsed, 3),
+                            'repos_per_second': round(n_repos / elapsed, 1)})
+            print(f'cache   {run:<10} {n_repos / elapsed:8.1f} repos/s')
+        cache.close()
+    server.shutdown()
+
+    return results
+
+
+def _legacy_get_repo_links(topic, number_of_pages, topics_url):
+    '''
+    Returns the repos of a topic fetched one page after another and parsed
+    with BeautifulSoup and html.parser, as get_repo_links did before the
+    harvester
+    '''
+
+    import re
+    import requests
+    from bs4 import BeautifulSoup
+
+    url = f'{topics_url}/{topic}?&s=stars&page='
+    list_of_repos = []
+    for i in range(1, number_of_pages + 1):
+        response = requests.get(url + str(i))
+        soup = BeautifulSoup(response.content, 'html.parser')
+        for repo in soup.find_all('h3'):
+            names = [re.search(r'(\S+)', x.text).group(1)
+                     for x in repo.find_all('a')]
+            if names != []:
+                list_of_repos.append('/'.join(names))
+
+    return list_of_repos
+
+
+def benchmark_harvest(topics=('covid-19', 'pandemic'), number_of_pages=25,
+                      workers=(1, 8), latency=0.1):
+    '''
+    Harvests `number_of_pages` topic pages of each topic from the stub
+    server with the legacy sequential BeautifulSoup loop and with
+    acquire.harvest_topics at each worker count; returns a list of dicts
+    with the pages per second reached and the parse time of one page
+    '''
+
+    import os
+    import tempfile
+    from bs4 import BeautifulSoup
+    from acquire import harvest_topics, parse_topic_page
+
+    server, url = start_stub_server(latency=latency)
+    n_pages = len(topics) * number_of_pages
+    results = []
+    start = time.perf_counter()
+    legacy = [repo for topic in topics
+              for repo in _legacy_get_repo_links(topic, number_of_pages,
+                                                 f'{url}/topics')]
+    elapsed = time.perf_counter() - start
+    results.append({'method': 'legacy', 'workers': 1, 'pages': n_pages,
+                    'repos': len(set(legacy)), 'seconds': round(elapsed, 3),
+                    'pages_per_second': round(n_pages / elapsed, 1)})
+    print(f'harvest legacy      {n_pages / elapsed:8.1f} pages/s')
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in workers:
+            path = os.path.join(tmp, f'repos-{n}.txt')
+            start = time.perf_counter()
+            found = harvest_topics(list(topics), number_of_pages, n, path,
+                                   topics_url=f'{url}/topics', verbose=False)
+            elapsed = time.perf_counter() - start
+            assert found == list(dict.fromkeys(legacy))
+            results.append({'method': 'harvest_topics', 'workers': n,
+                            'pages': n_pages, 'repos': len(found),
+                            'seconds': round(elapsed, 3),
+                            'pages_per_second': round(n_pages / elapsed, 1)})
+            print(f'harvest workers={n:<3} {n_pages / elapsed:8.1f} pages/s')
+    # parse time of a single page, without the network
+    html = StubGitHubHandler._topic_page(topics[0], 1)
+    parse_soup = _best_of(lambda: BeautifulSoup(html, 'html.parser')
+                          .find_all('h3'))
+    parse_select = _best_of(lambda: parse_topic_page(html))
+    results.append({'method': 'parse', 'page_bytes': len(html),
+                    'bs4_seconds': round(parse_soup, 5),
+                    'selector_seconds': round(parse_select, 5)})
+    print(f'parse   bs4 {parse_soup * 1000:.1f} ms, '
+          f'selector {parse_select * 1000:.2f} ms per page')
+    server.shutdown()
+
+    return results
+
+
+def benchmark_normalize(scales=(1, 100), repeat=3):
+    '''
+    Times the chained remove_code_snippets + extensive_clean stages against
+    the fused normalize_readmes stage, per row and vectorized, on corpora
+    of `scale` times the size of repos.pickle
+    '''
+
+    import pandas as pd
+    import wrangle as w
+
+    base = len(pd.read_pickle('repos.pickle'))
+    results = []
+    for scale in scales:
+        df = pd.DataFrame({'readme_contents':
+                               ReadmeGenerator().readmes(base * scale)})
+        stages = {
+            'chained': lambda: w.extensive_clean(w.remove_code_snippets(df.copy())),
+            'fused': lambda: w.normalize_readmes(df.copy()),
+            'fused_vectorized': lambda: w.normalize_readmes(df.copy(),
+                                                            vectorized=True),
+        }
+        baseline = None
+        for name, func in stages.items():
+            seconds = _best_of(func, repeat)
+            baseline = baseline or seconds
+            results.append({'stage': name, 'docs': len(df),
+                            'seconds': round(seconds, 3),
+                            'speedup': round(baseline / seconds, 2)})
+            print(f'normalize {name:<17} docs={len(df):<7} '
+                  f'{seconds:8.3f}s  x{baseline / seconds:.2f}')
+
+    return results
+
+
+def _legacy_prepare():
+    '''
+    Returns versions of the prepare functions that build their stopword
+    list and nltk objects on every call, as prepare did before caching
+    '''
+
+    import nltk
+    from nltk.corpus import stopwords
+    import prepare as p
+
+    def tokenize(text):
+        return nltk.tokenize.ToktokTokenizer().tokenize(text, return_str=True)
+
+    def stem(text):
+        ps = nltk.porter.PorterStemmer()
+        return ' '.join([ps.stem(word) for word in text.split()])
+
+    def lemmatize(text):
+        wnl = nltk.stem.WordNetLemmatizer()
+        return ' '.join([wnl.lemmatize(word) for word in text.split()])
+
+    def remove_stopwords(text, extra_words=[], exclude_words=[]):
+        stopword_list = stopwords.words('english') + list(extra_words)
+        for word in exclude_words:
+            stopword_list.remove(word)
+        return ' '.join([word for word in text.split()
+                         if word not in stopword_list])
+
+    return {'basic_clean': p.basic_clean, 'tokenize': tokenize, 'stem': stem,
+            'lemmatize': lemmatize, 'remove_stopwords': remove_stopwords}
+
+
+def benchmark_prepare(n_docs=2000, repeat=3):
+    '''
+    Times prep_data and the extensive_clean step with the per-call nltk
+    objects and stopword list against the cached ones in prepare
+    '''
+
+    import pandas as pd
+    import prepare as p
+
+    docs = [p.strip_markup(doc) for doc in ReadmeGenerator().readmes(n_docs)]
+    df = pd.DataFrame({'title': range(n_docs), 'readme': docs})
+    legacy = _legacy_prepare()
+
+    def legacy_prep_data():
+        clean = df.readme.apply(legacy['basic_clean'])\
+                         .apply(legacy['tokenize'])
+        return (clean.apply(legacy['remove_stopwords']),
+                clean.apply(legacy['stem']).apply(legacy['remove_stopwords']),
+                clean.apply(legacy['lemmatize'])
+                     .apply(legacy['remove_stopwords']))
+
+    def legacy_extensive_clean():
+        return df.readme.apply(lambda row: legacy['remove_stopwords'](
+                    legacy['tokenize'](legacy['basic_clean'](row)),
+                    extra_words=['&#9;']))
+
+    def cached_extensive_clean():
+        return df.readme.apply(lambda row: p.remove_stopwords(
+                    p.tokenize(p.basic_clean(row)), extra_words=['&#9;']))
+
+    # the legacy prep_data shares its cleaned column, so it is a lower bound
+    stages = [('prep_data', legacy_prep_data,
+               lambda: p.prep_data(df.copy(), 'readme')),
+              ('extensive_clean', legacy_extensive_clean,
+               cached_extensive_clean)]
+    results = []
+    for name, legacy_func, cached_func in stages:
+        before = _best_of(legacy_func, repeat)
+        after = _best_of(cached_func, repeat)
+        results.append({'stage': name, 'docs': n_docs,
+                        'legacy_seconds': round(before, 3),
+                        'cached_seconds': round(after, 3),
+                        'speedup': round(before / after, 2)})
+        print(f'prepare {name:<16} docs={n_docs:<6} legacy {before:7.3f}s  '
+              f'cached {after:7.3f}s  x{before / after:.2f}')
+
+    return results
+
+
+def benchmark_parallel_prepare(n_docs=100_000, jobs=(1, 2, 4, 8)):
+    '''
+    Times prep_data on `n_docs` synthetic READMEs with each n_jobs value
+    and checks that every parallel result equals the serial one
+    '''
+
+    import pandas as pd
+    import prepare as p
+
+    df = pd.DataFrame({'title': range(n_docs),
+                       'readme': ReadmeGenerator().readmes(n_docs)})
+    results = []
+    serial = None
+    for n in jobs:
+        start = time.perf_counter()
+        out = p.prep_data(df.copy(), 'readme', n_jobs=n)
+        seconds = time.perf_counter() - start
+        if serial is None:
+            serial, serial_seconds = out, seconds
+        assert out.equals(serial)
+        results.append({'n_jobs': n, 'docs': n_docs,
+                        'seconds': round(seconds, 3),
+                        'speedup': round(serial_seconds / seconds, 2)})
+        print(f'prep_data n_jobs={n:<3} docs={n_docs:<7} {seconds:8.3f}s  '
+              f'x{serial_seconds / seconds:.2f}')
+
+    return results
+
+
+def benchmark_language(n_docs=2000, n_jobs=1):
+    '''
+    Times langdetect on every full README against the tiered
+    langfilter.detect_languages with a cold and a warm memo, and reports
+    how often the tiered result agrees with full-text detection
+    '''
+
+    from langdetect import DetectorFactory, detect
+    import langfilter
+
+    docs = ReadmeGenerator().readmes(n_docs)
+    DetectorFactory.seed = 0
+    start = time.perf_counter()
+    full = [detect(doc) for doc in docs]
+    baseline = time.perf_counter() - start
+    results = [{'stage': 'full_detect', 'docs': n_docs,
+                'seconds': round(baseline, 3),
+                'docs_per_second': round(n_docs / baseline, 1)}]
+    print(f'language full_detect docs={n_docs:<6} {baseline:8.3f}s')
+    langfilter.clear_memo()
+    for run in ('tiered_cold', 'tiered_warm'):
+        start = time.perf_counter()
+        tiered = langfilter.detect_languages(docs, n_jobs=n_jobs,
+                                             verbose=False)
+        seconds = time.perf_counter() - start
+        agreement = sum(a == b for a, b in zip(full, tiered)) / n_docs
+        results.append({'stage': run, 'docs': n_docs,
+                        'seconds': round(seconds, 3),
+                        'docs_per_second': round(n_docs / seconds, 1),
+                        'agreement': round(agreement, 4)})
+        print(f'language {run:<11} docs={n_docs:<6} {seconds:8.3f}s  '
+              f'x{baseline / seconds:.2f}  agreement {agreement:.2%}')
+
+    return results
+
+
+def _percentiles(latencies):
+    '''
+    Returns a dict of p50 and p99 of a list of latencies in milliseconds
+    '''
+
+    import statistics
+
+    cuts = statistics.quantiles(latencies, n=100)
+    return {'p50_ms': round(cuts[49], 3), 'p99_ms': round(cuts[98], 3)}
+
+
+def benchmark_service(n_requests=2000, concurrency=8, n_legacy=20):
+    '''
+    Fires `n_requests` README predictions at a local prediction server
+    from `concurrency` keep-alive clients and reports p50/p99 latency and
+    throughput, next to the legacy unpickle-per-call prediction path
+    '''
+
+    import http.client
+    import pickle
+    import statistics
+    from concurrent.futures import ThreadPoolExecutor
+    from urllib.parse import urlparse
+    import predict
+    from service import PredictionService, start_server
+
+    docs = ReadmeGenerator().readmes(200)
+    results = []
+
+    # legacy path: unpickle the vectorizer and model on every call
+    latencies = []
+    for doc in docs[:n_legacy]:
+        start = time.perf_counter()
+        tfidf = pickle.load(open('tfidf.pickle', 'rb'))
+        model = pickle.load(open('model.pickle', 'rb'))
+        predict.predict_readme(doc, tfidf, model)
+        latencies.append((time.perf_counter() - start) * 1000)
+    results.append({'path': 'unpickle_per_call', 'requests': n_legacy,
+                    **_percentiles(latencies)})
+
+    # warm in-process python api, scoring every request
+    service = PredictionService(cache_size=0)
+    latencies = []
+    for doc in docs:
+        start = time.perf_counter()
+        service.predict(doc)
+        latencies.append((time.perf_counter() - start) * 1000)
+    results.append({'path': 'python_api', 'requests': len(docs),
+                    **_percentiles(latencies)})
+
+    # warm http service under concurrent load
+    server, url = start_server(service)
+    address = urlparse(url)
+
+    def client(n):
+        conn = http.client.HTTPConnection(address.hostname, address.port)
+        times = []
+        for i in range(n):
+            body = json.dumps({'readme': docs[i % len(docs)]})
+            start = time.perf_counter()
+            conn.request('POST', '/predict', body,
+                         {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            times.append((time.perf_counter() - start) * 1000)
+            assert response.status == 200
+        conn.close()
+        return times
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        per_client = [n_requests // concurrency] * concurrency
+        latencies = [t for times in executor.map(client, per_client)
+                     for t in times]
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    results.append({'path': 'http_service', 'requests': len(latencies),
+                    'concurrency': concurrency,
+                    'requests_per_second': round(len(latencies) / elapsed, 1),
+                    **_percentiles(latencies)})
+    for result in results:
+        print(f"predict {result['path']:<18} p50 {result['p50_ms']:8.2f}ms  "
+              f"p99 {result['p99_ms']:8.2f}ms")
+
+    return results
+
+
+def benchmark_batch_predict(n_docs=20_000, n_single=1000, n_jobs=1):
+    '''
+    Compares READMEs per minute of predict_readme one at a time against
+    predict_batch on `n_docs` synthetic READMEs
+    '''
+
+    import predict
+
+    docs = ReadmeGenerator().readmes(n_docs)
+    tfidf, model = predict.load_model()
+    start = time.perf_counter()
+    for doc in docs[:n_single]:
+        predict.predict_readme(doc, tfidf, model)
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    predict.predict_batch(docs, tfidf, model, n_jobs=n_jobs)
+    batch = time.perf_counter() - start
+    results = [{'path': 'single', 'docs': n_single,
+                'seconds': round(single, 3),
+                'docs_per_minute': round(n_single / single * 60)},
+               {'path': 'batch', 'docs': n_docs, 'n_jobs': n_jobs,
+                'seconds': round(batch, 3),
+                'docs_per_minute': round(n_docs / batch * 60)}]
+    for result in results:
+        print(f"predict {result['path']:<7} docs={result['docs']:<7} "
+              f"{result['docs_per_minute']:>10,} docs/min")
+
+    return results
+
+
+def benchmark_pruned_predict(sizes=(10_000, 100_000), n_jobs=1):
+    '''
+    Compares READMEs per second of predict_batch with the full tfidf
+    vectorizer against the vectorizer pruned to the model's features,
+    first with no words mapped yet and then with the words of the batch
+    mapped, asserting the probabilities are identical
+    '''
+
+    import numpy as np
+    import predict
+    from pruned_model import compile_model
+
+    tfidf, model = predict.load_model()
+    results = []
+    for n_docs in sizes:
+        docs = ReadmeGenerator().readmes(n_docs)
+        row = {'docs': n_docs}
+        start = time.perf_counter()
+        full = model.predict_proba(predict.vectorize_readmes(docs, tfidf,
+                                                             n_jobs))
+        row['full_per_second'] = round(n_docs / (time.perf_counter() - start))
+        vectorizer = compile_model(tfidf, model)
+        for name in ('cold', 'warm'):
+            start = time.perf_counter()
+            pruned = model.predict_proba(
+                predict.vectorize_readmes(docs, vectorizer, n_jobs))
+            row[f'pruned_{name}_per_second'] = round(
+                n_docs / (time.perf_counter() - start))
+            assert np.array_equal(full, pruned)
+        row['words_mapped'] = len(vectorizer.word_terms)
+        print(f"pruned predict docs={n_docs:<7} full "
+              f"{row['full_per_second']:>7,}/s  pruned cold "
+              f"{row['pruned_cold_per_second']:>7,}/s  warm "
+              f"{row['pruned_warm_per_second']:>7,}/s  "
+              f"{len(vectorizer.features)} of {vectorizer.n_features} "
+              f"features, {row['words_mapped']:,} words mapped")
+        results.append(row)
+
+    return results
+
+
+def benchmark_prediction_cache(n_urls=500, rounds=3, latency=0.02):
+    '''
+    Predicts `n_urls` README urls of a local stub server `rounds` times,
+    as repeated push events do, without a cache, then with a
+    PredictionCache: cold, warm, from its SQLite file in a new cache, and
+    after the model pickle changes; asserts every prediction matches the
+    uncached one
+    '''
+
+    import os
+    import pickle
+    import shutil
+    import tempfile
+    import requests
+    import predict
+    from prediction_cache import PredictionCache
+
+    docs = ReadmeGenerator().readmes(n_urls)
+    server, base = start_stub_server(latency, docs)
+    urls = [f'{base}/raw/owner/repo-{i}/README.md' for i in range(n_urls)]
+    results = []
+
+    def run(name, predict_url):
+        start = time.perf_counter()
+        predictions = [predict_url(url) for url in urls]
+        seconds = time.perf_counter() - start
+        results.append({'path': name, 'urls': n_urls,
+                        'seconds': round(seconds, 3),
+                        'urls_per_second': round(n_urls / seconds, 1)})
+        return predictions
+
+    def uncached(url):
+        return predict.predict_readme(requests.get(url).text)
+
+    expected = run('uncached', uncached)
+    for _ in range(rounds - 1):
+        run('uncached', uncached)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('tfidf.pickle', 'model.pickle'):
+            shutil.copy(name, tmp)
+        paths = {'tfidf_path': os.path.join(tmp, 'tfidf.pickle'),
+                 'model_path': os.path.join(tmp, 'model.pickle')}
+        path = os.path.join(tmp, 'prediction_cache.sqlite')
+        cache = PredictionCache(path, **paths)
+        assert run('cache_cold', cache.predict_url) == expected
+        for _ in range(rounds - 1):
+            assert run('cache_warm', cache.predict_url) == expected
+        cache.report()
+        cache.close()
+        # a new process starts with only the SQLite file
+        cache = PredictionCache(path, **paths)
+        assert run('cache_disk', cache.predict_url) == expected
+        # the same model pickled again is a new file and a new version
+        with open(paths['model_path'], 'rb') as f:
+            model = pickle.load(f)
+        with open(paths['model_path'], 'wb') as f:
+            pickle.dump(model, f, protocol=4)
+        assert run('model_changed', cache.predict_url) == expected
+        assert cache.report()['model_reloads'] == 1
+        cache.close()
+    server.shutdown()
+    for result in results:
+        print(f"prediction cache {result['path']:<14} "
+              f"{result['urls_per_second']:>8,.1f} urls/s")
+
+    return results
+
+
+def benchmark_cold_start(runs=5, lite_path='model.npz'):
+    '''
+    Times import + load + first prediction in fresh interpreters for the
+    pickled sklearn objects and for the exported lite model, exporting
+    the pickles to lite_path first
+    '''
+
+    import pickle
+    import statistics
+    import subprocess
+    import sys
+    from lite_model import export_model
+
+    with open('tfidf.pickle', 'rb') as f:
+        tfidf = pickle.load(f)
+    with open('model.pickle', 'rb') as f:
+        model = pickle.load(f)
+    export_model(tfidf, model, lite_path)
+    doc = 'python data analysis notebook pandas'
+    scripts = {
+        'pickle': ('import pickle\n'
+                   'tfidf = pickle.load(open("tfidf.pickle", "rb"))\n'
+                   'model = pickle.load(open("model.pickle", "rb"))\n'
+                   f'model.predict_proba(tfidf.transform([{doc!r}]))\n'),
+        'lite': ('from lite_model import LiteModel\n'
+                 f'lite = LiteModel({lite_path!r})\n'
+                 f'lite.predict_proba(lite.transform([{doc!r}]))\n'),
+    }
+    results = []
+    for name, script in scripts.items():
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-W', 'ignore', '-c', script],
+                           check=True)
+            times.append(time.perf_counter() - start)
+        seconds = statistics.median(times)
+        results.append({'format': name, 'runs': runs,
+                        'median_seconds': round(seconds, 3)})
+        print(f'cold start {name:<7} {seconds * 1000:8.1f}ms')
+
+    return results
+
+
+def benchmark_features(scale=10, n_models=3):
+    '''
+    Times featurizing train, validate and test once per feature set per
+    model with the sklearn vectorizers, as the report does, against one
+    tokenize-once features.build_features call
+    '''
+
+    import pandas as pd
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    import features
+    import prepare as p
+
+    base = len(pd.read_pickle('repos.pickle'))
+    docs = [p.lemmatize(p.normalize_readme(doc))
+            for doc in ReadmeGenerator().readmes(base * scale)]
+    df = pd.DataFrame({'lemmatized_readme': docs})
+    n = len(df)
+    X_train, X_validate, X_test = (df[:n * 6 // 10], df[n * 6 // 10:n * 8 // 10],
+                                   df[n * 8 // 10:])
+
+    def sklearn_sweep():
+        for _ in range(n_models):
+            for vectorizer in (CountVectorizer(),
+                               CountVectorizer(ngram_range=(2, 2)),
+                               TfidfVectorizer(binary=True)):
+                vectorizer.fit_transform(X_train.lemmatized_readme)
+                vectorizer.transform(X_validate.lemmatized_readme)
+                vectorizer.transform(X_test.lemmatized_readme)
+
+    before = _best_of(sklearn_sweep, 1)
+    after = _best_of(lambda: features.build_features(X_train, X_validate,
+                                                     X_test), 1)
+    print(f'features sklearn x{n_models * 3} docs={n:<7} {before:8.3f}s  '
+          f'tokenize once {after:8.3f}s  x{before / after:.2f}')
+
+    return [{'docs': n, 'sklearn_seconds': round(before, 3),
+             'tokenize_once_seconds': round(after, 3),
+             'speedup': round(before / after, 2)}]
+
+
+def benchmark_streaming(sizes=(1000, 4000, 16000), chunk_size=1000):
+    '''
+    Writes data2.json style corpora of growing size and reports the peak
+    traced memory and throughput of streaming.train_streaming against
+    json.load plus a TfidfVectorizer fit of the whole corpus
+    '''
+
+    import json
+    import os
+    import tempfile
+    import tracemalloc
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    import streaming
+
+    results = []
+    for size in sizes:
+        generator = ReadmeGenerator()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data2.json')
+            # write the corpus one synthetic chunk at a time
+            with open(path, 'w') as f:
+                f.write('[')
+                for start in range(0, size, chunk_size):
+                    records = generator.records(min(chunk_size, size - start),
+                                                start)
+                    for i, record in enumerate(records):
+                        f.write(',\n' if start or i else '\n')
+                        json.dump(record, f)
+                f.write('\n]')
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            streaming.train_streaming(path, chunk_size=chunk_size,
+                                      verbose=False)
+            stream_seconds = time.perf_counter() - start
+            stream_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            with open(path) as f:
+                records = [r for r in json.load(f) if r and
+                           r['language'] in streaming.LANGUAGES]
+            texts = [streaming.clean_for_model(r['readme_contents'])
+                     for r in records]
+            X = TfidfVectorizer().fit_transform(texts)
+            MultinomialNB().fit(X, [r['language'] for r in records])
+            memory_seconds = time.perf_counter() - start
+            memory_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        print(f'streaming docs={size:<7} peak {stream_peak / 2**20:7.1f}MB '
+              f'{size / stream_seconds:7.0f} docs/s   in memory peak '
+              f'{memory_peak / 2**20:7.1f}MB {size / memory_seconds:7.0f} docs/s')
+        results.append({'docs': size,
+                        'streaming_peak_mb': round(stream_peak / 2**20, 1),
+                        'streaming_docs_per_second': round(size / stream_seconds),
+                        'in_memory_peak_mb': round(memory_peak / 2**20, 1),
+                        'in_memory_docs_per_second': round(size / memory_seconds)})
+
+    return results
+
+
+def benchmark_ingest(sizes=(2000, 8000), null_every=10):
+    '''
+    Compares the old json.load and del loop of wrangle.open_json_data with
+    streaming JSON lines chunks through corpus.iter_frames, reporting the
+    time and peak traced memory of each over corpora of growing size
+    '''
+
+    import json
+    import os
+    import tempfile
+    import tracemalloc
+    import pandas as pd
+    import corpus
+
+    def legacy_load(path):
+        with open(path) as f:
+            repos = json.load(f)
+        for i, repo in enumerate(repos):
+            if repo == None:
+                del(repos[i])
+        return len(pd.json_normalize(repos, errors='ignore').dropna())
+
+    def stream_load(path):
+        return sum(len(df) for df in corpus.iter_frames(path, 1000))
+
+    results = []
+    for size in sizes:
+        records = list(ReadmeGenerator().records(size))
+        for i in range(0, size, null_every):
+            records[i] = None
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, 'data2.json')
+            jsonl_path = os.path.join(tmp, 'data2.jsonl')
+            with open(json_path, 'w') as f:
+                json.dump(records, f, indent=1)
+            corpus.write_jsonl(records, jsonl_path)
+            del records
+            row = {'docs': size}
+            for name, load, path in (('legacy', legacy_load, json_path),
+                                     ('streaming', stream_load, jsonl_path)):
+                tracemalloc.start()
+                start = time.perf_counter()
+                load(path)
+                row[f'{name}_seconds'] = round(time.perf_counter() - start, 3)
+                row[f'{name}_peak_mb'] = round(
+                    tracemalloc.get_traced_memory()[1] / 2**20, 1)
+                tracemalloc.stop()
+        print(f"ingest docs={size:<7} json.load {row['legacy_seconds']:7.3f}s "
+              f"peak {row['legacy_peak_mb']:7.1f}MB   jsonl chunks "
+              f"{row['streaming_seconds']:7.3f}s peak "
+              f"{row['streaming_peak_mb']:7.1f}MB")
+        results.append(row)
+
+    return results
+
+
+def benchmark_dedupe(sizes=(10_000, 100_000, 1_000_000), n_jobs=1,
+                     pairwise_docs=5_000):
+    '''
+    Times dedupe.near_duplicate_clusters on synthetic corpora with known
+    near duplicates, reporting docs per second and the share of true
+    duplicates found and of rows merged with a different original, and
+    times comparing the signatures of every pair of `pairwise_docs` texts
+    '''
+
+    import numpy as np
+    import pandas as pd
+    import dedupe
+
+    results = []
+    for size in sizes:
+        texts, origin = ReadmeGenerator().near_duplicates(size)
+        start = time.perf_counter()
+        labels = dedupe.near_duplicate_clusters(texts, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - start
+        del texts
+        # a row is found when it shares its original's cluster
+        found = labels == labels[origin]
+        copies = origin != np.arange(size)
+        # a cluster is impure when it holds rows of several originals
+        originals = pd.Series(origin).groupby(labels).nunique()
+        row = {'docs': size, 'seconds': round(elapsed, 3),
+               'docs_per_second': round(size / elapsed, 1),
+               'recall': round(float(found[copies].mean()), 4),
+               'impure_clusters': int((originals > 1).sum())}
+        print(f"dedupe  docs={size:<8} {row['docs_per_second']:9.1f} docs/s "
+              f"recall {row['recall']:.3f}, "
+              f"{row['impure_clusters']} impure clusters")
+        results.append(row)
+    # the quadratic alternative: comparing the signatures of every pair
+    texts, _ = ReadmeGenerator().near_duplicates(pairwise_docs)
+    start = time.perf_counter()
+    signatures = dedupe.minhash_signatures(texts)
+    pairs = 0
+    for i in range(0, pairwise_docs, 100):
+        block = signatures[i:i + 100]
+        agree = (block[:, None, :] == signatures[None, :, :]).mean(axis=2)
+        pairs += int((np.triu(agree >= 0.8, k=i + 1)).sum())
+    elapsed = time.perf_counter() - start
+    results.append({'method': 'pairwise', 'docs': pairwise_docs,
+                    'seconds': round(elapsed, 3), 'pairs': pairs,
+                    'docs_per_second': round(pairwise_docs / elapsed, 1)})
+    print(f'pairwise docs={pairwise_docs:<8} '
+          f'{pairwise_docs / elapsed:9.1f} docs/s')
+
+    return results
+
+
+def benchmark_similarity(sizes=(10_000, 100_000, 1_000_000), n_queries=200,
+                         k=10, n_words=120, replace=0.5, seed=19,
+                         source='repos.pickle', tfidf_path='tfidf.pickle'):
+    '''
+    Indexes two synthetic corpora at every size and returns a list of
+    dicts with the build and load time and the latency of top k queries
+    with prepared READMEs: pruned search, the plain sparse product one
+    query at a time, and search_batch per query.
+
+    random   - `n_words` words drawn with the word frequencies of
+               repos.pickle, so no repo is much like any query
+    variants - the first `n_words` words of prepared READMEs with a
+               `replace` share of them redrawn that way, so every query
+               has close neighbours
+    '''
+
+    import os
+    import pickle
+    import tempfile
+    import numpy as np
+    import pandas as pd
+    import similarity
+
+    repos = pd.read_pickle(source)
+    readmes = repos.lemmatized_readme.str.split().tolist()
+    tokens = repos.lemmatized_readme.str.split().explode().dropna().to_numpy()
+    with open(tfidf_path, 'rb') as f:
+        tfidf = pickle.load(f)
+    rng = np.random.default_rng(seed)
+    queries = repos.lemmatized_readme.sample(n_queries, replace=True,
+                                             random_state=seed).tolist()
+
+    def random_text():
+        return ' '.join(tokens[rng.integers(len(tokens), size=n_words)])
+
+    def variant_text():
+        words = np.array(readmes[rng.integers(len(readmes))][:n_words],
+                         dtype=object)
+        redraw = rng.random(len(words)) < replace
+        words[redraw] = tokens[rng.integers(len(tokens), size=redraw.sum())]
+        return ' '.join(words)
+
+    results = []
+    for corpus, make_text in (('random', random_text),
+                              ('variants', variant_text)):
+        for size in sizes:
+            df = pd.DataFrame({
+                'repository': [f'synthetic/repo-{i}' for i in range(size)],
+                'programming_language': 'Python',
+                'lemmatized_readme': [make_text() for _ in range(size)]})
+            row = {'corpus': corpus, 'docs': size}
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'index')
+                start = time.perf_counter()
+                similarity.build_index(df, tfidf).save(path)
+                row['build_seconds'] = round(time.perf_counter() - start, 3)
+                del df
+                start = time.perf_counter()
+                index = similarity.load_index(path)
+                row['load_seconds'] = round(time.perf_counter() - start, 4)
+                Q = index.vectorize(queries, clean=False)
+                for name, query in (
+                        ('pruned', lambda q: index.top_k_pruned(q, k)),
+                        ('product', lambda q: index.top_k_blocked(q, k))):
+                    latencies = []
+                    for i in range(n_queries):
+                        start = time.perf_counter()
+                        query(Q[i])
+                        latencies.append(time.perf_counter() - start)
+                    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+                    row[f'{name}_p50_ms'] = round(float(p50), 3)
+                    row[f'{name}_p95_ms'] = round(float(p95), 3)
+                start = time.perf_counter()
+                docs, scores = index.top_k_blocked(Q, k)
+                row['batch_ms_per_query'] = round(
+                    (time.perf_counter() - start) * 1000 / n_queries, 3)
+                # the pruned search returns the exact top k
+                pruned = np.array([index.top_k_pruned(Q[i], k)[1]
+                                   for i in range(n_queries)])
+                assert np.allclose(pruned, scores, atol=1e-5)
+                del index, Q
+            print(f"similarity {corpus:<8} docs={size:<8} build "
+                  f"{row['build_seconds']:6.1f}s load "
+                  f"{row['load_seconds'] * 1000:5.1f}ms  p50/p95 ms: pruned "
+                  f"{row['pruned_p50_ms']:.2f}/{row['pruned_p95_ms']:.2f} "
+                  f"product {row['product_p50_ms']:.2f}/"
+                  f"{row['product_p95_ms']:.2f}  batch "
+                  f"{row['batch_ms_per_query']:.2f} per query")
+            results.append(row)
+
+    return results
+
+
+def _legacy_word_analytics(X, y, k=20):
+    '''
+    The report's word and bigram frequencies: one joined string per
+    language, value_counts of the words and of nltk.bigrams, and the words
+    and bigrams common to every language by reduce over sets
+    '''
+
+    from functools import reduce
+    import nltk
+    import pandas as pd
+
+    all_words = pd.Series(' '.join(X.lemmatized_readme).replace('\'', '')
+                          .split())
+    all_words.value_counts().head(k)
+    pd.Series(nltk.bigrams(all_words)).value_counts().head(k)
+    words, bigrams = [], []
+    for language in y.programming_language.unique():
+        language_words = pd.Series(' '.join(
+            X[y.programming_language == language].lemmatized_readme)
+            .replace('\'', '').split())
+        language_words.value_counts().head(k)
+        language_bigrams = pd.Series(nltk.bigrams(language_words))
+        language_bigrams.value_counts().head(k)
+        words.append(language_words)
+        bigrams.append(language_bigrams)
+    reduce(lambda i, j: i & j, (set(w) for w in words))
+    reduce(lambda i, j: i & j, (set(b) for b in bigrams))
+
+
+def benchmark_analytics(scales=(1, 10, 100), k=20, new_share=0.1):
+    '''
+    Times the report's word and bigram frequencies against counting with
+    analytics.count_terms and reading the same top k and common terms,
+    plus every language's distinctive terms, off the count matrix; and
+    merging the counts of a new_share of new rows against recounting
+    '''
+
+    import analytics
+
+    results = []
+    for scale in scales:
+        df = ReadmeGenerator().repos(scale)
+        X, y = df[['lemmatized_readme']], df[['programming_language']]
+
+        def engine():
+            counts = analytics.count_terms(X.lemmatized_readme,
+                                           y.programming_language)
+            for ngram in (1, 2):
+                counts.top_k(k, ngram=ngram)
+                counts.common_terms(ngram)
+                for language in counts.languages:
+                    counts.top_k(k, language, ngram)
+                    counts.distinctive(language, k, ngram)
+            return counts
+
+        before = _best_of(lambda: _legacy_word_analytics(X, y, k), 1)
+        after = _best_of(engine, 1)
+        # counts of the old rows are kept; only the new rows are counted
+        n_new = int(len(df) * new_share)
+        old = analytics.count_terms(df.lemmatized_readme[n_new:],
+                                    df.programming_language[n_new:])
+        new = df[:n_new]
+        merge = _best_of(lambda: old.merge(analytics.count_terms(
+            new.lemmatized_readme, new.programming_language)), 1)
+        recount = _best_of(lambda: analytics.count_terms(
+            df.lemmatized_readme, df.programming_language), 1)
+        print(f'analytics docs={len(df):<7} report {before:8.3f}s  count '
+              f'matrix {after:8.3f}s  x{before / after:.2f}  merge '
+              f'{new_share:.0%} new {merge:.3f}s  recount {recount:.3f}s')
+        results.append({'docs': len(df), 'report_seconds': round(before, 3),
+                        'count_matrix_seconds': round(after, 3),
+                        'speedup': round(before / after, 2),
+                        'merge_seconds': round(merge, 3),
+                        'recount_seconds': round(recount, 3)})
+
+    return results
+
+
+def benchmark_storage(scales=(1, 100), repeat=3):
+    '''
+    Times loading the prepared repos DataFrame from a pickle against
+    parquet, reading every column, only the modeling columns, and only
+    the modeling columns of Python repos
+    '''
+
+    import os
+    import pickle
+    import tempfile
+    import wrangle
+
+    columns = ['lemmatized_readme', 'target_class']
+    results = []
+    for scale in scales:
+        df = ReadmeGenerator().repos(scale)
+        with tempfile.TemporaryDirectory() as tmp:
+            base = os.path.join(tmp, 'repos')
+            wrangle.make_pickles(df, base)
+            wrangle.make_parquet(df, base)
+            sizes = {ext: os.path.getsize(f'{base}.{ext}') / 2**20
+                     for ext in ('pickle', 'parquet')}
+            timings = {
+                'pickle': _best_of(lambda: wrangle.open_pickles(base),
+                                   repeat),
+                'parquet': _best_of(lambda: wrangle.open_parquet(base),
+                                    repeat),
+                'parquet_columns': _best_of(
+                    lambda: wrangle.open_parquet(base, columns=columns),
+                    repeat),
+                'parquet_python': _best_of(
+                    lambda: wrangle.open_parquet(base, columns=columns,
+                                                 languages=['Python']),
+                    repeat)}
+        print(f"storage rows={len(df):<7} pickle {timings['pickle']:7.3f}s "
+              f"({sizes['pickle']:.1f}MB)  parquet {timings['parquet']:7.3f}s "
+              f"({sizes['parquet']:.1f}MB)  columns "
+              f"{timings['parquet_columns']:7.3f}s  python only "
+              f"{timings['parquet_python']:7.3f}s  "
+              f"x{timings['pickle'] / timings['parquet_columns']:.1f}")
+        results.append({'rows': len(df),
+                        'pickle_mb': round(sizes['pickle'], 1),
+                        'parquet_mb': round(sizes['parquet'], 1),
+                        **{f'{k}_seconds': round(v, 4)
+                           for k, v in timings.items()}})
+
+    return results
+
+
+def benchmark_feature_engineering(n_rows=2_000_000, repeat=3):
+    '''
+    Times the per-row apply(len), six np.where passes and isin outlier
+    filter that wrangle used against str.len, the labels registry lookup
+    and a boolean mask on a frame of n_rows sampled repos
+    '''
+
+    import numpy as np
+    import pandas as pd
+    import prepare as p
+    import wrangle
+
+    # keep the real lengths but only short texts, so millions of rows fit
+    # in memory
+    repos = pd.read_pickle('repos.pickle')[['cleaned_readme',
+                                            'cleaned_char_length',
+                                            'programming_language']]
+    repos['cleaned_readme'] = repos.cleaned_readme.str.slice(0, 200)
+    df = repos.sample(n_rows, replace=True, random_state=19)
+    df = df.reset_index(drop=True)
+
+    def legacy_counts():
+        return df.cleaned_readme.apply(lambda row: len(row))
+
+    def legacy_encode():
+        target = np.where(df.programming_language == 'Python', 0, -1)
+        for i, language in enumerate(['JavaScript', 'Jupyter Notebook',
+                                      'HTML', 'R', 'TypeScript'], start=1):
+            target = np.where(df.programming_language == language, i, target)
+        return target.astype(int)
+
+    def legacy_outliers():
+        return df[df.cleaned_char_length.isin(
+            p.filter_iqr_outliers(df.cleaned_char_length))]
+
+    pairs = {'char counts': (legacy_counts,
+                             lambda: df.cleaned_readme.str.len()),
+             'encode target': (legacy_encode,
+                               lambda: wrangle.encode_languages(
+                                   df.programming_language)),
+             'outlier filter': (legacy_outliers,
+                                lambda: df[p.iqr_outlier_mask(
+                                    df.cleaned_char_length)])}
+    results = []
+    for name, (before, after) in pairs.items():
+        before_seconds = _best_of(before, repeat)
+        after_seconds = _best_of(after, repeat)
+        print(f'{name:<15} rows={n_rows:<8} before {before_seconds:7.3f}s  '
+              f'after {after_seconds:7.3f}s  '
+              f'x{before_seconds / after_seconds:.1f}')
+        results.append({'stage': name, 'rows': n_rows,
+                        'before_seconds': round(before_seconds, 4),
+                        'after_seconds': round(after_seconds, 4),
+                        'speedup': round(before_seconds / after_seconds, 1)})
+
+    return results
+
+
+#################### Suite ####################
+
+
+def _timed(results, benchmark, stage, docs, func, *args, **kwargs):
+    '''
+    Calls func once, appends its wall time and throughput to results and
+    returns its output
+    '''
+
+    start = time.perf_counter()
+    output = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    results.append({'benchmark': benchmark, 'stage': stage, 'docs': docs,
+                    'seconds': round(seconds, 6),
+                    'docs_per_second': round(docs / max(seconds, 1e-9), 1)})
+    print(f'{benchmark:<10} {stage:<22} docs={docs:<8} {seconds:9.3f}s '
+          f'{docs / max(seconds, 1e-9):12.1f} docs/s')
+
+    return output
+
+
+def suite_scrape(results, records, max_repos=500, workers=8):
+    '''
+    Times acquire.scrape_github_data against the stub server, for at most
+    max_repos of the corpus, since every repo is three local requests
+    '''
+
+    from acquire import scrape_github_data
+
+    n_repos = min(len(records), max_repos)
+    server, url = start_stub_server()
+    repos = [record['repo'] for record in records[:n_repos]]
+    _timed(results, 'scrape', f'scrape_{workers}_workers', n_repos,
+           scrape_github_data, repos, workers=workers, api_url=url,
+           verbose=False)
+    server.shutdown()
+
+
+def suite_wrangle(results, records, tmp):
+    '''
+    Times each stage of prep_github_repos and polish_github_repos on the
+    corpus written as JSON lines, returning the polished DataFrame
+    '''
+
+    import os
+    import corpus
+    import wrangle
+
+    n = len(records)
+    path = os.path.join(tmp, 'data2.jsonl')
+    _timed(results, 'wrangle', 'write_jsonl', n, corpus.write_jsonl,
+           records, path)
+    df = _timed(results, 'wrangle', 'open_json_data', n,
+                wrangle.open_json_data, path)
+    df = _timed(results, 'wrangle', 'get_english_only', len(df),
+                wrangle.get_english_only, df, verbose=False)
+    df = _timed(results, 'wrangle', 'normalize_readmes', len(df),
+                wrangle.normalize_readmes, df)
+    df = _timed(results, 'wrangle', 'create_char_counts', len(df),
+                wrangle.create_char_counts, df)
+    df = _timed(results, 'wrangle', 'create_pct_changed', len(df),
+                wrangle.create_pct_changed, df)
+    df = _timed(results, 'wrangle', 'filter_language', len(df),
+                wrangle.filter_language, df)
+    df = _timed(results, 'wrangle', 'polish_github_repos', len(df),
+                wrangle.polish_github_repos, df)
+    df = _timed(results, 'wrangle', 'encode_target', len(df),
+                wrangle.encode_target, df)
+
+    return df
+
+
+def suite_prepare(results, readmes):
+    '''
+    Times each prepare function over every README, each on the output of
+    the step before it as the pipeline runs them
+    '''
+
+    import prepare as p
+
+    n = len(readmes)
+    stripped = _timed(results, 'prepare', 'strip_markup', n,
+                      lambda: [p.strip_markup(text) for text in readmes])
+    cleaned = _timed(results, 'prepare', 'basic_clean', n,
+                     lambda: [p.basic_clean(text) for text in stripped])
+    tokens = _timed(results, 'prepare', 'tokenize', n,
+                    lambda: [p.tokenize(text) for text in cleaned])
+    _timed(results, 'prepare', 'remove_stopwords', n,
+           lambda: [p.remove_stopwords(text) for text in tokens])
+    _timed(results, 'prepare', 'stem', n,
+           lambda: [p.stem(text) for text in tokens])
+    _timed(results, 'prepare', 'lemmatize', n,
+           lambda: [p.lemmatize(text) for text in tokens])
+    _timed(results, 'prepare', 'normalize_readme', n,
+           lambda: [p.normalize_readme(text) for text in readmes])
+
+
+def suite_vectorize(results, df):
+    '''
+    Times fitting and applying the report's tf-idf vectorizer and the
+    tokenize-once features.build_features on the polished corpus, and
+    returns the fitted vectorizer and a decision tree fit on it
+    '''
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.tree import DecisionTreeClassifier
+    import features
+
+    texts = df.lemmatized_readme
+    n = len(texts)
+    tfidf = TfidfVectorizer(binary=True)
+    X = _timed(results, 'vectorize', 'tfidf_fit_transform', n,
+               tfidf.fit_transform, texts)
+    _timed(results, 'vectorize', 'tfidf_transform', n, tfidf.transform,
+           texts)
+    frame = df[['lemmatized_readme']]
+    _timed(results, 'vectorize', 'build_features', n,
+           features.build_features, frame, frame.iloc[:0], frame.iloc[:0])
+    model = _timed(results, 'vectorize', 'tree_fit', n,
+                   DecisionTreeClassifier(max_depth=3,
+                                          random_state=19).fit,
+                   X, df.target_class)
+
+    return tfidf, model
+
+
+def suite_predict(results, readmes, tfidf, model, max_single=1000):
+    '''
+    Times predict.predict_readme one README at a time, the work
+    predict_readme_lang does after fetching a README, for at most
+    max_single READMEs with p50 and p99 latency, and predict_batch over
+    every README
+    '''
+
+    import predict
+
+    n_single = min(len(readmes), max_single)
+    latencies = []
+    start = time.perf_counter()
+    for text in readmes[:n_single]:
+        begin = time.perf_counter()
+        predict.predict_readme(text, tfidf, model)
+        latencies.append(time.perf_counter() - begin)
+    seconds = time.perf_counter() - start
+    results.append({'benchmark': 'predict', 'stage': 'predict_readme',
+                    'docs': n_single, 'seconds': round(seconds, 6),
+                    'docs_per_second': round(n_single / seconds, 1),
+                    **_percentiles(latencies)})
+    print(f"{'predict':<10} {'predict_readme':<22} docs={n_single:<8} "
+          f'{seconds:9.3f}s {n_single / seconds:12.1f} docs/s')
+    _timed(results, 'predict', 'predict_batch', len(readmes),
+           predict.predict_batch, readmes, tfidf, model)
+
+
+SUITE = ('scrape', 'wrangle', 'prepare', 'vectorize', 'predict')
+
+
+def _environment():
+    '''
+    Returns a dict describing the commit, python and machine of a run
+    '''
+
+    import os
+    import platform
+    import subprocess
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {'commit': commit, 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def run_suite(sizes=(1_000, 10_000), benchmarks=SUITE, seed=19,
+              output='benchmark_results.json', source='repos.pickle'):
+    '''
+    Runs the end-to-end benchmarks on synthetic corpora of each size and
+    writes the results with the environment to output as JSON; the same
+    seed gives the same corpora, so files from two commits compare.
+    Only the suites in benchmarks are recorded; wrangle and vectorize
+    also run, unrecorded, when a later suite selected needs their output
+    '''
+
+    import json
+    import tempfile
+
+    results = []
+    for size in sizes:
+        print(f'---- {size} documents ----')
+        generator = ReadmeGenerator(source, seed)
+        records = list(generator.records(size))
+        readmes = [record['readme_contents'] for record in records]
+        if 'scrape' in benchmarks:
+            suite_scrape(results, records)
+        if 'prepare' in benchmarks:
+            suite_prepare(results, readmes)
+        # a later suite needs the output of the ones before it; those run
+        # without recording their timings unless they were asked for
+        if {'wrangle', 'vectorize', 'predict'} & set(benchmarks):
+            with tempfile.TemporaryDirectory() as tmp:
+                df = suite_wrangle(results if 'wrangle' in benchmarks
+                                   else [], records, tmp)
+            del records
+        if {'vectorize', 'predict'} & set(benchmarks):
+            tfidf, model = suite_vectorize(results if 'vectorize' in benchmarks
+                                           else [], df)
+        if 'predict' in benchmarks:
+            suite_predict(results, readmes, tfidf, model)
+    report = {'environment': _environment(), 'seed': seed,
+              'sizes': list(sizes), 'results': results}
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f'Results written to {output}')
+
+    return report
+
+
+def compare_results(before_path, after_path, threshold=1.10):
+    '''
+    Prints the change in seconds of every benchmark stage between two
+    run_suite JSON files, flagging stages slower by more than threshold,
+    and returns the list of regressions
+    '''
+
+    import json
+
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    old = {(r['benchmark'], r['stage'], r['docs']): r['seconds']
+           for r in before['results']}
+    regressions = []
+    for r in after['results']:
+        key = (r['benchmark'], r['stage'], r['docs'])
+        if key not in old:
+            continue
+        ratio = r['seconds'] / max(old[key], 1e-9)
+        flag = 'REGRESSION' if ratio > threshold else ''
+        print(f'{key[0]:<10} {key[1]:<22} docs={key[2]:<8} '
+              f'{old[key]:9.3f}s -> {r["seconds"]:9.3f}s  x{ratio:5.2f} {flag}')
+        if flag:
+            regressions.append({'benchmark': key[0], 'stage': key[1],
+                                'docs': key[2], 'ratio': round(ratio, 3)})
+
+    return regressions
+
+
+def run_component_benchmarks():
+    '''
+    Runs the benchmarks of the individual optimizations
+    '''
+
+    benchmark_scrape()
+    benchmark_revalidate()
+    benchmark_harvest()
+    benchmark_normalize()
+    benchmark_prepare()
+    benchmark_parallel_prepare()
+    benchmark_language()
+    benchmark_service()
+    benchmark_batch_predict()
+    benchmark_pruned_predict()
+    benchmark_prediction_cache()
+    benchmark_cold_start()
+    benchmark_features()
+    benchmark_streaming()
+    benchmark_ingest()
+    benchmark_dedupe()
+    benchmark_similarity()
+    benchmark_analytics()
+    benchmark_storage()
+    benchmark_feature_engineering()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Run the end-to-end benchmark suite')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1_000, 10_000],
+                        help='corpus sizes, e.g. 1000 10000 100000 1000000')
+    parser.add_argument('--only', nargs='+', choices=SUITE, default=SUITE)
+    parser.add_argument('--seed', type=int, default=19)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='compare two result files instead of running')
+    parser.add_argument('--components', action='store_true',
+                        help='run the individual optimization benchmarks')
+    args = parser.parse_args()
+    if args.compare:
+        compare_results(*args.compare)
+    elif args.components:
+        run_component_benchmarks()
+    else:
+        run_suite(args.sizes, args.only, args.seed, args.output)
@@ -0,0 +1,236 @@
+'''
+Streaming access to the raw scraped corpus.
+
+The scrape is stored as append-only JSON lines, "data2.jsonl", one repo
+record per line, written and flushed as each repo finishes so the corpus
+can be read while the scrape is still running. Files ending in .gz are
+gzip compressed and files ending in .zst are zstd compressed, which needs
+the optional zstandard package.
+
+Records are parsed one at a time, from JSON lines or from the older
+"data2.json" JSON array, so memory use does not grow with the file size.
+'''
+
+
+# import standard libraries
+import gzip
+import io
+import json
+import os
+from itertools import islice
+
+# zstd compression is optional; without it .zst files cannot be opened
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# the raw corpus written by the scrape, and the older JSON array format
+RAW_CORPUS = 'data2.jsonl'
+LEGACY_CORPUS = 'data2.json'
+# characters skipped between records: whitespace and array commas
+SEPARATORS = ' \t\r\n,'
+
+
+#################### Files ####################
+
+
+def open_text(path, mode='r'):
+    '''
+    Opens path as a utf-8 text file in mode 'r', 'w' or 'a', compressed
+    with gzip when it ends in .gz and with zstd when it ends in .zst
+    '''
+
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError('Reading or writing .zst files needs the '
+                              'zstandard package: pip install zstandard')
+        raw = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw,
+                                                                closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw,
+                                                              closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+
+    return open(path, mode, encoding='utf-8')
+
+
+def find_corpus(paths=(RAW_CORPUS, RAW_CORPUS + '.gz', RAW_CORPUS + '.zst',
+                       LEGACY_CORPUS)):
+    '''
+    Returns the first of paths that exists, or None when none do
+    '''
+
+    for path in paths:
+        if os.path.isfile(path):
+            return path
+
+    return None
+
+
+#################### Reading ####################
+
+
+def iter_jsonl(path, skip_nulls=True):
+    '''
+    Takes the path of a JSON lines file and yields its records one line at
+    a time; a last line without a newline is a record still being written
+    and is skipped when it does not parse
+    '''
+
+    with open_text(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                if line.endswith('\n'):
+                    raise
+                return
+            if record is not None or not skip_nulls:
+                yield record
+
+
+def iter_json_records(path, block_size=1 << 20, skip_nulls=True):
+    '''
+    Takes the path of a JSON array or JSON lines file and yields its
+    records one at a time, reading block_size characters at a time;
+    null records are skipped unless skip_nulls is False
+    '''
+
+    if '.jsonl' in os.path.basename(path):
+        yield from iter_jsonl(path, skip_nulls)
+        return
+    decoder = json.JSONDecoder()
+    with open_text(path) as f:
+        buffer, pos, eof = '', 0, False
+        in_array = None
+        while True:
+            # skip separators, reading more when the buffer runs out
+            while pos < len(buffer) and buffer[pos] in SEPARATORS:
+                pos += 1
+            if pos == len(buffer):
+                if eof:
+                    return
+                buffer, pos = f.read(block_size), 0
+                eof = buffer == ''
+                continue
+            # the first character tells a JSON array from JSON lines
+            if in_array is None:
+                in_array = buffer[pos] == '['
+                pos += in_array
+                continue
+            if in_array and buffer[pos] == ']':
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # the record continues past the buffer
+                if eof:
+                    raise
+                more = f.read(block_size)
+                buffer, pos, eof = buffer[pos:] + more, 0, more == ''
+                continue
+            pos = end
+            if record is not None or not skip_nulls:
+                yield record
+
+
+def iter_chunks(records, chunk_size):
+    '''
+    Takes an iterable of records and yields lists of up to chunk_size
+    consecutive records
+    '''
+
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_frames(path, chunk_size=10_000, columns=None):
+    '''
+    Takes the path of a corpus file and yields DataFrames of up to
+    chunk_size non-null records, keeping only columns when given
+    '''
+
+    # pandas is only needed for frames, so the scraper's writer loads fast
+    import pandas as pd
+
+    for chunk in iter_chunks(iter_json_records(path), chunk_size):
+        yield pd.DataFrame.from_records(chunk, columns=columns)
+
+
+def read_frame(path, chunk_size=10_000, columns=None):
+    '''
+    Returns a DataFrame of the non-null records of a corpus file, built
+    chunk_size records at a time
+    '''
+
+    import pandas as pd
+
+    frames = list(iter_frames(path, chunk_size, columns))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+#################### Writing ####################
+
+
+class JsonlWriter:
+    '''
+    Appends records to a JSON lines corpus file, one line per record,
+    flushing after each so readers see every finished record.
+
+    Opened with mode 'w' it starts a new file and with mode 'a' it adds
+    to an existing one; use it as a context manager to close the file.
+    '''
+
+    def __init__(self, path=RAW_CORPUS, mode='w', skip_nulls=True):
+        self.path = path
+        self.skip_nulls = skip_nulls
+        self.written = 0
+        self.file = open_text(path, mode)
+
+    def write(self, record):
+        '''
+        Appends one record, skipping nulls unless skip_nulls is False
+        '''
+
+        if record is None and self.skip_nulls:
+            return
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+        self.written += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_jsonl(records, path=RAW_CORPUS, mode='w'):
+    '''
+    Writes an iterable of records to a JSON lines file and returns the
+    number of records written
+    '''
+
+    with JsonlWriter(path, mode) as writer:
+        for record in records:
+            writer.write(record)
+
+    return writer.written
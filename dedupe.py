@@ -0,0 +1,258 @@
+'''
+Near-duplicate README detection with MinHash and locality-sensitive hashing.
+
+Forks and template-generated repos have READMEs that differ in a few
+words, which drop_duplicates does not catch. Each README is cut into
+overlapping word shingles, and a MinHash signature of num_perm values
+estimates the Jaccard similarity of two shingle sets as the share of
+equal values. The signatures are split into bands, and READMEs sharing
+a whole band in any band are candidate duplicates. A candidate is
+grouped with its bucket's first README when their signatures agree on
+at least threshold of their values. The groups are joined into clusters
+with connected components, so the work grows linearly with the number
+of READMEs instead of comparing every pair.
+
+    df = drop_near_duplicates(df, threshold=0.8, n_jobs=4)
+'''
+
+
+# import standard libraries
+import itertools
+import re
+import zlib
+from functools import partial
+
+# import data tools
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# import parallel helper
+from prepare import parallel_apply
+
+
+# words of a README, lowercased before matching
+WORD_RE = re.compile(r'[a-z0-9]+')
+# signatures hold the top 32 bits of each permuted 64 bit shingle hash
+MAX_HASH = np.uint64(2**32 - 1)
+
+
+#################### Signatures ####################
+
+
+def shingle_hashes(texts, k=5, seed=19):
+    '''
+    Takes a list of texts and returns a numpy uint64 array of the hashes
+    of the k word shingles of every text, in text order, and an int array
+    of the number of shingles of each; a text shorter than k words is one
+    shingle, and a text without words has none
+    '''
+
+    words = [WORD_RE.findall(text.lower()) for text in texts]
+    counts = np.array([len(w) for w in words], dtype=np.int64)
+    # crc32 each word once; a shingle hash mixes the hashes of its words
+    flat = np.fromiter(map(zlib.crc32, map(str.encode,
+                                           itertools.chain.from_iterable(words))),
+                       dtype=np.uint64, count=int(counts.sum()))
+    sizes = np.where(counts >= k, counts - k + 1, np.minimum(counts, 1))
+    ends = np.cumsum(counts)
+    # first word of every shingle and the end of its text
+    starts = np.repeat(ends - counts, sizes) + \
+             np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    stops = np.repeat(ends, sizes)
+    mixers = make_permutations(k, seed)[0]
+    padded = np.r_[flat, np.zeros(k, dtype=np.uint64)]
+    hashes = np.zeros(len(starts), dtype=np.uint64)
+    for j in range(k):
+        # words past the end of a short text are left out
+        hashes += np.where(starts + j < stops, padded[starts + j] * mixers[j],
+                           np.uint64(0))
+
+    return hashes, sizes
+
+
+def make_permutations(num_perm=128, seed=19):
+    '''
+    Returns two uint64 arrays of num_perm odd multipliers and num_perm
+    offsets, the random hash functions of the signatures
+    '''
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    return a, b
+
+
+def minhash_signatures(texts, num_perm=128, k=5, seed=19):
+    '''
+    Takes a list of texts and returns a (len(texts), num_perm) uint32
+    array of their MinHash signatures; texts without words get a row of
+    the largest value
+    '''
+
+    a, b = make_permutations(num_perm, seed)
+    shingles, sizes = shingle_hashes(texts, k, seed)
+    signatures = np.full((len(texts), num_perm), MAX_HASH, dtype=np.uint32)
+    present = np.flatnonzero(sizes)
+    if len(present) == 0:
+        return signatures
+    # the shingles of the texts are consecutive, so reduce at their offsets
+    offsets = np.r_[0, np.cumsum(sizes[present])[:-1]]
+    for j in range(num_perm):
+        # multiply-shift hashing: the top 32 bits of a * x + b, wrapping
+        permuted = (a[j] * shingles + b[j]) >> np.uint64(32)
+        signatures[present, j] = np.minimum.reduceat(permuted, offsets)
+
+    return signatures
+
+
+def _signature_chunk(texts, num_perm, k, seed):
+    return minhash_signatures(texts, num_perm, k, seed)
+
+
+def signatures_parallel(texts, num_perm=128, k=5, seed=19, n_jobs=1,
+                        chunk_size=10_000):
+    '''
+    Returns the MinHash signatures of texts, computed chunk_size texts at a
+    time in n_jobs processes (-1 for all cores)
+    '''
+
+    texts = list(texts)
+    chunks = [texts[i:i + chunk_size]
+              for i in range(0, len(texts), chunk_size)]
+    if not chunks:
+        return np.empty((0, num_perm), dtype=np.uint32)
+    results = parallel_apply(partial(_signature_chunk, num_perm=num_perm,
+                                     k=k, seed=seed),
+                             chunks, n_jobs=n_jobs, chunks_per_job=1)
+
+    return np.concatenate(results)
+
+
+#################### LSH ####################
+
+
+def optimal_bands(threshold, num_perm=128):
+    '''
+    Returns the (bands, rows) with bands * rows <= num_perm whose banding
+    S-curve, where pairs are as likely to collide as not, sits closest to
+    threshold, preferring more bands, which miss fewer duplicates
+    '''
+
+    options = [(bands, num_perm // bands) for bands in range(1, num_perm + 1)]
+
+    return min(options, key=lambda o: (abs((1 / o[0]) ** (1 / o[1])
+                                           - threshold), -o[0]))
+
+
+def candidate_edges(signatures, threshold=0.8, bands=None):
+    '''
+    Takes an array of signatures and returns two int64 arrays of the
+    (bucket first, member) pairs sharing a band whose signatures agree on
+    at least threshold of their values
+    '''
+
+    n, num_perm = signatures.shape
+    if bands is None:
+        bands, rows = optimal_bands(threshold, num_perm)
+    else:
+        rows = num_perm // bands
+    # texts without words would all share the same buckets
+    present = np.flatnonzero((signatures != np.uint32(MAX_HASH)).any(axis=1))
+    if len(present) < 2:
+        # an empty frame or only blank READMEs has nothing to pair
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    sources, targets = [], []
+    mixers = make_permutations(rows, seed=0)[0]
+    for band in range(bands):
+        block = signatures[present, band * rows:(band + 1) * rows]
+        # one 64 bit key per band; colliding keys are checked below
+        keys = (block.astype(np.uint64) * mixers).sum(axis=1)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        first = np.repeat(order[starts], np.diff(np.r_[starts, len(keys)]))
+        member = first != order
+        sources.append(present[first[member]])
+        targets.append(present[order[member]])
+    sources = np.concatenate(sources) if sources else np.empty(0, np.int64)
+    targets = np.concatenate(targets) if targets else np.empty(0, np.int64)
+    # keep each pair once, then those similar enough
+    pairs = np.unique(np.stack([sources, targets], axis=1), axis=0)
+    agree = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    pairs = pairs[agree >= threshold]
+
+    return pairs[:, 0], pairs[:, 1]
+
+
+def cluster_labels(n, sources, targets):
+    '''
+    Returns an int array of the cluster of each of n texts, joining the
+    texts of every (source, target) pair into the same cluster
+    '''
+
+    graph = coo_matrix((np.ones(len(sources), dtype=np.int8),
+                        (sources, targets)), shape=(n, n))
+
+    return connected_components(graph, directed=False)[1]
+
+
+#################### Deduplication ####################
+
+
+def near_duplicate_clusters(texts, threshold=0.8, num_perm=128, k=5,
+                            bands=None, seed=19, n_jobs=1,
+                            chunk_size=10_000):
+    '''
+    Takes a sequence of texts and returns an int array of the cluster of
+    each; texts whose estimated Jaccard similarity of k word shingles
+    reaches threshold share a cluster
+    '''
+
+    signatures = signatures_parallel(texts, num_perm, k, seed, n_jobs,
+                                     chunk_size)
+    if len(signatures) == 0:
+        return np.empty(0, dtype=np.int32)
+    sources, targets = candidate_edges(signatures, threshold, bands)
+
+    return cluster_labels(len(signatures), sources, targets)
+
+
+def drop_near_duplicates(df, column='readme_contents', threshold=0.8,
+                         num_perm=128, k=5, bands=None, n_jobs=1,
+                         id_column='repo', verbose=True,
+                         return_clusters=False):
+    '''
+    Takes a DataFrame and returns it keeping only the first row of every
+    cluster of near-duplicate column texts; prints how many clusters were
+    collapsed and the largest ones when verbose. With return_clusters it
+    also returns a DataFrame of the clusters, one row each with its size,
+    the kept row's id_column and the dropped ones
+    '''
+
+    labels = near_duplicate_clusters(df[column].tolist(), threshold,
+                                     num_perm, k, bands, n_jobs=n_jobs)
+    keep = ~pd.Series(labels).duplicated().to_numpy()
+    ids = df[id_column] if id_column in df else pd.Series(df.index)
+    ids = ids.reset_index(drop=True)
+    groups = pd.DataFrame({'cluster': labels, 'id': ids, 'kept': keep})
+    sizes = groups.cluster.map(groups.cluster.value_counts())
+    groups = groups[sizes > 1]
+    clusters = (groups.groupby('cluster', sort=False)
+                      .agg(size=('id', 'size'),
+                           kept=('id', 'first'),
+                           dropped=('id', lambda x: list(x.iloc[1:])))
+                      .sort_values('size', ascending=False, kind='stable')
+                      .reset_index(drop=True))
+    deduped = df[keep]
+    if verbose:
+        print(f'{len(clusters)} near-duplicate clusters collapsed, '
+              f'{len(df) - len(deduped)} of {len(df)} rows dropped')
+        for row in clusters.head(5).itertuples():
+            print(f'  {row.size:>5} x {row.kept}')
+    if return_clusters:
+        return deduped, clusters
+
+    return deduped
@@ -0,0 +1,271 @@
+'''
+Tokenize-once featurization for the model sweep.
+
+The lemmatized READMEs of every split are tokenized in one pass, and the
+feature sets the report compares are all built from those tokens:
+
+    cv      - unigram counts, as CountVectorizer()
+    bi      - bigram counts, as CountVectorizer(ngram_range=(2, 2))
+    tfidf   - binary tf-idf, as TfidfVectorizer(binary=True)
+    binary  - unigram presence, as CountVectorizer(binary=True)
+
+The vocabulary and idf weights come from the train split only, and the
+matrices are saved with scipy.sparse.save_npz under a key of the split.
+'''
+
+
+# import standard libraries
+import hashlib
+import json
+import os
+import re
+
+# import data tools
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+
+# the default token_pattern of the sklearn vectorizers
+TOKEN_RE = re.compile(r'(?u)\b\w\w+\b')
+FEATURE_SETS = ('cv', 'bi', 'tfidf', 'binary')
+SPLITS = ('train', 'validate', 'test')
+CACHE_DIR = '.feature_cache'
+
+
+#################### Counting ####################
+
+
+def tokenize_corpus(texts):
+    '''
+    Takes an iterable of texts and returns a list of their lowercased
+    token lists, split by the sklearn default token pattern
+    '''
+
+    return [TOKEN_RE.findall(text.lower()) for text in texts]
+
+
+def _term_ids(token_lists, vocabulary):
+    '''
+    Returns flat arrays of the document number and vocabulary id of every
+    token, with -1 for tokens not in the vocabulary
+    '''
+
+    get = vocabulary.get
+    ids = np.fromiter((get(token, -1) for tokens in token_lists
+                       for token in tokens), dtype=np.int64)
+    docs = np.repeat(np.arange(len(token_lists)),
+                     [len(tokens) for tokens in token_lists])
+
+    return docs, ids
+
+
+def _csr(docs, columns, n_docs, n_columns):
+    '''
+    Returns the int64 CSR count matrix of (doc, column) pairs
+    '''
+
+    X = sp.csr_matrix((np.ones(len(docs), dtype=np.int64), (docs, columns)),
+                      shape=(n_docs, n_columns))
+    X.sum_duplicates()
+    X.sort_indices()
+
+    return X
+
+
+def _bigram_keys(docs, ids, n_terms):
+    '''
+    Returns the documents and integer keys of every pair of adjacent
+    in-vocabulary tokens in the same document
+    '''
+
+    pairs = (docs[:-1] == docs[1:]) & (ids[:-1] >= 0) & (ids[1:] >= 0)
+
+    return docs[:-1][pairs], ids[:-1][pairs] * n_terms + ids[1:][pairs]
+
+
+class CorpusCounts:
+    '''
+    Unigram and bigram counts of a tokenized train split, which can count
+    other splits against the same vocabulary.
+
+    Terms are numbered in sorted order as the sklearn vectorizers do; as
+    tokens are \\w characters, ordering bigrams by the pair of their term
+    numbers is the same as ordering their "first second" strings.
+    '''
+
+    def __init__(self, token_lists):
+        terms = sorted({token for tokens in token_lists for token in tokens})
+        self.terms = terms
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        docs, ids = _term_ids(token_lists, self.vocabulary)
+        _, keys = _bigram_keys(docs, ids, len(terms))
+        self.bigram_keys = np.unique(keys)
+
+    def bigrams(self):
+        '''
+        Returns the list of bigram strings in column order
+        '''
+
+        first, second = np.divmod(self.bigram_keys, len(self.terms))
+        return [f'{self.terms[a]} {self.terms[b]}'
+                for a, b in zip(first.tolist(), second.tolist())]
+
+    def count(self, token_lists):
+        '''
+        Returns the unigram and bigram CSR count matrices of token lists
+        '''
+
+        n_docs = len(token_lists)
+        docs, ids = _term_ids(token_lists, self.vocabulary)
+        known = ids >= 0
+        unigrams = _csr(docs[known], ids[known], n_docs, len(self.terms))
+        bigram_docs, keys = _bigram_keys(docs, ids, len(self.terms))
+        columns = np.searchsorted(self.bigram_keys, keys)
+        known = columns < len(self.bigram_keys)
+        known[known] = self.bigram_keys[columns[known]] == keys[known]
+        bigrams = _csr(bigram_docs[known], columns[known], n_docs,
+                       len(self.bigram_keys))
+
+        return unigrams, bigrams
+
+
+#################### Reweighting ####################
+
+
+def binary_counts(X):
+    '''
+    Returns a copy of a count matrix with every nonzero count set to one
+    '''
+
+    X = X.copy()
+    X.data[:] = 1
+
+    return X
+
+
+def smooth_idf(X):
+    '''
+    Returns the smoothed idf weights of the columns of a train count
+    matrix, computed the way TfidfTransformer computes them
+    '''
+
+    n_samples = X.shape[0] + 1
+    df = np.bincount(X.indices, minlength=X.shape[1]).astype(np.float64)
+    df += 1.0
+
+    return np.log(n_samples / df) + 1.0
+
+
+def tfidf_weights(X, idf):
+    '''
+    Returns the l2-normalized binary tf-idf matrix of a count matrix
+    '''
+
+    X = binary_counts(X).astype(np.float64)
+    X.data *= idf[X.indices]
+    # normalize rejects matrices without rows
+    if X.shape[0] == 0:
+        return X
+
+    return normalize(X, norm='l2', copy=False)
+
+
+#################### Memory-Mapped Storage ####################
+
+
+def save_csr(X, path):
+    '''
+    Saves the arrays of a CSR matrix as uncompressed .npy files under the
+    prefix path, so load_csr can memory map them
+    '''
+
+    X = X.tocsr()
+    for part in ('data', 'indices', 'indptr'):
+        np.save(f'{path}.{part}.npy', getattr(X, part))
+    np.save(f'{path}.shape.npy', np.array(X.shape, dtype=np.int64))
+
+
+def load_csr(path, mmap_mode='r'):
+    '''
+    Returns the CSR matrix saved by save_csr under the prefix path, its
+    arrays memory mapped read-only by default rather than read into memory
+    '''
+
+    data, indices, indptr = (np.load(f'{path}.{part}.npy', mmap_mode=mmap_mode)
+                             for part in ('data', 'indices', 'indptr'))
+    shape = tuple(np.load(f'{path}.shape.npy').tolist())
+
+    return sp.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+
+#################### Feature Sets ####################
+
+
+def split_key(X_train, X_validate, X_test, column='lemmatized_readme'):
+    '''
+    Returns a hex digest identifying the text of the three splits
+    '''
+
+    digest = hashlib.sha256(column.encode())
+    for X in (X_train, X_validate, X_test):
+        digest.update(pd.util.hash_pandas_object(X[column], index=True)
+                        .values.tobytes())
+
+    return digest.hexdigest()[:16]
+
+
+def build_features(X_train, X_validate, X_test, column='lemmatized_readme'):
+    '''
+    Takes the three X splits and returns a dict of feature set name to a
+    dict of split name to CSR matrix, plus a dict of feature set name to
+    its feature names
+    '''
+
+    tokens = {split: tokenize_corpus(X[column]) for split, X in
+              zip(SPLITS, (X_train, X_validate, X_test))}
+    counts = CorpusCounts(tokens['train'])
+    features = {name: {} for name in FEATURE_SETS}
+    for split in SPLITS:
+        features['cv'][split], features['bi'][split] = \
+            counts.count(tokens[split])
+    idf = smooth_idf(features['cv']['train'])
+    for split in SPLITS:
+        features['tfidf'][split] = tfidf_weights(features['cv'][split], idf)
+        features['binary'][split] = binary_counts(features['cv'][split])
+    names = {'cv': counts.terms, 'bi': counts.bigrams(),
+             'tfidf': counts.terms, 'binary': counts.terms}
+
+    return features, names
+
+
+def featurize(X_train, X_validate, X_test, column='lemmatized_readme',
+              cache_dir=CACHE_DIR):
+    '''
+    Returns build_features for the splits, loading the matrices from
+    cache_dir when these splits were featurized before and saving them
+    there with scipy.sparse.save_npz otherwise
+    '''
+
+    path = os.path.join(cache_dir, split_key(X_train, X_validate, X_test,
+                                             column))
+    names_path = os.path.join(path, 'feature_names.json')
+    if os.path.isfile(names_path):
+        features = {name: {split: sp.load_npz(os.path.join(
+                                      path, f'{name}_{split}.npz')).tocsr()
+                           for split in SPLITS}
+                    for name in FEATURE_SETS}
+        with open(names_path) as f:
+            return features, json.load(f)
+    features, names = build_features(X_train, X_validate, X_test, column)
+    os.makedirs(path, exist_ok=True)
+    for name in FEATURE_SETS:
+        for split in SPLITS:
+            sp.save_npz(os.path.join(path, f'{name}_{split}.npz'),
+                        features[name][split])
+    # written last, so a cache without it is incomplete and rebuilt
+    with open(names_path, 'w') as f:
+        json.dump(names, f)
+
+    return features, names
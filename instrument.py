@@ -0,0 +1,239 @@
+'''
+Per-stage timing and profiling for the wrangle pipeline and scraper.
+
+Wrap a stage in the stage context manager, or a function in the
+instrumented decorator, and while instrumentation is enabled every call
+records its wall and CPU time, rows in and out and, optionally, its peak
+traced memory and a cProfile dump of the time spent in the stage itself,
+outside its nested stages. While disabled, stage returns one shared
+object that does nothing, so instrumented code runs at full speed.
+
+    configure(enabled=True, trace_memory=True, profile_dir='.profiles')
+    with stage('normalize_readmes', df) as s:
+        df = s.output(normalize_readmes(df))
+    report()
+
+CPU time is that of this process; work done in n_jobs worker processes
+shows up as wall time only.
+'''
+
+
+# import standard libraries
+import cProfile
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+
+# what is recorded; set with configure
+config = {'enabled': False, 'trace_memory': False, 'profile_dir': None}
+# one dict per stage, in the order they started
+records = []
+# stages currently running, innermost last
+_active = []
+
+
+def configure(enabled=True, trace_memory=False, profile_dir=None):
+    '''
+    Turns instrumentation on or off; trace_memory records peak memory
+    with tracemalloc, which slows allocation heavy code, and profile_dir
+    saves a cProfile .prof file per stage there
+    '''
+
+    config.update({'enabled': enabled, 'trace_memory': trace_memory,
+                   'profile_dir': profile_dir})
+    if enabled and trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if not (enabled and trace_memory) and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def reset():
+    '''
+    Forgets every recorded stage
+    '''
+
+    records.clear()
+
+
+def _rows(data):
+    '''
+    Returns the length of data, or None when it has none
+    '''
+
+    try:
+        return len(data)
+    except TypeError:
+        return None
+
+
+class _NullStage:
+    '''
+    Stands in for a Stage while instrumentation is disabled
+    '''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def output(self, data):
+        return data
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    '''
+    Records one run of a stage; use through the stage function.
+
+    Call output with the stage's result to record its rows out.
+    '''
+
+    def __init__(self, name, data=None):
+        self.name = name
+        self.rows_in = _rows(data)
+        self.rows_out = None
+        self.child_peak = 0
+
+    def output(self, data):
+        '''
+        Records the rows of data as the stage's rows out and returns data
+        '''
+
+        self.rows_out = _rows(data)
+
+        return data
+
+    def __enter__(self):
+        self.profiler = None
+        if config['profile_dir'] is not None:
+            self.profiler = cProfile.Profile()
+            # one profiler runs at a time, so the enclosing stage pauses
+            if _active and _active[-1].profiler is not None:
+                _active[-1].profiler.disable()
+        if config['trace_memory']:
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        # the record takes its place now, so stages list in start order
+        self.record = {'stage': self.name, 'depth': len(_active)}
+        records.append(self.record)
+        _active.append(self)
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.disable()
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        _active.pop()
+        record = self.record
+        record.update({'wall_seconds': round(wall, 6),
+                       'cpu_seconds': round(cpu, 6), 'rows_in': self.rows_in,
+                       'rows_out': self.rows_out,
+                       'failed': exc[0] is not None})
+        if config['trace_memory']:
+            # a nested stage reset the peak, so take the larger of the two
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            record['peak_mb'] = round((peak - self.memory_start) / 2**20, 3)
+            if _active:
+                _active[-1].child_peak = max(_active[-1].child_peak, peak)
+        if self.profiler is not None:
+            os.makedirs(config['profile_dir'], exist_ok=True)
+            path = os.path.join(config['profile_dir'], f'{self.name}.prof')
+            self.profiler.dump_stats(path)
+            record['profile'] = path
+            if _active and _active[-1].profiler is not None:
+                _active[-1].profiler.enable()
+
+        return False
+
+
+def stage(name, data=None):
+    '''
+    Returns a context manager recording the stage name, with rows in
+    taken from the length of data
+    '''
+
+    if not config['enabled']:
+        return _NULL_STAGE
+
+    return Stage(name, data)
+
+
+def instrumented(func=None, name=None):
+    '''
+    Decorator recording every call of func as a stage, with rows in from
+    its first argument and rows out from its result
+    '''
+
+    if func is None:
+        return functools.partial(instrumented, name=name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not config['enabled']:
+            return func(*args, **kwargs)
+        with Stage(name or func.__name__, args[0] if args else None) as s:
+            return s.output(func(*args, **kwargs))
+
+    return wrapper
+
+
+def report(sort_by=None):
+    '''
+    Prints the recorded stages as a table, nested stages indented under
+    the stage that ran them, and returns the records; sort_by names a
+    column to sort on, largest first
+    '''
+
+    # stages still running have no timings yet
+    rows = [r for r in records if 'wall_seconds' in r]
+    if sort_by is not None:
+        rows.sort(key=lambda r: r.get(sort_by) or 0, reverse=True)
+    memory = config['trace_memory'] or any('peak_mb' in r for r in rows)
+    header = f"{'stage':<32} {'wall s':>9} {'cpu s':>9} {'rows in':>9} " \
+             f"{'rows out':>9}" + (f" {'peak MB':>9}" if memory else '')
+    print(header)
+    print('-' * len(header))
+    for r in rows:
+        name = ('  ' * r['depth'] + r['stage'])[:32]
+        line = f"{name:<32} {r['wall_seconds']:>9.3f} " \
+               f"{r['cpu_seconds']:>9.3f} {_cell(r['rows_in']):>9} " \
+               f"{_cell(r['rows_out']):>9}"
+        if memory:
+            line += f" {_cell(r.get('peak_mb')):>9}"
+        print(line)
+
+    return rows
+
+
+def _cell(value):
+    '''
+    Returns value formatted for a report table cell
+    '''
+
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.1f}'
+
+    return str(value)
+
+
+def to_json(path):
+    '''
+    Writes the recorded stages and the configuration to path as JSON
+    '''
+
+    with open(path, 'w') as f:
+        json.dump({'config': config, 'stages': records}, f, indent=1)
@@ -0,0 +1,77 @@
+'''
+The registry of programming language labels shared by wrangle, streaming
+and predict.
+
+A language's position in LANGUAGES is its target_class, so the encoding
+used to train a model and the decoding of its predictions always agree.
+'''
+
+
+# import standard libraries
+import warnings
+
+
+# programming languages modeled, in target_class order
+LANGUAGES = ('Python', 'JavaScript', 'Jupyter Notebook', 'HTML', 'R',
+             'TypeScript')
+# target_class of each language
+LANGUAGE_CODES = {language: code for code, language in enumerate(LANGUAGES)}
+# shorter names used when printing predictions
+DISPLAY_NAMES = {'Jupyter Notebook': 'Jupyter'}
+# target_class given to languages outside the registry
+UNKNOWN = -1
+
+
+def language_dtype():
+    '''
+    Returns the pandas CategoricalDtype of the registered languages, whose
+    category codes are the target classes
+    '''
+
+    import pandas as pd
+
+    return pd.CategoricalDtype(LANGUAGES)
+
+
+def encode_languages(languages, warn=True):
+    '''
+    Takes a Series, array or list of language names and returns a numpy int64
+    array of their target classes, UNKNOWN for languages outside the
+    registry; a warning names the unknown languages unless warn is False
+    '''
+
+    import numpy as np
+    import pandas as pd
+
+    # factorize the labels once, then look up each distinct label; the
+    # appended -1 is picked by missing labels, whose factor code is -1
+    languages = pd.Series(languages)
+    factors, uniques = pd.factorize(languages)
+    lookup = np.append(pd.Index(LANGUAGES).get_indexer(uniques), UNKNOWN)
+    codes = lookup[factors].astype('int64')
+    if warn and (codes == UNKNOWN).any():
+        unknown = languages[codes == UNKNOWN]
+        counts = unknown.fillna('<missing>').value_counts()
+        warnings.warn(f'{int(counts.sum())} labels are not registered '
+                      f'languages and were encoded as {UNKNOWN}: '
+                      f'{counts.to_dict()}', stacklevel=2)
+
+    return codes
+
+
+def decode_language(code, display=False):
+    '''
+    Takes a target class and returns its language name, shortened for
+    printing when display is True; raises ValueError for UNKNOWN or any
+    other class outside the registry
+    '''
+
+    # a negative index would silently decode UNKNOWN as the last language
+    if not 0 <= code < len(LANGUAGES):
+        raise ValueError(f'{code} is not the target class of a registered '
+                         f'language')
+    language = LANGUAGES[code]
+    if display:
+        return DISPLAY_NAMES.get(language, language)
+
+    return language
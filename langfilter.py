@@ -0,0 +1,157 @@
+'''
+Fast natural language detection for README text.
+
+Documents are resolved by three tiers, cheapest first:
+    memo       - the detector already ran on a document with the same
+                 content hash, sample size and seed
+    prescreen  - mostly ascii letters with many common English words
+    detector   - langdetect on a bounded sample, with a fixed seed
+'''
+
+
+# import standard libraries
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from functools import partial
+
+# langdetect loads its language profiles on import, so detect_language
+# imports it on first use
+
+# import parallel helper and markup stripper
+from prepare import parallel_apply, strip_markup
+
+
+# characters of each document passed to the prescreen and the detector
+MAX_CHARS = 2000
+# English function words that are rare in other latin-script languages
+ENGLISH_WORDS = frozenset([
+    'the', 'and', 'of', 'to', 'is', 'are', 'this', 'that', 'with', 'for',
+    'you', 'your', 'be', 'can', 'will', 'it', 'from', 'by', 'or', 'an',
+    'on', 'we', 'which', 'have', 'has', 'not', 'use', 'using', 'how',
+    'if', 'all', 'our', 'more', 'at', 'was', 'these', 'there', 'their',
+])
+WORD_RE = re.compile(r'[a-z]+')
+
+# detector results kept in the memo, least recently used dropped first
+MEMO_SIZE = 100_000
+
+# (content hash, max_chars, seed) -> language the detector returned, shared
+# by every call in the process; prescreen answers are cheap to redo and
+# are not kept, so a later call without the prescreen still runs the
+# detector
+_memo = OrderedDict()
+
+
+def content_hash(text):
+    '''
+    Returns the sha1 hex digest of the text, used as the memo key
+    '''
+
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def prescreen_english(text, min_words=30, min_ratio=0.15, min_ascii=0.97):
+    '''
+    Returns True when text is obviously English: at least min_ascii of its
+    letters are ascii and at least min_ratio of its words are common
+    English function words. Returns False when unsure.
+    '''
+
+    letters = [char for char in text if char.isalpha()]
+    if not letters:
+        return False
+    ascii_ratio = sum(char.isascii() for char in letters) / len(letters)
+    if ascii_ratio < min_ascii:
+        return False
+    words = WORD_RE.findall(text.lower())
+    if len(words) < min_words:
+        return False
+
+    return sum(word in ENGLISH_WORDS for word in words) / len(words) >= min_ratio
+
+
+def sample_text(text, max_chars=MAX_CHARS):
+    '''
+    Returns up to max_chars characters of the text with markup stripped;
+    badges and html headers would otherwise fill a short prefix
+    '''
+
+    # strip markup from a larger prefix so enough prose is left
+    return strip_markup(text[:max_chars * 4])[:max_chars]
+
+
+def detect_language(text, max_chars=MAX_CHARS, seed=0):
+    '''
+    Returns the langdetect language code for the first max_chars of text,
+    or 'unknown' when the text has no detectable features
+    '''
+
+    from langdetect import DetectorFactory, detect
+    from langdetect.lang_detect_exception import LangDetectException
+
+    # langdetect is random unless seeded; set in every worker process
+    DetectorFactory.seed = seed
+    try:
+        return detect(text[:max_chars])
+    except LangDetectException:
+        return 'unknown'
+
+
+def detect_languages(texts, max_chars=MAX_CHARS, n_jobs=1, prescreen=True,
+                     seed=0, verbose=True):
+    '''
+    Takes a sequence of texts and returns a list of their language codes,
+    resolving each text through the memo, prescreen and detector tiers.
+    n_jobs runs the detector tier in that many processes. Prints how many
+    texts each tier resolved and the throughput when verbose.
+    '''
+
+    start = time.perf_counter()
+    texts = list(texts)
+    languages = [None] * len(texts)
+    tiers = {'memo': 0, 'prescreen': 0, 'detector': 0}
+    keys = [(content_hash(text), max_chars, seed) for text in texts]
+    pending = {}
+    for i, (text, key) in enumerate(zip(texts, keys)):
+        if key in _memo:
+            _memo.move_to_end(key)
+            languages[i] = _memo[key]
+            tiers['memo'] += 1
+        elif key in pending:
+            # duplicate of a text already waiting for the detector
+            pending[key].append(i)
+            tiers['memo'] += 1
+        elif prescreen and prescreen_english(sample_text(text, max_chars)):
+            languages[i] = 'en'
+            tiers['prescreen'] += 1
+        else:
+            pending[key] = [i]
+    # run the detector once per distinct remaining text
+    detected = parallel_apply(partial(detect_language, seed=seed),
+                              [sample_text(texts[rows[0]], max_chars)
+                               for rows in pending.values()],
+                              n_jobs=n_jobs)
+    for (key, rows), language in zip(pending.items(), detected):
+        _memo[key] = language
+        if len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+        tiers['detector'] += 1
+        for i in rows:
+            languages[i] = language
+    if verbose:
+        elapsed = time.perf_counter() - start
+        print(f"Detected {len(texts)} languages in {elapsed:.2f}s "
+              f"({len(texts) / max(elapsed, 1e-9):.0f} docs/s): "
+              + ', '.join(f'{tier} {count}' for tier, count in tiers.items()))
+
+    return languages
+
+
+def clear_memo():
+    '''
+    Empties the content hash memo
+    '''
+
+    _memo.clear()
@@ -0,0 +1,430 @@
+'''
+A compact, fast loading format for the fitted tfidf vectorizer and model.
+
+export_model saves the vocabulary, IDF weights and classifier parameters of
+the pickled scikit-learn objects into one numpy .npz file with a format
+version and a sha256 checksum. LiteModel loads that file and predicts with
+nothing but numpy and re, so the prediction path never imports scikit-learn.
+
+README cleaning is exported too: the stopwords predict.clean_readme drops
+and a lemma map of every word whose WordNet lemma differs from it and
+matters to the vocabulary. WordNet lemmatizes a word to one of its noun
+lemmas, from its exception list or by swapping one of a few suffixes, so
+those words are found by swapping the suffixes of every noun lemma back
+and checking each with the lemmatizer. Exporting needs nltk and WordNet;
+predicting raw READMEs with transform_readmes does not.
+
+Run from the command line to export the current pickles:
+    python lite_model.py tfidf.pickle model.pickle model.npz
+'''
+
+
+# import standard libraries
+import hashlib
+import json
+import re
+from math import log, sqrt
+
+# import numpy, the only third party dependency of inference
+import numpy as np
+
+# import the standard library cleaning steps of predict.clean_readme
+from prepare import basic_clean, parallel_apply
+
+
+FORMAT_VERSION = 2
+# the (inflected, lemma) noun suffixes of WordNet's morphy
+NOUN_SUFFIXES = (('s', ''), ('ses', 's'), ('ves', 'f'), ('xes', 'x'),
+                 ('zes', 'z'), ('ches', 'ch'), ('shes', 'sh'),
+                 ('men', 'man'), ('ies', 'y'))
+
+
+#################### Export ####################
+
+
+def _tree_arrays(tree):
+    '''
+    Returns the node arrays of a fitted sklearn tree with the class
+    probabilities of every node as predict_proba returns them
+    '''
+
+    value = tree.value[:, 0, :].astype(np.float64)
+    totals = value.sum(axis=1, keepdims=True)
+    # older sklearn stores class counts, newer stores class fractions
+    if not np.allclose(totals, 1.0):
+        totals[totals == 0.0] = 1.0
+        value = value / totals
+
+    return {'children_left': tree.children_left.astype(np.int64),
+            'children_right': tree.children_right.astype(np.int64),
+            'feature': tree.feature.astype(np.int64),
+            'threshold': tree.threshold.astype(np.float64),
+            'proba': value}
+
+
+def _model_arrays(model):
+    '''
+    Returns the kind of a fitted classifier and a dict of the arrays
+    needed to reproduce its predict_proba
+    '''
+
+    name = type(model).__name__
+    if name == 'DecisionTreeClassifier':
+        trees = [model]
+    elif name in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+        trees = model.estimators_
+    elif name == 'MultinomialNB':
+        return 'naive_bayes', {
+            'feature_log_prob': model.feature_log_prob_.astype(np.float64),
+            'class_log_prior': model.class_log_prior_.astype(np.float64)}
+    elif name == 'LogisticRegression':
+        return 'linear', {'coef': model.coef_.astype(np.float64),
+                          'intercept': model.intercept_.astype(np.float64)}
+    else:
+        raise ValueError(f'Cannot export a {name}; supported classifiers are '
+                         'DecisionTreeClassifier, RandomForestClassifier, '
+                         'ExtraTreesClassifier, MultinomialNB and '
+                         'LogisticRegression')
+    # concatenate every tree's nodes, remembering where each tree starts
+    nodes = [_tree_arrays(tree.tree_) for tree in trees]
+    offsets = np.cumsum([0] + [len(n['feature']) for n in nodes])
+    arrays = {key: np.concatenate([n[key] for n in nodes])
+              for key in nodes[0]}
+    for key in ('children_left', 'children_right'):
+        for n, start in zip(nodes, offsets):
+            n[key][n[key] >= 0] += start
+        arrays[key] = np.concatenate([n[key] for n in nodes])
+    arrays['tree_roots'] = offsets[:-1].astype(np.int64)
+
+    return 'tree', arrays
+
+
+def _noun_lemmas(vocabulary):
+    '''
+    Returns the set of WordNet's noun lemmas and the inflected nouns of its
+    exception list, or the vocabulary when the WordNet data cannot be read
+    '''
+
+    try:
+        from nltk.corpus import wordnet
+        return set(wordnet.all_lemma_names('n')).union(
+            wordnet._exception_map['n'])
+    except (AttributeError, KeyError, LookupError):
+        return set(vocabulary)
+
+
+def _lemma_map(tfidf):
+    '''
+    Returns a dict of every word whose lemma differs from it, where the
+    word or its lemma has a term in the vocabulary, to its lemma
+    '''
+
+    from prepare import lemmatize_word
+
+    analyze = tfidf.build_analyzer()
+    vocabulary = tfidf.vocabulary_
+    # a word is lemmatized to a noun lemma, from the exception list or by
+    # swapping one suffix, so the words changed are those lemmas with a
+    # suffix swapped back
+    nouns = _noun_lemmas(vocabulary)
+    candidates = set(vocabulary).union(nouns)
+    for noun in nouns:
+        for inflected, lemma in NOUN_SUFFIXES:
+            if noun.endswith(lemma):
+                candidates.add(noun[:len(noun) - len(lemma)] + inflected)
+    lemmas = {}
+    for word in candidates:
+        lemma = lemmatize_word(word)
+        if lemma != word and any(term in vocabulary for term in
+                                 analyze(word) + analyze(lemma)):
+            lemmas[word] = lemma
+
+    return lemmas
+
+
+def _text_array(lines):
+    '''
+    Returns a uint8 array of the newline joined lines
+    '''
+
+    return np.frombuffer('\n'.join(lines).encode(), dtype=np.uint8)
+
+
+def _text_lines(array):
+    '''
+    Returns the list of lines of a _text_array, empty for an empty array
+    '''
+
+    text = array.tobytes().decode()
+
+    return text.split('\n') if text else []
+
+
+def _checksum(arrays):
+    '''
+    Returns the sha256 hex digest of the named arrays in sorted key order
+    '''
+
+    digest = hashlib.sha256()
+    for key in sorted(arrays):
+        digest.update(key.encode())
+        digest.update(np.ascontiguousarray(arrays[key]).tobytes())
+
+    return digest.hexdigest()
+
+
+def export_model(tfidf, model, path='model.npz'):
+    '''
+    Takes a fitted TfidfVectorizer and classifier and saves everything
+    needed to clean READMEs and predict into the .npz file at path
+    '''
+
+    from prepare import get_stopwords
+
+    if tfidf.analyzer != 'word' or tfidf.tokenizer is not None or \
+            tfidf.preprocessor is not None or \
+            tfidf.strip_accents not in (None, 'ascii', 'unicode'):
+        raise ValueError('Only word analyzers with the default tokenizer and '
+                         'preprocessor can be exported')
+    terms = sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)
+    if any('\n' in term for term in terms):
+        raise ValueError('Vocabulary terms may not contain newlines')
+    stop_words = tfidf.get_stop_words() or []
+    lemmas = _lemma_map(tfidf)
+    lemma_words = sorted(lemmas)
+    kind, arrays = _model_arrays(model)
+    params = {'format_version': FORMAT_VERSION,
+              'model': kind,
+              'lowercase': tfidf.lowercase,
+              'strip_accents': tfidf.strip_accents,
+              'token_pattern': tfidf.token_pattern,
+              'ngram_range': list(tfidf.ngram_range),
+              'binary': tfidf.binary,
+              'sublinear_tf': tfidf.sublinear_tf,
+              'norm': tfidf.norm,
+              'classes': [c.item() if hasattr(c, 'item') else c
+                          for c in model.classes_]}
+    arrays.update({
+        'params': np.frombuffer(json.dumps(params).encode(), dtype=np.uint8),
+        'vocabulary': np.frombuffer('\n'.join(terms).encode(),
+                                    dtype=np.uint8),
+        'stop_words': np.frombuffer('\n'.join(sorted(stop_words)).encode(),
+                                    dtype=np.uint8),
+        'clean_stop_words': _text_array(sorted(get_stopwords())),
+        'lemma_words': _text_array(lemma_words),
+        'lemmas': _text_array([lemmas[word] for word in lemma_words]),
+        'idf': (tfidf.idf_ if tfidf.use_idf
+                else np.ones(len(terms))).astype(np.float64),
+    })
+    arrays['checksum'] = np.frombuffer(_checksum(arrays).encode(),
+                                       dtype=np.uint8)
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+#################### Inference ####################
+
+
+class LiteModel:
+    '''
+    Predicts from an exported .npz model with numpy and re only.
+
+    It stands in for both the vectorizer and the classifier: transform
+    turns cleaned texts into sparse rows, transform_readmes raw READMEs,
+    and predict_proba scores them, so it can be passed as both tfidf and
+    model to predict.predict_batch.
+    '''
+
+    def __init__(self, path='model.npz', verify=True):
+        with np.load(path) as data:
+            arrays = {key: data[key] for key in data.files}
+        checksum = arrays.pop('checksum').tobytes().decode()
+        if verify and checksum != _checksum(arrays):
+            raise ValueError(f'Checksum mismatch, {path} is corrupt')
+        params = json.loads(arrays.pop('params').tobytes().decode())
+        if params['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version "
+                             f"{params['format_version']}, expected "
+                             f"{FORMAT_VERSION}")
+        self.params = params
+        self.kind = params['model']
+        self.classes_ = np.array(params['classes'])
+        terms = arrays.pop('vocabulary').tobytes().decode().split('\n')
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        stop_words = arrays.pop('stop_words').tobytes().decode()
+        self.stop_words = frozenset(stop_words.split('\n')) if stop_words \
+                          else frozenset()
+        self.clean_stop_words = frozenset(
+            _text_lines(arrays.pop('clean_stop_words')))
+        self.lemmas = dict(zip(_text_lines(arrays.pop('lemma_words')),
+                               _text_lines(arrays.pop('lemmas'))))
+        self.token_re = re.compile(params['token_pattern'])
+        self.idf = arrays.pop('idf')
+        self.arrays = arrays
+        if self.kind == 'tree':
+            # plain lists walk faster than numpy arrays one node at a time
+            self._nodes = tuple(arrays[key].tolist() for key in
+                                ('children_left', 'children_right',
+                                 'feature', 'threshold'))
+
+    def clean(self, readme):
+        '''
+        Takes README text and returns it cleaned, with stopwords removed and
+        lemmatized, as predict.clean_readme does
+        '''
+
+        words = [word for word in basic_clean(readme).split()
+                 if word not in self.clean_stop_words]
+
+        return ' '.join([self.lemmas.get(word, word) for word in words])
+
+    def transform_readmes(self, readmes, n_jobs=1):
+        '''
+        Returns a list of sparse tfidf rows for a list of raw README texts,
+        cleaned in n_jobs processes
+        '''
+
+        return self.transform(parallel_apply(self.clean, readmes,
+                                             n_jobs=n_jobs))
+
+    def analyze(self, text):
+        '''
+        Returns the list of terms of text, as the vectorizer's analyzer
+        '''
+
+        if self.params['lowercase']:
+            text = text.lower()
+        if self.params['strip_accents'] is not None:
+            import unicodedata
+            text = unicodedata.normalize('NFKD', text)
+            if self.params['strip_accents'] == 'ascii':
+                text = text.encode('ascii', 'ignore').decode('ascii')
+            else:
+                text = ''.join(c for c in text if not unicodedata.combining(c))
+        tokens = [token for token in self.token_re.findall(text)
+                  if token not in self.stop_words]
+        low, high = self.params['ngram_range']
+        if high == 1:
+            return tokens
+        terms = tokens if low == 1 else []
+        for n in range(max(low, 2), high + 1):
+            terms += [' '.join(tokens[i:i + n])
+                      for i in range(len(tokens) - n + 1)]
+
+        return terms
+
+    def transform_one(self, text):
+        '''
+        Returns the tfidf row of one cleaned text as a tuple of a sorted
+        array of feature indices and an array of their values
+        '''
+
+        counts = {}
+        for term in self.analyze(text):
+            i = self.vocabulary.get(term)
+            if i is not None:
+                counts[i] = counts.get(i, 0) + 1
+        indices = sorted(counts)
+        if self.params['binary']:
+            values = [1.0] * len(indices)
+        else:
+            values = [float(counts[i]) for i in indices]
+        if self.params['sublinear_tf']:
+            values = [log(v) + 1.0 for v in values]
+        values = [v * self.idf[i] for v, i in zip(values, indices)]
+        # normalize in index order, as sklearn does
+        if self.params['norm'] == 'l2':
+            total = 0.0
+            for v in values:
+                total += v * v
+            if total != 0.0:
+                total = sqrt(total)
+                values = [v / total for v in values]
+        elif self.params['norm'] == 'l1':
+            total = 0.0
+            for v in values:
+                total += abs(v)
+            if total != 0.0:
+                values = [v / total for v in values]
+
+        return (np.array(indices, dtype=np.int64),
+                np.array(values, dtype=np.float64))
+
+    def transform(self, texts):
+        '''
+        Returns a list of sparse tfidf rows for a list of cleaned texts
+        '''
+
+        return [self.transform_one(text) for text in texts]
+
+    def predict_proba(self, rows):
+        '''
+        Returns an array of class probabilities for each row returned by
+        transform
+        '''
+
+        if self.kind == 'tree':
+            return np.array([self._tree_proba(row) for row in rows])
+        if self.kind == 'naive_bayes':
+            weights = self.arrays['feature_log_prob']
+            bias = self.arrays['class_log_prior']
+        else:
+            weights = self.arrays['coef']
+            bias = self.arrays['intercept']
+        scores = np.array([weights[:, indices] @ values + bias
+                           for indices, values in rows]).reshape(len(rows), -1)
+        if self.kind == 'linear' and scores.shape[1] == 1:
+            # binary logistic regression has one decision function
+            prob = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - prob, prob])
+        # softmax, which for naive bayes normalizes the joint likelihood
+        scores = scores - scores.max(axis=1, keepdims=True)
+        scores = np.exp(scores)
+
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, rows):
+        '''
+        Returns the predicted class of each row returned by transform
+        '''
+
+        return self.classes_[self.predict_proba(rows).argmax(axis=1)]
+
+    def _tree_proba(self, row):
+        '''
+        Returns the class probabilities of one row averaged over the trees
+        '''
+
+        left, right, feature, threshold = self._nodes
+        proba = self.arrays['proba']
+        indices, values = row
+        # trees compare float32 feature values, as sklearn casts X
+        x = dict(zip(indices.tolist(), values.astype(np.float32).tolist()))
+        total = None
+        for node in self.arrays['tree_roots'].tolist():
+            while left[node] != -1:
+                if x.get(feature[node], 0.0) <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            total = proba[node].copy() if total is None else total + proba[node]
+
+        return total / len(self.arrays['tree_roots'])
+
+
+if __name__ == '__main__':
+    import argparse
+    import pickle
+
+    parser = argparse.ArgumentParser(
+        description='Export pickled tfidf and model to a lite .npz model')
+    parser.add_argument('tfidf', nargs='?', default='tfidf.pickle')
+    parser.add_argument('model', nargs='?', default='model.pickle')
+    parser.add_argument('output', nargs='?', default='model.npz')
+    args = parser.parse_args()
+    with open(args.tfidf, 'rb') as f:
+        tfidf = pickle.load(f)
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    export_model(tfidf, model, args.output)
+    print(f'Exported {args.tfidf} and {args.model} to {args.output}')
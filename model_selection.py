@@ -0,0 +1,239 @@
+'''
+Cross-validated search over feature sets and classifiers.
+
+The train and validate splits from wrangle_github_repos are combined and
+cut into stratified folds once. Each fold is featurized with
+features.build_features and its matrices are saved as .npy arrays under a
+key of the fold's text, so later searches reuse them. Every (feature set,
+classifier, parameters, fold) task then runs in a process pool, and each
+worker memory maps the fold it needs instead of receiving a copy.
+
+Run from the command line:
+    python model_selection.py --folds 5 --n-jobs -1
+'''
+
+
+# import standard libraries
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# import data tools
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+
+# import featurizing functions
+from features import FEATURE_SETS, build_features, load_csr, save_csr, \
+                     split_key
+
+
+CACHE_DIR = '.fold_cache'
+RESULTS_PATH = 'model_selection_results.csv'
+# classifiers searched, by name, so tasks stay small and picklable
+CLASSIFIERS = {
+    'tree': 'sklearn.tree.DecisionTreeClassifier',
+    'forest': 'sklearn.ensemble.RandomForestClassifier',
+    'nb': 'sklearn.naive_bayes.MultinomialNB',
+}
+# parameter grid of each classifier, around the values of the report
+PARAM_GRID = {
+    'tree': {'max_depth': [3, 5, 10], 'random_state': [19]},
+    'forest': {'n_estimators': [100, 300, 500], 'max_depth': [6, 10, 15],
+               'class_weight': ['balanced'], 'bootstrap': [False],
+               'random_state': [19]},
+    'nb': {'alpha': [0.5, 1.0, 2.0]},
+}
+
+
+#################### Folds ####################
+
+
+def make_folds(X, y, n_splits=5, seed=19):
+    '''
+    Takes X and y DataFrames and returns a list of (train, validate)
+    positional index arrays of stratified folds on target_class
+    '''
+
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+
+    return list(folds.split(X, y.target_class))
+
+
+def cache_folds(X, y, folds, column='lemmatized_readme', cache_dir=CACHE_DIR):
+    '''
+    Featurizes each fold and saves its matrices and labels as .npy arrays
+    under cache_dir, skipping folds already saved; returns the list of
+    fold directories
+    '''
+
+    paths = []
+    for train, validate in folds:
+        X_train, X_validate = X.iloc[train], X.iloc[validate]
+        path = os.path.join(cache_dir, split_key(X_train, X_validate,
+                                                 X_validate.iloc[:0], column))
+        paths.append(path)
+        done_path = os.path.join(path, 'done.json')
+        if os.path.isfile(done_path):
+            continue
+        os.makedirs(path, exist_ok=True)
+        features, _ = build_features(X_train, X_validate,
+                                     X_validate.iloc[:0], column)
+        for name in FEATURE_SETS:
+            for split in ('train', 'validate'):
+                save_csr(features[name][split],
+                         os.path.join(path, f'{name}_{split}'))
+        np.save(os.path.join(path, 'y_train.npy'),
+                y.target_class.to_numpy()[train])
+        np.save(os.path.join(path, 'y_validate.npy'),
+                y.target_class.to_numpy()[validate])
+        # written last, so a fold without it is incomplete and rebuilt
+        with open(done_path, 'w') as f:
+            json.dump({'train': len(train), 'validate': len(validate)}, f)
+
+    return paths
+
+
+#################### Search ####################
+
+
+def param_grid(grid=PARAM_GRID):
+    '''
+    Returns a list of (classifier name, params dict) for every combination
+    of the parameter grid
+    '''
+
+    configs = []
+    for name, params in grid.items():
+        keys = sorted(params)
+        for values in itertools.product(*(params[key] for key in keys)):
+            configs.append((name, dict(zip(keys, values))))
+
+    return configs
+
+
+def make_classifier(name, params):
+    '''
+    Returns a new classifier of a CLASSIFIERS name with params
+    '''
+
+    module, _, cls = CLASSIFIERS[name].rpartition('.')
+    module = __import__(module, fromlist=[cls])
+
+    return getattr(module, cls)(**params)
+
+
+def run_task(task):
+    '''
+    Takes a tuple of fold number, fold directory, feature set, classifier
+    name and params, fits the classifier on the memory mapped fold and
+    returns a dict of its scores and timings
+    '''
+
+    fold, path, feature_set, name, params = task
+    X_train = load_csr(os.path.join(path, f'{feature_set}_train'))
+    X_validate = load_csr(os.path.join(path, f'{feature_set}_validate'))
+    y_train = np.load(os.path.join(path, 'y_train.npy'), mmap_mode='r')
+    y_validate = np.load(os.path.join(path, 'y_validate.npy'), mmap_mode='r')
+    model = make_classifier(name, params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    predictions = model.predict(X_validate)
+    predict_seconds = time.perf_counter() - start
+
+    return {'features': feature_set, 'classifier': name,
+            'params': json.dumps(params, sort_keys=True), 'fold': fold,
+            'train_accuracy': float((model.predict(X_train) == y_train).mean()),
+            'validate_accuracy': float((predictions == y_validate).mean()),
+            'fit_seconds': fit_seconds, 'predict_seconds': predict_seconds}
+
+
+def summarize(scores):
+    '''
+    Takes the DataFrame of per-fold scores and returns one row per
+    configuration with the mean and std of validate accuracy and the mean
+    train accuracy and timings, best configuration first
+    '''
+
+    summary = (scores.groupby(['features', 'classifier', 'params'])
+                     .agg(validate_mean=('validate_accuracy', 'mean'),
+                          validate_std=('validate_accuracy', 'std'),
+                          train_mean=('train_accuracy', 'mean'),
+                          fit_seconds=('fit_seconds', 'mean'),
+                          predict_seconds=('predict_seconds', 'mean'),
+                          folds=('fold', 'count'))
+                     .sort_values('validate_mean', ascending=False)
+                     .reset_index())
+
+    return summary
+
+
+def search(X, y, n_splits=5, feature_sets=('cv', 'bi', 'tfidf'),
+           grid=PARAM_GRID, n_jobs=1, column='lemmatized_readme',
+           cache_dir=CACHE_DIR, results_path=RESULTS_PATH, verbose=True):
+    '''
+    Cross-validates every classifier configuration of grid on every
+    feature set over stratified folds of X and y, running the tasks in
+    n_jobs processes (-1 for all cores); writes the summary table to
+    results_path and returns it
+    '''
+
+    start = time.perf_counter()
+    X = X.reset_index(drop=True)
+    y = y.reset_index(drop=True)
+    folds = make_folds(X, y, n_splits)
+    paths = cache_folds(X, y, folds, column, cache_dir)
+    if verbose:
+        print(f'{n_splits} folds featurized in '
+              f'{time.perf_counter() - start:.1f}s')
+    tasks = [(fold, path, feature_set, name, params)
+             for feature_set in feature_sets
+             for name, params in param_grid(grid)
+             for fold, path in enumerate(paths)]
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1:
+        rows = [run_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            rows = list(executor.map(run_task, tasks))
+    summary = summarize(pd.DataFrame(rows))
+    if results_path is not None:
+        summary.to_csv(results_path, index=False)
+    if verbose:
+        print(f'{len(tasks)} fits in {time.perf_counter() - start:.1f}s')
+        print(summary.head(10).to_string(index=False))
+
+    return summary
+
+
+def search_github_repos(n_splits=5, n_jobs=1, **kwargs):
+    '''
+    Runs search on the train and validate splits of wrangle_github_repos,
+    keeping the test split held out
+    '''
+
+    from wrangle import wrangle_github_repos
+
+    X_train, y_train, X_validate, y_validate, _, _ = wrangle_github_repos()
+    X = pd.concat([X_train, X_validate])
+    y = pd.concat([y_train, y_validate])
+
+    return search(X, y, n_splits=n_splits, n_jobs=n_jobs, **kwargs)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Cross-validated search of feature sets and classifiers')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--output', default=RESULTS_PATH)
+    args = parser.parse_args()
+    search_github_repos(n_splits=args.folds, n_jobs=args.n_jobs,
+                        results_path=args.output)
@@ -4,17 +4,23 @@
 ####
 ####
 ####
-####  Run "python predict.py" on command line 
+####  Run "python predict.py" on command line
 ####     and pass URL of raw readme file.
 ####
+####  Run "python predict.py README.md data.jsonl -" to predict many
+####     READMEs at once and stream the results out as JSONL.
 ####
 
 
 import re
+import sys
+import json
 import pickle
-import requests
-from prepare import lemmatize, remove_stopwords, remove_stopwords, basic_clean
-from wrangle import open_pickles
+import argparse
+from functools import lru_cache
+from itertools import islice
+from prepare import lemmatize, remove_stopwords, basic_clean, parallel_apply
+from labels import decode_language
 
 
 def remove_code_snippets(readme):
@@ -25,54 +31,237 @@ def remove_code_snippets(readme):
 
     # remove HTML and markdown code
     readme = re.sub(r'(\<.+\>)', '', readme)
-    readme = re.sub(r'!?(\[.+\])(\(.+\))?', '', row)
+    readme = re.sub(r'!?(\[.+\])(\(.+\))?', '', readme)
     # remove coded spaces and page breaks
-    readme = re.sub(r'(\n+)', ' ', row)
-    readme= re.sub(r'(&nbsp;+)', '', row)
+    readme = re.sub(r'(\n+)', ' ', readme)
+    readme= re.sub(r'(&nbsp;+)', '', readme)
     # remove naked hyperlinks
-    readme = re.sub(r'http\S+', '', row)
+    readme = re.sub(r'http\S+', '', readme)
     # replaced hyphens with spaces
-    readme = re.sub(r'-', ' ', row)
+    readme = re.sub(r'-', ' ', readme)
     return readme
 
-def predict_readme_lang(readme_url):
+
+@lru_cache(maxsize=None)
+def load_model(tfidf_path='tfidf.pickle', model_path='model.pickle'):
+    '''
+    Unpickles the fitted tfidf vectorizer and model once per pair of
+    paths and returns them as a tuple
+    '''
+
+    with open(tfidf_path, 'rb') as f:
+        tfidf = pickle.load(f)
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+
+    return tfidf, model
+
+
+@lru_cache(maxsize=None)
+def load_pruned_model(tfidf_path='tfidf.pickle', model_path='model.pickle'):
+    '''
+    Loads the pickled tfidf vectorizer and model once per pair of paths
+    and returns the vectorizer pruned to the features the model reads,
+    which predicts exactly as the full one, and the model
+    '''
+
+    from pruned_model import compile_model
+    tfidf, model = load_model(tfidf_path, model_path)
+
+    return compile_model(tfidf, model), model
+
+
+@lru_cache(maxsize=None)
+def load_prediction_cache(path=None, ttl=None):
+    '''
+    Returns the PredictionCache of the default pickles shared by every
+    predict_readme_lang call of the process, kept in the SQLite file at
+    path as well when given
+    '''
+
+    from prediction_cache import PredictionCache
+
+    return PredictionCache(path, ttl=ttl)
+
+
+@lru_cache(maxsize=None)
+def load_lite_model(path='model.npz'):
+    '''
+    Loads an exported lite model once per path and returns it twice, as
+    the stand-in for both the tfidf vectorizer and the model
+    '''
+
+    from lite_model import LiteModel
+    lite = LiteModel(path)
+
+    return lite, lite
+
+
+def clean_readme(readme):
+    '''
+    Takes README text and returns it cleaned, with stopwords removed and
+    lemmatized the way predict_readme_lang has always prepared it
+    '''
+
+    # removing stopwords a second time removes nothing more
+    return lemmatize(remove_stopwords(basic_clean(readme)))
+
+
+def vectorize_readmes(readmes, tfidf, n_jobs=1):
+    '''
+    Takes a list of README texts and returns their tfidf rows, cleaning
+    them in n_jobs processes; a pruned vectorizer cleans them itself
+    '''
+
+    if hasattr(tfidf, 'transform_readmes'):
+        return tfidf.transform_readmes(readmes, n_jobs=n_jobs)
+    cleaned = parallel_apply(clean_readme, readmes, n_jobs=n_jobs)
+
+    return tfidf.transform(cleaned)
+
+
+def predict_readme(readme, tfidf=None, model=None):
+    '''
+    Takes README text and returns a tuple of the predicted language and
+    its probability, using the cached pruned vectorizer and model unless
+    given
+    '''
+
+    if tfidf is None or model is None:
+        tfidf, model = load_pruned_model()
+    prob = model.predict_proba(vectorize_readmes([readme], tfidf))[0]
+    # the predicted class is the most probable one
+    i = prob.argmax()
+    lang = decode_language(model.classes_[i], display=True)
+
+    return lang, prob[i]
+
+
+def predict_readme_lang(readme_url, cache=None):
     '''
     Takes URL of README document and prints
     the predicted language and the probability.
+    A README seen before is revalidated by its ETag and not scored again.
     '''
 
-    response = requests.get(str(readme_url))
-    readme = response.text
-    # clean, tokenize, remove stopwords, and lematize
-    readme = lemmatize(remove_stopwords(remove_stopwords(basic_clean(readme))))
-    # open fitted tfidf object
-    tfidf = open_pickles('tfidf')
-    readme = tfidf.transform([readme])
-    # open fitted model object
-    model = open_pickles('model')
-    pred = model.predict(readme)
-    prob = model.predict_proba(readme)
-    # make variable to corresponding langauge to target class
-    if pred == 0:
-        lang = 'Python'
-        prob = prob[0][0]
-    elif pred == 1:
-        lang = 'JavaScript'
-        prob = prob[0][1]
-    elif pred == 2:
-        lang = 'Jupyter'
-        prob = prob[0][2]
-    elif pred == 3:
-        lang = 'HTML'
-        prob = prob[0][3]
-    elif pred == 4:
-        lang = 'R'
-        prob = prob[0][4]
-    else:
-        lang = 'TypeScript'
-        prob = prob[0][5]
+    if cache is None:
+        cache = load_prediction_cache()
+    lang, prob = cache.predict_url(readme_url)
     print(f'\n\nThe provided README is predicted as {lang} with {prob:.2%} probability.\n\n')
 
 
-readme = input('Provide location of readme document: ')
-predict_readme_lang(readme)
\ No newline at end of file
+#################### Batch Prediction ####################
+
+
+def predict_batch(readmes, tfidf=None, model=None, n_jobs=1):
+    '''
+    Takes a list of README texts and returns a list of tuples of the
+    predicted language and its probability. The texts are cleaned in
+    n_jobs processes, vectorized into one sparse matrix and scored by a
+    single predict_proba call.
+    '''
+
+    if tfidf is None or model is None:
+        tfidf, model = load_pruned_model()
+    prob = model.predict_proba(vectorize_readmes(readmes, tfidf, n_jobs))
+    best = prob.argmax(axis=1)
+
+    return [(decode_language(model.classes_[i], display=True), prob[row, i])
+            for row, i in enumerate(best)]
+
+
+def iter_readmes(sources, text_keys=('readme', 'readme_contents')):
+    '''
+    Takes a list of sources and yields a tuple of id and README text for
+    each README in them. A source is a path to a README file, a path to a
+    .jsonl file of records or "-" for JSONL records on stdin. Records hold
+    the text under one of text_keys and an optional "repo" or "id"; null
+    records and records without text are skipped.
+    '''
+
+    for source in sources:
+        if source != '-' and not source.endswith('.jsonl'):
+            with open(source, encoding='utf-8', errors='replace') as f:
+                yield source, f.read()
+            continue
+        lines = sys.stdin if source == '-' else open(source, encoding='utf-8')
+        for lineno, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                continue
+            text = next((record[key] for key in text_keys
+                         if record.get(key) is not None), None)
+            if text is None:
+                continue
+            record_id = record.get('repo', record.get('id', f'{source}:{lineno}'))
+            yield record_id, text
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def stream_predictions(records, batch_size=10_000, n_jobs=1, lite=None):
+    '''
+    Takes an iterable of (id, README text) tuples and yields a dict of id,
+    language and probability for each, predicting batch_size at a time;
+    pass the path of an exported lite model as lite to predict with it
+    '''
+
+    tfidf, model = load_lite_model(lite) if lite else load_pruned_model()
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        predictions = predict_batch([text for _, text in batch], tfidf,
+                                    model, n_jobs=n_jobs)
+        for (record_id, _), (lang, prob) in zip(batch, predictions):
+            yield {'id': record_id, 'language': lang,
+                   'probability': round(float(prob), 6)}
+
+
+def main(argv=None):
+    '''
+    Command line entry point: with no sources prompts for a README URL,
+    otherwise writes one JSON prediction per README to stdout or --output
+    '''
+
+    parser = argparse.ArgumentParser(
+        description='Predict the programming language of README files')
+    parser.add_argument('sources', nargs='*',
+                        help='README files, .jsonl record files or - for '
+                             'JSONL records on stdin')
+    parser.add_argument('--text', action='append', default=[],
+                        help='README text to predict, may be repeated')
+    parser.add_argument('--output', default='-',
+                        help='JSONL file to write, - for stdout')
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--n-jobs', type=int, default=1,
+                        help='processes used for cleaning, -1 for all cores')
+    parser.add_argument('--lite', metavar='NPZ',
+                        help='predict with a model exported by lite_model.py '
+                             'instead of the pickles')
+    parser.add_argument('--cache', metavar='SQLITE',
+                        help='SQLite file keeping README URL predictions '
+                             'between runs')
+    args = parser.parse_args(argv)
+
+    if not args.sources and not args.text:
+        readme = input('Provide location of readme document: ')
+        predict_readme_lang(readme, load_prediction_cache(args.cache))
+        return
+    records = iter_readmes(args.sources)
+    if args.text:
+        texts = ((f'text:{i}', text) for i, text in enumerate(args.text))
+        records = (record for part in (texts, records) for record in part)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    for prediction in stream_predictions(records, args.batch_size,
+                                         args.n_jobs, args.lite):
+        out.write(json.dumps(prediction) + '\n')
+    if out is not sys.stdout:
+        out.close()
+
+
+if __name__ == '__main__':
+    main()
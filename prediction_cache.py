@@ -0,0 +1,408 @@
+'''
+A two-level cache of README language predictions.
+
+The same README URLs are classified again and again, on every push to a
+popular repo. The cache keeps two maps:
+
+    url                          -> ETag and hash of the README's content
+    content hash + model version -> predicted language and probability
+
+A known URL is fetched with If-None-Match, and a 304 Not Modified answer
+returns the cached prediction without downloading, cleaning or scoring
+the README. A changed ETag whose content hashes the same is still scored
+only once. The model version is a hash of the tfidf and model pickles,
+rehashed whenever either file changes on disk, so predictions of an old
+model are never returned and the loaders are cleared to score with the
+new one.
+
+Each level is an in-process LRU of at most maxsize entries, and with a
+path also a SQLite file shared between processes and runs; entries older
+than ttl seconds are ignored and dropped.
+
+    cache = PredictionCache(path='prediction_cache.sqlite', ttl=86400)
+    cache.predict_url(url)
+    cache.report()
+'''
+
+
+# import standard libraries
+import hashlib
+import json
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+#################### Stores ####################
+
+
+class LRUStore:
+    '''
+    In-process map of at most maxsize keys to values, dropping the least
+    recently used key first and keys older than ttl seconds
+    '''
+
+    def __init__(self, maxsize=10_000, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (time stored, value), least recently used first
+        self.entries = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        '''
+        Returns the value of key, or None when absent or expired
+        '''
+
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl is not None and time.time() - entry[0] > self.ttl:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+
+        return entry[1]
+
+    def put(self, key, value, stored_at=None):
+        '''
+        Stores value under key, evicting the least recently used keys
+        beyond maxsize
+        '''
+
+        self.entries[key] = (time.time() if stored_at is None else stored_at,
+                             value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class SQLiteStore:
+    '''
+    SQLite backed map of (level, key) to a JSON value and the time it was
+    stored, ignoring and deleting entries older than ttl seconds
+    '''
+
+    def __init__(self, path='prediction_cache.sqlite', ttl=None):
+        self.path = path
+        self.ttl = ttl
+        # the service looks entries up from its request threads
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # a write-ahead log commits without waiting on a sync of the file
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                level TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (level, key)
+            )''')
+        self.conn.commit()
+        self.purge()
+
+    def get(self, level, key):
+        '''
+        Returns a tuple of the value of key and the time it was stored, or
+        None when absent or expired
+        '''
+
+        row = self.conn.execute('SELECT value, stored_at FROM entries '
+                                'WHERE level = ? AND key = ?',
+                                (level, key)).fetchone()
+        if row is None:
+            return None
+        if self.ttl is not None and time.time() - row[1] > self.ttl:
+            self.conn.execute('DELETE FROM entries WHERE level = ? AND key = ?',
+                              (level, key))
+            self.conn.commit()
+            return None
+
+        return json.loads(row[0]), row[1]
+
+    def put(self, level, key, value, stored_at):
+        '''
+        Inserts or replaces one entry and commits it immediately
+        '''
+
+        self.conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                          (level, key, json.dumps(value), stored_at))
+        self.conn.commit()
+
+    def purge(self):
+        '''
+        Deletes the expired entries and returns how many there were
+        '''
+
+        if self.ttl is None:
+            return 0
+        deleted = self.conn.execute('DELETE FROM entries WHERE stored_at < ?',
+                                    (time.time() - self.ttl,)).rowcount
+        self.conn.commit()
+
+        return deleted
+
+    def close(self):
+        self.conn.close()
+
+
+#################### Model Version ####################
+
+
+class ModelVersion:
+    '''
+    Hash of the tfidf and model pickles, recomputed only when the size or
+    modification time of either file changes
+    '''
+
+    def __init__(self, tfidf_path='tfidf.pickle', model_path='model.pickle'):
+        self.paths = (tfidf_path, model_path)
+        self.stamp = None
+        self.version = None
+
+    def get(self):
+        '''
+        Returns the version of the pickles as they are on disk now
+        '''
+
+        stamp = tuple((s.st_size, s.st_mtime_ns)
+                      for s in map(os.stat, self.paths))
+        if stamp != self.stamp:
+            digest = hashlib.sha256()
+            for path in self.paths:
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+            self.stamp, self.version = stamp, digest.hexdigest()[:16]
+
+        return self.version
+
+
+def content_hash(text):
+    '''
+    Returns the hex digest keying README text in the prediction level
+    '''
+
+    return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+#################### Prediction Cache ####################
+
+
+class PredictionCache:
+    '''
+    Caches the predictions of README URLs and texts by URL and ETag, and
+    by content hash and model version, in an LRU of maxsize entries per
+    level and, given a path, a SQLite file; entries expire after ttl
+    seconds, or never when ttl is None
+    '''
+
+    def __init__(self, path=None, maxsize=10_000, ttl=None,
+                 tfidf_path='tfidf.pickle', model_path='model.pickle',
+                 latency_window=10_000):
+        self.memory = {'urls': LRUStore(maxsize, ttl),
+                       'predictions': LRUStore(maxsize, ttl)}
+        self.disk = SQLiteStore(path, ttl) if path is not None else None
+        self.tfidf_path, self.model_path = tfidf_path, model_path
+        self.model_version = ModelVersion(tfidf_path, model_path)
+        self.loaded_version = None
+        self.session = None
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'disk_hits': 0,
+                      'not_modified': 0, 'downloads': 0,
+                      'model_reloads': 0}
+        # milliseconds of the latest lookups, by whether they were hits
+        self.latencies = {'hit': deque(maxlen=latency_window),
+                          'miss': deque(maxlen=latency_window)}
+
+    def _get(self, level, key):
+        '''
+        Returns the value of key in level from memory, then from disk, or
+        None
+        '''
+
+        with self.lock:
+            value = self.memory[level].get(key)
+            if value is not None or self.disk is None:
+                return value
+            entry = self.disk.get(level, key)
+            if entry is None:
+                return None
+            # later lookups are answered from memory
+            self.memory[level].put(key, entry[0], entry[1])
+            self.stats['disk_hits'] += 1
+
+            return entry[0]
+
+    def _put(self, level, key, value):
+        with self.lock:
+            stored_at = time.time()
+            self.memory[level].put(key, value, stored_at)
+            if self.disk is not None:
+                self.disk.put(level, key, value, stored_at)
+
+    def _record(self, outcome, start):
+        with self.lock:
+            self.stats['hits' if outcome == 'hit' else 'misses'] += 1
+            self.latencies[outcome].append(
+                (time.perf_counter() - start) * 1000)
+
+    def version(self):
+        '''
+        Returns the version of the model pickles on disk, clearing the
+        loaded models when it changed since the last prediction
+        '''
+
+        with self.lock:
+            version = self.model_version.get()
+            if self.loaded_version not in (None, version):
+                from predict import load_model, load_pruned_model
+                load_model.cache_clear()
+                load_pruned_model.cache_clear()
+                self.stats['model_reloads'] += 1
+            self.loaded_version = version
+
+        return version
+
+    def _score(self, readme, key):
+        '''
+        Predicts readme with the current model, stores the prediction
+        under key and returns it
+        '''
+
+        from predict import load_pruned_model, predict_readme
+
+        tfidf, model = load_pruned_model(self.tfidf_path, self.model_path)
+        lang, prob = predict_readme(readme, tfidf, model)
+        prediction = [lang, float(prob)]
+        self._put('predictions', key, prediction)
+
+        return prediction
+
+    def predict(self, readme):
+        '''
+        Takes README text and returns a tuple of the predicted language and
+        its probability, scoring it only when its content and the model
+        have not been seen together before
+        '''
+
+        start = time.perf_counter()
+        key = f'{content_hash(readme)}:{self.version()}'
+        prediction = self._get('predictions', key)
+        if prediction is not None:
+            self._record('hit', start)
+            return tuple(prediction)
+        prediction = self._score(readme, key)
+        self._record('miss', start)
+
+        return tuple(prediction)
+
+    def predict_url(self, readme_url, timeout=30):
+        '''
+        Takes the URL of a README and returns a tuple of its predicted
+        language and probability. A URL seen before is revalidated with
+        its ETag, and an unchanged README is neither downloaded nor scored
+        '''
+
+        start = time.perf_counter()
+        url = str(readme_url)
+        version = self.version()
+        known = self._get('urls', url)
+        prediction = None
+        if known is not None:
+            etag, digest = known
+            prediction = self._get('predictions', f'{digest}:{version}')
+        # without a cached prediction the README itself is needed
+        response = self._fetch(url, known[0] if prediction is not None
+                               else None, timeout)
+        if response.status_code == 304:
+            with self.lock:
+                self.stats['not_modified'] += 1
+            self._record('hit', start)
+            return tuple(prediction)
+        response.raise_for_status()
+        readme = response.text
+        digest = content_hash(readme)
+        self._put('urls', url, [response.headers.get('ETag'), digest])
+        key = f'{digest}:{version}'
+        prediction = self._get('predictions', key)
+        if prediction is not None:
+            self._record('hit', start)
+            return tuple(prediction)
+        prediction = self._score(readme, key)
+        self._record('miss', start)
+
+        return tuple(prediction)
+
+    def _fetch(self, url, etag, timeout):
+        '''
+        Returns the response to a GET of url, conditional on etag when
+        given
+        '''
+
+        import requests
+
+        # request threads would otherwise each build a session, leaking all
+        # but the last
+        with self.lock:
+            if self.session is None:
+                self.session = requests.Session()
+        headers = {'If-None-Match': etag} if etag else {}
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        if response.status_code != 304:
+            with self.lock:
+                self.stats['downloads'] += 1
+
+        return response
+
+    def summary(self):
+        '''
+        Returns a dict of the counters, the entries held and the p50 and
+        p99 milliseconds of hits and misses so far
+        '''
+
+        with self.lock:
+            summary = dict(self.stats)
+            lookups = summary['hits'] + summary['misses']
+            summary['hit_rate'] = round(summary['hits'] / lookups, 4) \
+                if lookups else 0.0
+            summary['entries'] = {level: len(store)
+                                  for level, store in self.memory.items()}
+            summary['evictions'] = sum(store.evictions
+                                       for store in self.memory.values())
+            for outcome, latencies in self.latencies.items():
+                if latencies:
+                    cuts = statistics.quantiles(latencies, n=100) \
+                        if len(latencies) > 1 else [latencies[0]] * 99
+                    summary[f'{outcome}_p50_ms'] = round(cuts[49], 3)
+                    summary[f'{outcome}_p99_ms'] = round(cuts[98], 3)
+
+        return summary
+
+    def report(self):
+        '''
+        Prints and returns the summary of the cache so far
+        '''
+
+        summary = self.summary()
+        print(f"[prediction cache] {summary['hits']} hits, "
+              f"{summary['misses']} misses, {summary['not_modified']} not "
+              f"modified, {summary['downloads']} downloads, "
+              f"hit p50 {summary.get('hit_p50_ms', 0):.2f}ms, "
+              f"miss p50 {summary.get('miss_p50_ms', 0):.2f}ms")
+
+        return summary
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+        if self.session is not None:
+            self.session.close()
@@ -1,16 +1,115 @@
+import os
 import unicodedata
 import re
 import json
-import nltk
-from nltk.tokenize.toktok import ToktokTokenizer
-from nltk.corpus import stopwords
+from functools import lru_cache, partial
 
+# nltk, pandas and sklearn are imported by the functions that use them, so
+# importing this module (and predict, which imports it) stays fast
 
-import pandas as pd
-from nltk.corpus import stopwords
-nltk.download('stopwords')
-nltk.download('wordnet')
-from sklearn.model_selection import train_test_split
+
+#################### NLTK Data ####################
+
+
+# nltk data each resource needs, found under these paths by nltk.data.find
+NLTK_DATA = {'stopwords': 'corpora/stopwords', 'wordnet': 'corpora/wordnet'}
+
+
+@lru_cache(maxsize=None)
+def ensure_nltk_data(name):
+    '''
+    Takes the name of an nltk data package and downloads it only when
+    nltk.data.find cannot find it already installed
+    '''
+    import nltk
+
+    try:
+        nltk.data.find(NLTK_DATA[name])
+    except LookupError:
+        nltk.download(name)
+
+
+#################### Shared NLP Objects ####################
+
+
+# precompiled patterns for the README markup stripping steps
+HTML_TAG_RE = re.compile(r'(\<.+\>)')
+MARKDOWN_LINK_RE = re.compile(r'!?(\[.+\])(\(.+\))?')
+NEWLINES_RE = re.compile(r'(\n+)')
+NBSP_RE = re.compile(r'(&nbsp;+)')
+HYPERLINK_RE = re.compile(r'http\S+')
+# precompiled pattern for the basic_clean character filter
+NON_ALNUM_RE = re.compile(r"[^a-z0-9'\s]")
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer():
+    '''
+    Returns the shared ToktokTokenizer, built on first use
+    '''
+    from nltk.tokenize.toktok import ToktokTokenizer
+
+    return ToktokTokenizer()
+
+
+@lru_cache(maxsize=None)
+def get_stemmer():
+    '''
+    Returns the shared PorterStemmer, built on first use
+    '''
+    from nltk.stem.porter import PorterStemmer
+
+    return PorterStemmer()
+
+
+@lru_cache(maxsize=None)
+def get_lemmatizer():
+    '''
+    Returns the shared WordNetLemmatizer, built on first use
+    '''
+    from nltk.stem import WordNetLemmatizer
+
+    ensure_nltk_data('wordnet')
+    return WordNetLemmatizer()
+
+
+def get_stopwords(extra_words=[], exclude_words=[]):
+    '''
+    This function takes in lists of extra words and exclude words
+    and returns a frozenset of the english stopwords with the extra words
+    added and the exclude words removed, built once per configuration
+    '''
+    return _stopword_set(tuple(extra_words), tuple(exclude_words))
+
+
+@lru_cache(maxsize=None)
+def _stopword_set(extra_words, exclude_words):
+    from nltk.corpus import stopwords
+
+    ensure_nltk_data('stopwords')
+    return frozenset(stopwords.words('english')).union(extra_words)\
+                                                .difference(exclude_words)
+
+
+# README vocabularies are very Zipfian, so a bounded per-word cache
+# answers most stem and lemma lookups without calling nltk
+@lru_cache(maxsize=2**16)
+def stem_word(word):
+    '''
+    Returns the Porter stem of a single word
+    '''
+    return get_stemmer().stem(word)
+
+
+@lru_cache(maxsize=2**16)
+def lemmatize_word(word):
+    '''
+    Returns the WordNet lemma of a single word
+    '''
+    return get_lemmatizer().lemmatize(word)
+
+
+#################### Text Cleaning ####################
 
 
 def basic_clean(text):
@@ -22,7 +121,7 @@ def basic_clean(text):
     '''
     text = text.lower()
     text = unicodedata.normalize('NFKD', text).encode('ascii','ignore').decode('utf-8','ignore')
-    text = re.sub(r"[^a-z0-9'\s]",'',text)
+    text = NON_ALNUM_RE.sub('', text)
     return text
 
 
@@ -31,8 +130,7 @@ def tokenize(text):
     This function takes in text
     and returns the text as individual tokens put back into the original text
     '''
-    tokenizer = nltk.tokenize.ToktokTokenizer()
-    text = tokenizer.tokenize(text, return_str=True)
+    text = get_tokenizer().tokenize(text, return_str=True)
     return text
 
 
@@ -41,8 +139,7 @@ def stem(text):
     This function takes in text
     and returns the stem word joined back into the original text
     '''
-    ps = nltk.porter.PorterStemmer()
-    stems = [ps.stem(word) for word in text.split()]
+    stems = [stem_word(word) for word in text.split()]
     text_stemmed = ' '.join(stems)
     return text_stemmed
 
@@ -52,8 +149,7 @@ def lemmatize(text):
     This function takes in text
     and returns the lemmatized word joined back into the text
     '''
-    wnl = nltk.stem.WordNetLemmatizer()
-    lemmas = [wnl.lemmatize(word) for word in text.split()]
+    lemmas = [lemmatize_word(word) for word in text.split()]
     text_lemmatized = ' '.join(lemmas)
     return text_lemmatized
 
@@ -63,52 +159,166 @@ def remove_stopwords(text, extra_words=[], exclude_words=[]):
     This function takes in text, extra words and exclude words
     and returns a list of text with stopword removed
     '''
-    #nltk.download('stopwords')
-    stopword_list = stopwords.words('english')
-    if len(extra_words) > 0 :
-        for word in extra_words:
-            stopword_list.append(word)
-    if len(exclude_words) > 0:
-        for word in exclude_words:
-            stopword_list.remove(word)
+    stopword_set = get_stopwords(extra_words, exclude_words)
     words = text.split()
-    filtered_words = [word for word in words if word not in stopword_list]
+    filtered_words = [word for word in words if word not in stopword_set]
     text_without_stopwords = ' '.join(filtered_words)
     return text_without_stopwords   
 
 
-def prep_data(df, column, extra_words=[], exclude_words=[]):
+#################### Fused Normalizer ####################
+
+
+def strip_markup(text):
+    '''
+    This function takes in README text and removes HTML and markdown code,
+    page breaks, coded spaces and naked hyperlinks and replaces hyphens with
+    spaces, returning the same text as wrangle.remove_code_snippets
+    '''
+
+    text = HTML_TAG_RE.sub('', text)
+    text = MARKDOWN_LINK_RE.sub('', text)
+    text = NEWLINES_RE.sub(' ', text)
+    if '&nbsp;' in text:
+        text = NBSP_RE.sub('', text)
+    text = HYPERLINK_RE.sub('', text)
+    text = text.replace('-', ' ')
+    return text
+
+
+def normalize_readme(text, stopword_set=None):
+    '''
+    This function takes in original README text and returns in one pass the
+    same text as strip_markup followed by basic_clean, tokenize and
+    remove_stopwords with extra_words=['&#9;'].
+    A different stopword_set may be passed as a set of words to remove.
+    '''
+
+    if stopword_set is None:
+        stopword_set = get_stopwords(['&#9;'])
+    # markup stripping; newlines only separate words, so they are left as is
+    text = HTML_TAG_RE.sub('', text)
+    text = MARKDOWN_LINK_RE.sub('', text)
+    if '&nbsp;' in text:
+        text = NBSP_RE.sub('', text)
+    text = HYPERLINK_RE.sub('', text).replace('-', ' ')
+    # basic_clean, skipping unicode normalization of pure ascii text
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore')\
+                                                  .decode('utf-8', 'ignore')
+    text = NON_ALNUM_RE.sub('', text)
+    # on this alphabet toktok only pads quotes and turns tabs into '&#9;',
+    # so splitting after padding quotes gives the same tokens
+    text = text.replace("'", " ' ")
+    if '\t' in text:
+        text = text.replace('\t', ' &#9; ')
+    words = text.split()
+    return ' '.join([word for word in words if word not in stopword_set])
+
+
+def normalize_readme_series(series, extra_words=['&#9;'], exclude_words=[]):
+    '''
+    This function takes in a Series of original README text and returns a
+    Series with the same values as applying normalize_readme to each row,
+    computed through vectorized pandas.Series.str operations
+    '''
+
+    import pandas as pd
+
+    stopword_set = get_stopwords(extra_words, exclude_words)
+    # keep python regex semantics regardless of the string dtype, and use
+    # positions so duplicate index labels regroup correctly
+    text = series.astype(object).reset_index(drop=True)
+    # markup stripping
+    text = text.str.replace(HTML_TAG_RE, '', regex=True)\
+               .str.replace(MARKDOWN_LINK_RE, '', regex=True)\
+               .str.replace(NBSP_RE, '', regex=True)\
+               .str.replace(HYPERLINK_RE, '', regex=True)\
+               .str.replace('-', ' ', regex=False)
+    # basic_clean
+    text = text.str.lower()\
+               .str.normalize('NFKD')\
+               .str.encode('ascii', 'ignore')\
+               .str.decode('utf-8', 'ignore')\
+               .str.replace(NON_ALNUM_RE, '', regex=True)
+    # tokenize, keeping tabs as the '&#9;' token toktok makes of them
+    words = text.str.replace("'", " ' ", regex=False)\
+                .str.replace('\t', ' &#9; ', regex=False)\
+                .str.split()\
+                .explode()
+    # remove stopwords and join words back per row
+    words = words[words.notna() & ~words.isin(stopword_set)]
+    text = words.groupby(level=0, sort=False).agg(' '.join)
+    text = text.reindex(range(len(series)), fill_value='')
+    return pd.Series(text.values, index=series.index, name=series.name,
+                     dtype=object)
+
+
+#################### Parallel Preparation ####################
+
+
+def _apply_chunk(func, chunk):
+    return [func(value) for value in chunk]
+
+
+def parallel_apply(func, values, n_jobs=1, chunks_per_job=4):
+    '''
+    This function takes in a picklable function and a sequence of values
+    and returns a list of func applied to each value, in order.
+    With n_jobs > 1 (or -1 for every core) the values are split into
+    contiguous chunks that are processed in a pool of n_jobs processes.
+    '''
+    values = list(values)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1 or len(values) < 2:
+        return [func(value) for value in values]
+    # a few chunks per process balances uneven README lengths
+    n_chunks = min(len(values), n_jobs * chunks_per_job)
+    size = -(-len(values) // n_chunks)
+    chunks = [values[i:i + size] for i in range(0, len(values), size)]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        results = executor.map(partial(_apply_chunk, func), chunks)
+        return [value for chunk in results for value in chunk]
+
+
+def prep_text(text, extra_words=[], exclude_words=[]):
+    '''
+    This function takes in text and returns a tuple of the cleaned, stemmed
+    and lemmatized text with stopwords removed, cleaning and tokenizing the
+    text only once for all three
+    '''
+    tokens = tokenize(basic_clean(text))
+    return (remove_stopwords(tokens, extra_words, exclude_words),
+            remove_stopwords(stem(tokens), extra_words, exclude_words),
+            remove_stopwords(lemmatize(tokens), extra_words, exclude_words))
+
+
+def prep_data(df, column, extra_words=[], exclude_words=[], n_jobs=1):
     '''
     This function take in a df and the string name for a text column with 
     option to pass lists for extra_words and exclude_words and
     returns a df with the text article title, original text, stemmed text,
     lemmatized text, cleaned, tokenized, & lemmatized text with stopwords removed.
+    Set n_jobs to process the rows in that many processes (-1 for all cores).
     '''
-    df['clean'] = df[column].apply(basic_clean)\
-                            .apply(tokenize)\
-                            .apply(remove_stopwords, 
-                                   extra_words=extra_words, 
-                                   exclude_words=exclude_words)
-    
-    df['stemmed'] = df[column].apply(basic_clean)\
-                            .apply(tokenize)\
-                            .apply(stem)\
-                            .apply(remove_stopwords, 
-                                   extra_words=extra_words, 
-                                   exclude_words=exclude_words)
-    
-    df['lemmatized'] = df[column].apply(basic_clean)\
-                            .apply(tokenize)\
-                            .apply(lemmatize)\
-                            .apply(remove_stopwords, 
-                                   extra_words=extra_words, 
-                                   exclude_words=exclude_words)
+    rows = parallel_apply(partial(prep_text, extra_words=extra_words,
+                                  exclude_words=exclude_words),
+                          df[column], n_jobs=n_jobs)
+    df['clean'] = [row[0] for row in rows]
+    df['stemmed'] = [row[1] for row in rows]
+    df['lemmatized'] = [row[2] for row in rows]
     
     return df[['title', column,'clean', 'stemmed', 'lemmatized']]
 
 
-def filter_iqr_outliers(data, k=1.5):
+def iqr_outlier_mask(data, k=1.5):
     '''
+    Takes a numeric Series and returns a boolean mask of the values
+    inside the IQR bounds used by filter_iqr_outliers
     '''
     
     # define q1, q3, and iqr
@@ -117,14 +327,23 @@ def filter_iqr_outliers(data, k=1.5):
     # set upper and lower bounds for character count
     upper_bound = iqr + q3 * k
     lower_bound = iqr - q1 * k
+    
+    return (data > lower_bound) & (data < upper_bound)
+
+
+def filter_iqr_outliers(data, k=1.5):
+    '''
+    '''
+    
     # set filter masks for bounds
-    data = data[(data > lower_bound) & (data < upper_bound)]
+    data = data[iqr_outlier_mask(data, k)]
     
     return data
 
 
 def split(df, stratify_by=None):
-   
+    from sklearn.model_selection import train_test_split
+
     train, test = train_test_split(df, test_size=.2, random_state=123, stratify=df[stratify_by])
     
     train, validate = train_test_split(train, test_size=.3, random_state=123, stratify=train[stratify_by])
@@ -0,0 +1,243 @@
+'''
+Inference pruned to the vocabulary terms the fitted classifier reads.
+
+compile_model inspects a fitted classifier for the features it uses: the
+split features of its trees, or the columns of a naive Bayes or linear
+model with a nonzero weight. The PrunedVectorizer it returns turns raw
+READMEs into tfidf rows holding only those features, with the values the
+full pipeline gives them, so the unmodified classifier predicts exactly
+what it predicts on full rows. The report's DecisionTreeClassifier with
+max_depth=3 reads at most seven of the vocabulary's terms.
+
+A normalized row still depends on every vocabulary term of the README,
+as the norm divides each value, so every word has to be mapped to its
+term. The vectorizer maps each distinct word once, through the stopword
+set, the lemmatizer and the vocabulary, and remembers the terms, so a
+README costs one basic_clean and a dict lookup per distinct word instead
+of two stopword passes, lemmatizing, a regex tokenizer and a sparse
+transform. READMEs without a used term skip the norm altogether.
+
+    vectorizer = compile_model(tfidf, model)
+    model.predict_proba(vectorizer.transform_readmes(readmes))
+
+Run from the command line to check a model against the full pipeline:
+    python pruned_model.py tfidf.pickle model.pickle data2.jsonl
+'''
+
+
+# import standard libraries
+from collections import Counter
+from itertools import chain
+from math import sqrt
+
+# import data tools
+import numpy as np
+import scipy.sparse as sp
+
+# import the cleaning steps predict_readme applies
+from prepare import basic_clean, get_stopwords, lemmatize_word, \
+                    parallel_apply
+
+
+#################### Used Features ####################
+
+
+def used_features(model):
+    '''
+    Takes a fitted classifier and returns the sorted array of the feature
+    columns its predictions read
+    '''
+
+    name = type(model).__name__
+    if name == 'DecisionTreeClassifier':
+        trees = [model]
+    elif name in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+        trees = model.estimators_
+    elif hasattr(model, 'feature_log_prob_') or hasattr(model, 'coef_'):
+        weights = getattr(model, 'feature_log_prob_', None)
+        if weights is None:
+            weights = model.coef_
+        # a column of zero weights adds exactly nothing to any class
+        return np.flatnonzero(np.any(np.asarray(weights) != 0, axis=0))
+    else:
+        raise ValueError(f'Cannot prune a {name}; supported classifiers are '
+                         'trees, forests, naive Bayes and linear models')
+    # leaves have a negative feature
+    features = np.concatenate([tree.tree_.feature for tree in trees])
+
+    return np.unique(features[features >= 0])
+
+
+#################### Pruned Vectorizer ####################
+
+
+class PrunedVectorizer:
+    '''
+    Vectorizes raw READMEs as predict.clean_readme and a fitted
+    TfidfVectorizer do, keeping only the features columns.
+
+    Rows keep the full vectorizer's width, so they can be passed to the
+    classifier as they are.
+    '''
+
+    def __init__(self, tfidf, features):
+        if tfidf.analyzer != 'word' or tfidf.tokenizer is not None or \
+                tuple(tfidf.ngram_range) != (1, 1):
+            raise ValueError('Only unigram word analyzers with the default '
+                             'tokenizer can be pruned')
+        if np.dtype(tfidf.dtype) != np.float64:
+            raise ValueError('Only float64 vectorizers can be pruned')
+        self.analyze = tfidf.build_analyzer()
+        self.vocabulary = tfidf.vocabulary_
+        self.n_features = len(tfidf.vocabulary_)
+        self.idf = tfidf.idf_ if tfidf.use_idf else np.ones(self.n_features)
+        self.binary = tfidf.binary
+        self.sublinear_tf = tfidf.sublinear_tf
+        self.norm = tfidf.norm
+        self.features = np.asarray(features, dtype=np.int64)
+        self.used = np.zeros(self.n_features, dtype=bool)
+        self.used[self.features] = True
+        self.used_terms = frozenset(self.features.tolist())
+        self.stopwords = get_stopwords()
+        # the terms of every word seen, by word
+        self.word_terms = {}
+
+    def __getstate__(self):
+        # worker processes build their own word terms
+        state = self.__dict__.copy()
+        state['word_terms'] = {}
+
+        return state
+
+    def terms_of(self, word):
+        '''
+        Returns the tuple of vocabulary columns of a cleaned word, as
+        clean_readme and the vectorizer's analyzer turn it into terms
+        '''
+
+        terms = self.word_terms.get(word)
+        if terms is None:
+            if word in self.stopwords:
+                terms = ()
+            else:
+                terms = tuple(self.vocabulary[term]
+                              for term in self.analyze(lemmatize_word(word))
+                              if term in self.vocabulary)
+            self.word_terms[word] = terms
+
+        return terms
+
+    def readme_row(self, readme):
+        '''
+        Takes README text and returns arrays of the used feature columns
+        of its tfidf row and their values
+        '''
+
+        words = basic_clean(readme).split()
+        if self.binary:
+            # binary rows only need each word once
+            words = set(words)
+            for word in words.difference(self.word_terms):
+                self.terms_of(word)
+            terms = set(chain.from_iterable(map(self.word_terms.__getitem__,
+                                                words)))
+        else:
+            words = Counter(words)
+            for word in words.keys() - self.word_terms.keys():
+                self.terms_of(word)
+            # a term's count sums those of the words lemmatized to it
+            terms = Counter()
+            for word, n in words.items():
+                for term in self.word_terms[word]:
+                    terms[term] += n
+        if self.used_terms.isdisjoint(terms):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # the same operations in the same order as TfidfTransformer
+        indices = np.array(sorted(terms), dtype=np.int64)
+        values = np.ones(len(indices)) if self.binary else \
+                 np.array([terms[i] for i in indices.tolist()], dtype=float)
+        if self.sublinear_tf:
+            np.log(values, values)
+            values += 1.0
+        values *= self.idf[indices]
+        # sklearn sums the row in index order, one value at a time
+        total = 0.0
+        if self.norm == 'l2':
+            for value in values.tolist():
+                total += value * value
+            total = sqrt(total)
+        elif self.norm == 'l1':
+            for value in values.tolist():
+                total += abs(value)
+        if total != 0.0:
+            values /= total
+        keep = self.used[indices]
+
+        return indices[keep], values[keep]
+
+    def transform_readmes(self, readmes, n_jobs=1):
+        '''
+        Takes a list of raw README texts and returns the CSR matrix of
+        their pruned tfidf rows, built in n_jobs processes
+        '''
+
+        rows = parallel_apply(self.readme_row, readmes, n_jobs=n_jobs)
+        indptr = np.cumsum([0] + [len(indices) for indices, _ in rows])
+        indices = np.concatenate([np.empty(0, dtype=np.int64)] +
+                                 [indices for indices, _ in rows])
+        values = np.concatenate([np.empty(0)] + [values for _, values in rows])
+
+        return sp.csr_matrix((values, indices, indptr),
+                             shape=(len(rows), self.n_features))
+
+
+def compile_model(tfidf, model):
+    '''
+    Takes a fitted TfidfVectorizer and classifier and returns the
+    PrunedVectorizer of the features the classifier reads
+    '''
+
+    return PrunedVectorizer(tfidf, used_features(model))
+
+
+def check_identical(readmes, tfidf, model, vectorizer=None):
+    '''
+    Returns whether the classifier's probabilities for readmes from the
+    pruned rows equal those from the full pipeline, value for value
+    '''
+
+    from predict import clean_readme
+
+    if vectorizer is None:
+        vectorizer = compile_model(tfidf, model)
+    full = model.predict_proba(tfidf.transform([clean_readme(readme)
+                                                for readme in readmes]))
+    pruned = model.predict_proba(vectorizer.transform_readmes(readmes))
+
+    return np.array_equal(full, pruned)
+
+
+if __name__ == '__main__':
+    import argparse
+    import pickle
+    from itertools import islice
+    from predict import iter_readmes
+
+    parser = argparse.ArgumentParser(
+        description='Check pruned inference against the full pipeline')
+    parser.add_argument('tfidf', nargs='?', default='tfidf.pickle')
+    parser.add_argument('model', nargs='?', default='model.pickle')
+    parser.add_argument('sources', nargs='*', default=['data2.jsonl'],
+                        help='README files or .jsonl record files')
+    parser.add_argument('--limit', type=int, default=10_000)
+    args = parser.parse_args()
+    with open(args.tfidf, 'rb') as f:
+        tfidf = pickle.load(f)
+    with open(args.model, 'rb') as f:
+        model = pickle.load(f)
+    vectorizer = compile_model(tfidf, model)
+    readmes = [text for _, text in islice(iter_readmes(args.sources),
+                                          args.limit)]
+    print(f'{len(vectorizer.features)} of {vectorizer.n_features} features '
+          f'used; {len(readmes)} READMEs identical: '
+          f'{check_identical(readmes, tfidf, model, vectorizer)}')
@@ -0,0 +1,123 @@
+'''
+A persistent per-repo cache for acquire.scrape_github_data.
+
+Every scraped repo is written to a SQLite file as soon as it finishes, keyed
+by "<owner>/<repo>", together with the ETags of its github api responses so
+that later runs can revalidate it with conditional requests.
+'''
+
+
+# import standard libraries
+import sqlite3
+import time
+
+
+class RepoCache:
+    '''
+    SQLite backed store of README body, language, ETags and fetch time for
+    each repo, plus the start and finish time of the last scrape run so that
+    an interrupted run can be resumed
+    '''
+
+    def __init__(self, path='repo_cache.sqlite'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS repos (
+                repo TEXT PRIMARY KEY,
+                language TEXT,
+                readme_contents TEXT,
+                has_readme INTEGER NOT NULL,
+                contents_etag TEXT,
+                repo_etag TEXT,
+                fetched_at REAL NOT NULL
+            )''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value REAL
+            )''')
+        self.conn.commit()
+
+    def get(self, repo):
+        '''
+        Returns the cached record dict for `repo`, or None if never fetched
+        '''
+
+        return self.get_many([repo]).get(repo)
+
+    def get_many(self, repos):
+        '''
+        Returns a dict of repo name to cached record for every given repo
+        that is present in the cache
+        '''
+
+        records = {}
+        repos = list(repos)
+        # stay below sqlite's limit on bound parameters
+        for i in range(0, len(repos), 500):
+            chunk = repos[i:i + 500]
+            rows = self.conn.execute(
+                'SELECT repo, language, readme_contents, has_readme, '
+                'contents_etag, repo_etag, fetched_at FROM repos '
+                f'WHERE repo IN ({",".join("?" * len(chunk))})', chunk)
+            for row in rows:
+                records[row[0]] = {'repo': row[0],
+                                   'language': row[1],
+                                   'readme_contents': row[2],
+                                   'has_readme': bool(row[3]),
+                                   'contents_etag': row[4],
+                                   'repo_etag': row[5],
+                                   'fetched_at': row[6]}
+
+        return records
+
+    def put(self, record):
+        '''
+        Inserts or replaces one record and commits it immediately
+        '''
+
+        self.conn.execute(
+            'INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (record['repo'], record.get('language'),
+             record.get('readme_contents'), int(record['has_readme']),
+             record.get('contents_etag'), record.get('repo_etag'),
+             record.get('fetched_at', time.time())))
+        self.conn.commit()
+
+    def start_run(self):
+        '''
+        Marks the start of a scrape run and returns the time from which
+        already fetched repos can be skipped. If the previous run never
+        finished, its start time is kept so the run resumes where it stopped;
+        otherwise a new run starts now.
+        '''
+
+        started = self._get_meta('run_started')
+        finished = self._get_meta('run_finished')
+        if started is not None and (finished is None or finished < started):
+            return started
+        started = time.time()
+        self._set_meta('run_started', started)
+
+        return started
+
+    def finish_run(self):
+        '''
+        Marks the current scrape run as complete
+        '''
+
+        self._set_meta('run_finished', time.time())
+
+    def close(self):
+        self.conn.close()
+
+    def _get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?',
+                                (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                          (key, value))
+        self.conn.commit()
@@ -1 +0,0 @@
-REPOS = ['CSSEGISandData/COVID-19', 'covid19india/covid19india-react', 'nytimes/covid-19-data', 'tokyo-metropolitan-gov/covid19', 'owid/covid-19-data', 'pcm-dpc/COVID-19', 'ieee8023/covid-chestxray-dataset', 'WorldHealthOrganization/app', 'geohot/corona', 'ahmadawais/corona-cli', 'corona-warn-app/cwa-server', 'ExpDev07/coronavirus-tracker-api', 'mhdhejazi/CoronaTracker', 'soroushchehresa/awesome-coronavirus', 'neherlab/covid19_scenarios', 'github/covid19-dashboard', 'pomber/covid19', 'FoldingAtHome/coronavirus', 'datasets/covid-19', 'chrismattmann/tika-python', 'lindawangg/COVID-Net', 'chandrikadeb7/Face-Mask-Detection', 'ImperialCollegeLondon/covid19model', 'cyberman54/ESP32-Paxcounter', 'UCSD-AI4H/COVID-CT', 'makers-for-life/makair', 'neuml/paperai', 'globalcitizen/2019-wuhan-coronavirus-data', 'pallupz/covid-vaccine-booking', 'javieraviles/covidAPI', 'iamnotturner/vaccipy', 'covidpass-org/covidpass', 'ryansmcgee/seirsplus', 'google/exposure-notifications-android', 'cirosantilli/china-dictatorship', 'MohGovIL/hamagen-react-native', 'phildini/stayinghomeclub', 'italia/covid19-opendata-vaccini', 'rbignon/doctoshotgun', 'OxCGRT/covid-policy-tracker', 'AaronWard/covidify', 'MoH-Malaysia/covid19-public', 'GuangchuangYu/nCov2019', 'RehanSaeed/Schema.NET', 'MinCiencia/Datos-COVID19', 'wcota/covid19br', 'covidatlas/coronadatascraper', 'reichlab/covid19-forecast-hub', 'swsoyee/2019-ncov-japan', 'lispczz/pneumonia', 'CITF-Malaysia/citf-public', 'Ank-Cha/Social-Distancing-Analyser-COVID-19', 'VinAIResearch/BERTweet', 'amodm/api-covid19-in', 'JoHof/lungmask', 'JohnCoene/coronavirus', 'stevenliuyi/covid19', 'GoogleCloudPlatform/covid-19-open-data', 'devarthurribeiro/covid19-brazil-api', 'deepset-ai/COVID-QA', 'bhattbhavesh91/cowin-vaccination-slot-availability', 'ccodwg/Covid19Canada', 'HzFu/COVID19_imaging_AI_paper_list', 'aatishb/covidtrends', 'github/covid-19-repo-data', 'opencovid19-fr/data', 'vita-epfl/monoloco', 'anshumanpattnaik/covid19-full-stack-application', 'open-covid-19/data', 'midudev/covid-vacuna', 'paulvangentcom/python_corona_simulation', 'asreview/asreview', 'alfonsrv/impf-botpy', 'fluttercandies/ncov_2019', 'hostolab/covidliste', 'trekhleb/covid-19', 'ayushi7rawat/Youtube-Projects', 'kawalcovid19/wargabantuwarga.com', 'COVID-19-electronic-health-system/Corona-tracker', 'YiranJing/Coronavirus-Epidemic-COVID-19', 'wobsoriano/covid3d', 'hzi-braunschweig/SORMAS-Project', 'nasa-jpl/Pulse', 'cwoomi/cert-covid19', 'DataForScience/Epidemiology101', 'dsfsi/covid19za', 'WeileiZeng/Open-Source-COVID-19', 'cabani/MaskedFace-Net', 'AmboVent-1690-108/AmboVent', 'CodeForPhilly/chime', 'Inspire-Poli-USP/Inspire-OpenLung', 'M-Media-Group/Covid-19-API', 'lestweforget/wuhan2019', 'lachlanjc/covidtesting', 'covid19datahub/COVID19', 'ihmeuw-msca/CurveFit', 'Yu-Group/covid19-severity-prediction', 'minvws/nl-covid19-notification-app-website', 'BustByte/coronastatus', 'marlon360/rki-covid-api', 'LiuTianyong/nCov2019_data_crawler', 'CogStack/MedCAT', 'hodcroftlab/covariants', 'sidhuparas/Coronavirus-Tracker', 'shrutikapoor08/talent-for-hire', 'tomwhite/covid-19-uk-data', 'gsarti/covid-papers-browser', 'etalab/covid19-dashboard', 'aatishb/covid', 'MariaEduardaDeAzevedo/detector-de-mascaras', 'wuhan-support/wuhan.support', 'minvws/nl-covid19-data-dashboard', 'coronasafe/care', 'pepp-pt/pepp-pt-documentation', 'localeai/covid19-live-visualization', 'lestweforget/COVID-19-Timeline', 'GabrielTavernini/Covid19Stats', 'wobsoriano/2019-ncov-frontend', 'J535D165/CoronaWatchNL', 'descarteslabs/DL-COVID-19', 'yashwanthm/cowin-vaccine-booking', 'InstituteforDiseaseModeling/covasim', 'K-G-PRAJWAL/ReactJS-Projects', 'facebookresearch/CovidPrognosis', 'jgehrcke/covid-19-germany-gae', 'yjlou/2019-nCov', 'publichealthengland/coronavirus-dashboard', 'vinitshahdeo/Water-Monitoring-System', 'Laeyoung/COVID-19-API', 'rajeshrinet/pyross', 'nat236919/covid19-api', 'yunwei37/COVID-19-NLP-vis', 'BrianRuizy/covid19-dashboard', 'labnol/covid19-vaccine-tracker', 'shubhamhackz/aarogya_seva', 'marcusraitner/COVID-19-Dashboard', 'postmanlabs/covid-19-apis', 'africa-covid-19-response-toolkit/community', 'vinitshahdeo/COVID19', 'lachlanjc/covid19', 'greenelab/covid19-review', 'saimj7/People-Counting-in-Real-Time', 'Lewuathe/COVID19-SIR', 'ariya/kabarvirus', 'ryo-ma/covid19-japan-web-api', 'siaw23/kovid', 'aatishb/maskmath', 'nasa-jpl/COVID-19-respirators', 'cyberboysumanjay/APIs', 'ayushi7rawat/CoWin-Vaccine-Notifier', 'BDI-pathogens/covid-19_instant_tracing', 'szczepienia/szczepienia.github.io', 'dunglas/vaccin.click', 'porames/the-researcher-covid-bot', 'd4l-data4life/covapp', 'covidcaremap/covid19-healthsystemcapacity', 'amcharts/covid-charts', 'immuni-app/immuni-backend-common', 'chinatimeline/chinatimeline.github.io', 'covid19-dash/covid-dashboard', 'yahoo/covid-19-data', 'wxwx1993/PM_COVID', 'nextstrain/nextclade', 'helpwithcovid/covid-volunteers', 'jannisborn/covid19_ultrasound', 'Kamaropoulos/COVID19Py', 'closedloop-ai/cv19index', 'garrylachman/covid19-cli', 'Call-for-Code/Solution-Starter-Kit-Communication-2020', 'OpenGene/fastv', 'covid-19-net/covid-19-community', 'belisards/coronabr', 'kaushikjadhav01/COVID-19-Detection-Flask-App-based-on-Chest-X-rays-and-CT-Scans', 'reach4help/reach4help', 'pastelsky/covid-19-mobility-tracker', 'code-shoily/covid19', 'CSSEGISandData/COVID-19_Unified-Dataset', 'tarunk04/COVID-19-CaseStudy-and-Predictions', 'imdevskp/covid_19_jhu_data_web_scrap_and_cleaning', 'vitorbaptista/google-covid19-mobility-reports', 'Perishleaf/data-visualisation-scripts', 'iiscleap/Coswara-Data', 'SRvSaha/CoWinVaccineSlotFinder', 'coronafighter/coronaSEIR', 'BDI-pathogens/OpenABM-Covid19', 'Rank23/COVID19', 'starschema/COVID-19-data', 'neuml/paperetl', 'emergenzeHack/covid19italia', 'arafaysaleem/covid_tracker', 'coopTilleuls/CoopTilleulsSyliusClickNCollectPlugin', 'MTrajK/virus-spreading', 'zoharsf/Raspberry-Pi-E-Ink-Dashboard', 'covid19-eu-zh/covid19-eu-data', 'haydengunraj/COVIDNet-CT', 'ChrisMichaelPerezSantiago/covid19', 'coronasafe/coronasafe.in', 'aboullaite/Covid19-MA', 'catin-black/meteor-emails', 'jeremykohn/rid-covid', 'iliasprc/COVIDNet', 'carranco-sga/Mexico-COVID-19', 'PrasadG193/covaccine-notifier', 'covid19-model/simulator', 'ezranbayantemur/covid-19-app', 'imantsm/COVID-19', 'code4nagoya/covid19', 'DmitrySerg/COVID-19', 'livgust/covid-vaccine-scrapers', 'agallio/ina-covid-bed', 'ohdarling/COVID-19-Charts', 'soaple/corona-board', 'yijunwang0805/covid-19', 'BDBC-KG-NLP/COVID-19-tracker', 'dstotijn/ct-diag-server', 'MaksimEkin/COVID19-Literature-Clustering', 'ECheynet/SEIR', 'rpandey1234/Covid19Tracker', 'coronasafe/care_fe', 'simonw/covid-19-datasette', 'jetnew/COVID-Resource-Allocation-Simulator', 'andreagrandi/covid-api', 'emmadoughty/Daily_COVID-19', 'NSHipster/ContactTracing-Framework-Interface', 'the-robot/covid19-updates', 'jabardigitalservice/pikobar-flutter', 'mr7495/COVID-CTset', 'lisphilar/covid19-sir', 'stop-covid19-hyogo/covid19', 'Omaroid/Covid-19-API', 'ariya/dekontaminasi', 'OpenCOVID19CoughCheck/CoughCheckApp', 'Priesemann-Group/covid19_inference', 'wobsoriano/2019-ncov-api', 'UniversalDataTool/coronavirus-mask-image-dataset', 'abd-shoumik/Social-distance-detection', 'itsksaurabh/go-corona', 'Coders-Of-XDA-OT/covid19-status-android', 'AndroidArena/BestCovid19_bot-DialogFlow', 'aperaltasantos/covid_pt', 'SaadAAkash/COVID-19-Bangladesh-Android', 'liibre/coronabr', 'SistemasMapache/Covid19arData', 'CDCgov/covid19healthbot', 'PyTorchLightning/lightning-Covid19', 'boogheta/coronavirus-countries', 'sfu-db/covid19-datasets', 'sociepy/covid19-vaccination-subnational', 'neuml/cord19q', 'MohGovIL/rn-contact-tracing', 'cre8ivepark/COVID19DataVisualizationHoloLens2', 'urmi-21/COVID-19-RNA-Seq-datasets', 'adamdriscoll/awesome-covid19-resources', 'marcingajda/covid-19-status', 'DSC-JSS-NOIDA/Plasma-Donor-App', 'RespiraWorks/Ventilator', 'kmetz/BLEExposureNotificationBeeper', 'amel-github/covid19-interventionmeasures', 'broadinstitute/catch', 'k1m0ch1/covid-19-api', 'coviddata/coviddata', 'ynshung/covid-19-malaysia', 'henryz00/COVID-19-Timeline-Data-Visualizer', 'seandavi/sars2pack', 'USCOVIDpolicy/COVID-19-US-State-Policy-Database', 'epiforecasts/EpiNow2', 'nevrome/covid19germany', 'ivanMSC/COVID19_Chile', 'ajsanjoaquin/COVID-19-Scanner', 'frankkramer-lab/covid19.MIScnn', 'arpanmangal/CovidAID', 'petroniocandido/COVID19_AgentBasedSimulation', 'alext234/coronavirus-stats', 'dsfsi/covid19africa', 'dnaeon/cl-covid19', 'v7labs/covid-19-xray-dataset', 'sledilnik/website', 'rohanrao619/Social_Distancing_with_AI', 'schnitzel4/Covid-19-Formatter', 'IvanHornung/Pandemic-Simulator', 'elhenrico/covid19-Brazil-timeseries', 'TechCiel/jlu-health-reporter', 'K-G-PRAJWAL/Python-Projects', 'philipptrenz/covidpass', 'nf-core/viralrecon', 'theleadio/corona-frontend', 'TeamTigers/coronainfobd', 'sushrut111/cowin-automation-extn', 'neherlab/covid19_scenarios_data', 'Minghou-Lei/COVID-19-historical-data-visualization-2019-nCoV-', 'tirthajyoti/Covid-19-analysis', 'vmarcosp/covidbr-app', 'MouadBH/coronapy-cli', 'openCACAO/cocoa-documentation', 'KubraTurker/Social_Distancing-CV', 'brentjackson/OpenRespirator', 'ue/neleryasak', 'LeninGangwal/Big-Basket-Delivery-Slots', 'nasa-jpl-memex/GeoParser', 'Karan-Malik/FaceMaskDetector', 'HankiDesign/Remote-Work-and-Study-Resources', 'sibalzer/impfbot', 'antonin-lfv/simulation_virus_covid-19', 'picklejason/coronavirus-bot', 'jmcastagnetto/covid-19-peru-data', 'livgust/macovidvaccines.com', 'ahmednafies/covid', 'noobcoder17/covid-19', 'Kyald1412/CoronaVirus-2019-nCoV-Live-Tracking', 'a01sa01to/covid19-ibaraki', 'railslove/rcvr-app', 'opencovid-19/main', 'eknoes/covidbot', 'rivas-lab/covid19', 'appliedbinf/covid19-event-risk-planner', 'TjFish/COVID-19-Dashboard', 'yahoo/covid-19-api', 'kike-canaries/canairio_firmware', 'eebrown/data2019nCoV', 'OpenMined/covid-alert', 'bumbeishvili/coronavirus.davidb.dev', 'ImpulsoGov/farolcovid', 'cdmoro/covid-19-stats', 'girlscript-blr/code-with-girlscript-bangalore', 'Yoctol/COVID-19-bot', 'jabardigitalservice/pikobar-jabarprov-go-id', 'adamevers/us-covid19', 'BaseMax/CoronaVirusDatabase', 'bumbeishvili/covid19-daily-data', 'mukireus/flutter_covid_19_tracker', 'Keyes/its-beds-widget', 'stefancrain/folding-at-home', 'ulklc/covid19-timeseries', 'codingCoffee/fahclient', 'covid19cuba/covid19cuba-app', 'code4romania/covid-19-date-la-zi', 'clawfire/covid19-passbook-generator', 'ShahinSHH/COVID-CAPS', 'Covid-19-Response-Greece/covid19-greece-api', 'ankithans/Covid-19-Tracker', 'mariorz/covid19-mx-time-series', 'HDRUK/covid-19', 'VinAIResearch/PhoNER_COVID19', 'deadskull7/One-Stop-for-COVID-19-Infection-and-Lung-Segmentation-plus-Classification', 'mhmzdev/Covid19-Tracker-App', 'immuni-app/immuni-backend-otp', 'coughresearch/Cough-signal-processing', 'pyk/covid19-resources', 'leaf-ai/covid-xprize', 'armiro/COVID-CXNet', 'xyjigsaw/COVID19-KBQA-DEMO', 'aydinnyunus/COVID-19-DETECTION', 'yahoo/covid-19-dashboard', 'hernanmd/COVID-19-train-audio', 'florianzemma/CoronavirusAPI-France', 'iamroshanpoudel/BOTVID-19', 'pearmini/ncovis-2020', 'shopwareDowntown/downtown', 'mmphego/face_mask_detection_openvino', 'fnielsen/awesome-covid-19-resources', 'Lurkars/esp-ena', 'iorestoacasa-work/iorestoacasa.work', 'Russell-Pollari/ontario-covid19', 'capyvara/brazil-civil-registry-data', 'atrinh0/covid19', 'mr7495/COVID-CT-Code', 'SolaceLabs/covid19-stream-processors', 'immuni-app/immuni-backend-exposure-ingestion', 'robsonsilv4/covid19_statistics', 'solrachix/covid-19-monitor', 'longbiaochen/corona-virus', 'ml-workgroup/covid-19-image-repository', 'ravelinodecastro/covid-19-ao-api', 'dathere/covid19-time-series-utilities', 'PlusLabNLP/GEANet-BioMed-Event-Extraction', 'Hina-softwareEngineer/Covid_19_tracker', 'emreyh/kolonya', 'tutorbookapp/tutorbook', 'frontendwizard/mapadocovid19.com.br', 'PrinceSumberia/covid-19-tracker', 'jeffcore/covid-19-usa-by-state', 'immunomind/covid19', 'gadenbuie/covid19-florida', 'africa-covid-19-response-toolkit/internal-dashboard', 'hnordt/covid', 'vita-epfl/monstereo', 'richardkeep/covid-19', 'imdevskp/covid-19-india-data', 'oscovida/oscovida', 'kmetz/coro2sens', 'VictorLin000/YOLOv3_mask_detect', 'jarvislin/drugstores', 'ApturiCOVID/apturicovid-android', 'arnoudbuzing/wolfram-coronavirus', '11fenil11/Covid19-Detection-Using-Chest-X-Ray', 'juancri/covid19-animation-generator', 'nztm/Yobikake', 'andrewthong/covid19tracker-api', 'eladcn/coronavirus_prediction', 'LeeonardoVargas/fila-da-vacina', 'vaticle/biograkn-covid', 'ongov/covid-19-self-assessment', 'kausaltech/reina-model', 'Covid-19Radar/Covid19Radar', 'gabrielcesar/covid-br', 'Western-Health-Covid19-Collaboration/wh_covid19_app', 'immuni-app/immuni-backend-exposure-reporting', 'thunlp/COVID19-IRQA', 'hdehal/job-search-resources', 'ISTESRMNCR/CODE-CAMP-2020', 'ahmedsadman/covid19-bd', 'mattkerlogue/google-covid-mobility-scrape', 'sarthakpranesh/Covid19', 'alexamici/covid-19-notebooks', 'velebit-ai/COVID-Next-Pytorch', 'KhanShaheb34/Co-ronaBD.info', 'vinitshahdeo/covid19api', 'DineshNeupane/nCOVIDroid', 'Aman9026/Predict-COVID-19', 'dongfang-steven-yang/social-distancing-monitoring', 'covid19-group/c19', 'Code-for-All/lockdown', 'saimj7/Social-Distancing-Detection-in-Real-Time', 'hyubs/ncovph', 'Alplox/tele', 'junhoyeo/self-check-automation', 'britishredcrosssociety/covid-19-vulnerability', 'epiforecasts/covidregionaldata', 'daniel-karl/covid19-map', 'chasewnelson/Taiwan-COVID-19-2021', 'anamritraj/livecovid.in-webapp', 'loft-br/realtime_r0_brazil', 'covid19kg/covid19kg', 'rayarindam2111/Co-WIN-automated-slot-booking', 'theamrzaki/COVID-19-BERT-ResearchPapers-Semantic-Search', 'dhhruv/Vac-Cowin', 'codedawi/covid19-badges', 'anu-rock/hello-deno', 'InstituteforDiseaseModeling/synthpops', 'obrassard/shc-extractor', '3dgiordano/covid-19-uy-vacc-data', 'epiforecasts/covid-rt-estimates', 'helloworldkr/Bluetooth-ble-beamer-and-scanner-for-tracing-corona-virus-infected-individual', 'o4oren/meh-AH', 'hritik5102/Tata_Innoverse_SolverHunt8', 'ashiishme/covid-stats', 'LK-LAB/SARS2-Stat-KR', 'nicebread/corona', 'coronasafe/kerala-dashboard', 'rohitanil/cowin-slot-tracker', 'piedcipher/nCovid19-tracker', 'metalcorebear/COVID-Agent-Based-Model', 'satyawikananda/rs-bed-covid-indo-api', 'atapas/covid-19', 'ManuelB/covid-19-vis', 'micheleriva/coronablocker', 'dakula009/China_CoronaVirus_Data_Miner', 'nite/covid-19', 'grausof/iorestoacasa', 'pennsignals/chime_sims', 'civictechzenchiba/covid19-chiba', 'nyanlynntherazi/awesome-myanmar-covid19-resources', 'Big-Life-Lab/ODM', 'shreshthtuli/covid-19-prediction', 'jmcastagnetto/covid-19-data-cleanup', 'italia/covid19-dashboard-vaccini', 'ailabstw/COVID19-taiwan', 'cinemast/covid19-at', 'kracekumar/facetouch', 'tommasobonomo/covid19-italy', 'ImisDevelopers/1_011_a_infektionsfall_uebermittellung', 'ministero-salute/it-dgc-verificaC19-android', 'PresentIDco/Face-Mask-Detection', 'COVID-19-AI-Research-Project/AI-Classification', 'Marwan01/covid-helpline', 'sfbrigade/stop-covid19-sfbayarea', 'swaraj961/Covid-19', 'nyukat/COVID-19_prognosis', 'MolSSI/covid', 'coronasafe/india-maps', 'shaileshaanand/vaccine-alarm', 'gabrielpreda/covid-19-tweets', 'Leko/data-jp-covid19-vaccination', 'HuidaeCho/covid-19', 'sutanlab/covid19-visualized', 'martinwoodward/covid-19-projects', 'SimoneTinella/Stato_COVID19_Italia_Android', 'nzherald/nz-covid19-data', 'mrsaeeddev/react-covid-hooks', 'asreview/asreview-covid19', 'xtrp/Coronavirus-Live-Monitor', 'kerlos/thai-covid19-discord-bot', 'armsp/covidviz', 'thomasdubdub/covid-france', 'DerLobi/impfdashboard-scriptable-widget', 'hollobit/COVID-19-AI', 'sunishsurendrank/COVID19Dashboard', 'ArroyoAndre/covidsimulation', 'arkhn/FHIR2Dataset', 'thelittlewonder/covid-19indiatracker', 'coronasafe/awareness', 'ct-report/summary', 'HrithikMittal/COVID19-India-API', 'zeyu2001/quarantine-bot', 'danqing/covid19', 'alexandrumeterez/covidtracer', 'seananderson/covidseir', 'emreesen27/CoronaApp', 'jvkumar/delivery-finder', 'SeanNaren/CORD-19-ANN', 'cao-zha/caozha-cepcs', 'ito-org/android-app', 'gabrielpreda/Kaggle', 'mbauman/CovidCountyDash.jl', 'cipriancraciun/covid19-datasets', 'pvieito/Radar-STATS', 'kreativzirkel/coronika', 'codingedward/ailing-planet', 'covid-maps/covid-maps', 'getspooky/Jibli', 'atecon/covid_19_forecast', 'ayu023ban/covid-vaccine-tracker', 'Code4PuertoRico/covid19-pr-api', 'funcional-health-analytics/covid19-analytics', 'danieljcode/COVID-19tracker', 'KFFData/COVID-19-Data', 'BaseMax/CoronaVirusOutbreakAPI', 'kargig/covid19-gr-json', 'abhijithneilabraham/Covid-QA', 'MainakRepositor/Covid19-India-BCR', 'zeroday0619/COVID-19API', 'jsfenfen/covid_hospitals_demographics', 'MainakRepositor/Covidview', 'amazingshellyyy/covid19-api', 'iidx/corona-tracker', 'covid19-modeling/pyncov-19', 'developers-cosmos/COVID-Race-Game', 'OBrunoVieira/Covid-19-Android', 'robert-koch-institut/SARS-CoV-2-Nowcasting_und_-R-Schaetzung', 'javierlopeza/covid19entucomuna', 'tyleryasaka/TrackCOVID', 'joyqi/ncov2019', 'robert-koch-institut/SARS-CoV-2_Infektionen_in_Deutschland', 'Bost/corona_cases', 'LucaDiba/epidemic-simulator', 'joogps/Corona-Widget', 'helpfulengineering/free-for-covid', 'theheraldproject/herald-for-android', 'COMOKIT/COMOKIT-Model', 'marlon360/covid-ar', 'theheraldproject/herald-for-ios', 'adityanjr/covid19-tracker', 'entorb/COVID-19-Coronavirus-German-Regions', 'folkehelseinstituttet/surveillance_data', 'aparajitad60/Stacked-LSTM-for-Covid-19-Outbreak-Prediction', 'CodeandoMexico/covid-estados', 'ChenWWWeixiang/diagnosis_covid19', 'krishnapriya-18/COVID-19-Tweet-Classification-using-Roberta-and-Bert-Simple-Transformers', 'jdieg0/coronavirus-dresden', 'msaaddev/COVID-19-STAT', 'coreyward/takeout-tracker-web', 'khanfarhan10/VaccineAvailabilityNotifier', 'code4romania/covid-19-ce-trebuie-sa-fac', 'dtandev/coronavirus', 'kalyaniuniversity/COVID-19-Datasets', 'JerryWei03/COVID-Q', 'hanszhang00/Pandemic-Produce-Delivery-Project', 'renanbastos93/alertcovid19', 'xrths/COVID19_FR', 'LeafyCode/survive-together-web', 'WeileiZeng/red-cross', 'afsalashyana/Covid19-Desktop-Widget', 'dmitriy-chernysh/covid-19-tracker-android', 'Covid19-GraphQL/covid-graph-graphql', 'vector-engineering/covidcg', 'PetoLau/CoronaDash', 'inf-covid19/data', 'Simperfy/Covid-19-API-Philippines-DOH', 'sabesansathananthan/covid-19-tracker', 'COVID19-SARS-CoV-2/web-covid-api', 'SamBelkacem/COVID19-Algeria-and-World-Dataset', 'GeneralBlockchain/covid-19-chest-xray-segmentations-dataset', 'alexisthual/symptoms-tracker', 'kasramp/COVID-19-Telegram-bot', 'covid19india/eConsult', 'Entea/covid-supply-info', 'dakshp07/COVID19-app', 'fiqryq/Pantaucovid-android', 'codeKgu/BiLevel-Graph-Neural-Network', 'foss-responders/fossresponders.com', 'coughresearch/Cough-data', 'rovin-ms/covid19', 'brookmg/CovidAndroid', 'manekinekko/digital-covid-certificate-decoder', 'jabardigitalservice/pikobar-pelaporan-backend', 'davidbau/covid-19-chart', 'IbrahimSobh/kaggle-COVID19-Classification', 'MarcoBuster/quanto-manca', 'Trinityyi/COVID-19-Greece', 'ladybug-tools/spider-covid-19-viz-3d', 'scc-usc/ReCOVER-COVID-19', 'mexicovid19/Mexico-datos', 'ChenWWWeixiang/OpenCovidDetector', 'DrozmotiX/ioBroker.coronavirus-statistics', 'iammukeshm/COVID19.Tracker', 'mongodb-developer/open-data-covid-19', 'ghuniyu/sekitarkita-backend', 'covid-19-Re/shiny-dailyRe', 'AntoineSoetewey/coronavirus_dashboard', 'covidtrace/app', 'FedericoGarza/covidmx', 'code-for-chapel-hill/NC-COVID-Support', 'kirananto/SupplyInfo', 'minvws/nl-covid19-notification-app-community-website', 'smakosh/covid-19-next', 'araavp/instacart-delivery-slot-finder', 'TCTD-IIT-Bombay/reBreather', '31Carlton7/flutter_news_app', 'RespiradorHacker/Projeto-EAR-Celso', 'carlaiau/flatten-the-curve', 'cotect/cotect', 'MuttakinHasib/react-covid', 'Mayurji/Social-DIstancing-Using-Deep-Learning-and-OpenCV', 'corona-zahlen-landkreis/corona_landkreis_fallzahlen_scraping', 'ccodwg/Covid19CanadaArchive', 'AlexTS1980/COVID-CT-Mask-Net', 'alphamodel/COVID-19-SG', 'AlexSWong/COVID-Net', 'nrc-cnrc/COVID-US', 'AlaeddineMessadi/COVID-19-REPORT-API', 'iamrohitsuthar/gocoronago', 'omic/jailbreak', 'pararang/vue-covid', 'bcunning/CoronaViz', 'VirusTrack/COVIDvu', 'kwasniew/covid.reports', 'mdipietro09/App_VirusForecaster', 'neelavar/map-covid-19', 'hungrxyz/Infected', 'raunit-x/Atlassian-Hackathon-Covid-19', 'kbobrowski/en-i13n', 'Jalgaon-CoHelp/api-service', 'keyamedical/covid-19', 'priyavrat-misra/xrays-and-gradcam', 'wp-xyz/corona', 'emreesen27/Covid-19-Flutter', 'thoth-tw/covid-19', 'gireeshkbogu/AnomalyDetect', 'Nabilphysics/ventilator', 'rekalantar/covid19_detector', 'Mastersam07/ncovid-19-api', 'wuhan-support/dataset', 'Sayar1106/covid-dashboard', 'mew/Coronavirus', 'traffordDataLab/covid-19', 'luvi/caricovidsite', 'camasscioly/covidheroes.net', 'Tele-Bots/CovidBot', 'MishcondeReya/Covid-19-CTI', 'matheushent/covid-19-detector', 'briancpark/COVID-19-Visualizations', 'HFAnalyticsLab/COVID19_Resources', 'myhelix/helix-covid19db', 'chk2817/covid-19-curves', 'thohan88/covid19-nor-data', 'soroushchehresa/cli-corona', 'InstituteforDiseaseModeling/COVID-public', 'MaZderMind/cwa-qr', 'vitordino/covid-br', 'Quintessential-SFT/Covid-19-API', 'LeonidasEsteban/covid-19-map', 'eellak/covid19-open', 'not-a-feature/impfWidget', 'decentralized-identity/c19-vc.com', 'code4romania/covid-19-jurnal-medical', 'COVID-19-MA/Tayssir', 'RespiradorHacker/camara-descontaminacao-ar', 'lightonai/newma-md', 'match4everyone/match4healthcare', 'iqrafatimame/COVID-19', 'tejzpr/busy', 'wuhan-support/frontend', 'sbl-sdsc/coronavirus-knowledge-graph', 'thevaccinetracker/thevaccinetracker', 'LucaAngioloni/fit-COVID19', 'dpereira/es-covid19-br', 'perone/covid19analysis', 'shieldfy/remote-startup-handbook-covid19', 'paroj/arewedeadyet', 'matsim-org/matsim-episim-libs']
\ No newline at end of file
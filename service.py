@@ -0,0 +1,193 @@
+'''
+A long-running README language prediction service.
+
+The fitted vectorizer and model are loaded once and kept warm in memory,
+then served through a Python API and a local HTTP/JSON endpoint.
+
+Run from the command line:
+    python service.py --port 8000
+
+Then POST a README, or the URL of one, to it:
+    curl -d '{"readme": "# My project ..."}' http://127.0.0.1:8000/predict
+    curl -d '{"url": "https://raw.githubusercontent.com/..."}' \
+        http://127.0.0.1:8000/predict
+
+Predictions are cached by README content and model version, and URLs by
+their ETag; GET /stats returns the cache's hits, misses and latency.
+'''
+
+
+# import standard libraries
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# import prediction functions
+from predict import load_pruned_model, predict_readme
+from prediction_cache import PredictionCache
+
+
+class PredictionService:
+    '''
+    Holds a fitted tfidf vectorizer and model in memory and predicts the
+    programming language of README texts, caching up to cache_size
+    predictions in memory, and in the SQLite file cache_path when given;
+    a cache_size of 0 turns the cache off
+    '''
+
+    def __init__(self, tfidf_path='tfidf.pickle', model_path='model.pickle',
+                 cache_size=10_000, cache_path=None, cache_ttl=None):
+        self.tfidf, self.model = load_pruned_model(tfidf_path, model_path)
+        self.cache = None
+        if cache_size:
+            self.cache = PredictionCache(cache_path, cache_size, cache_ttl,
+                                         tfidf_path, model_path)
+        # warm the lazily loaded nltk corpora before serving any thread
+        self.predict('warm up the service')
+
+    def predict(self, readme):
+        '''
+        Takes README text and returns a dict of the predicted language and
+        its probability
+        '''
+
+        if self.cache is not None:
+            lang, prob = self.cache.predict(readme)
+        else:
+            lang, prob = predict_readme(readme, self.tfidf, self.model)
+
+        return {'language': lang, 'probability': float(prob)}
+
+    def predict_url(self, readme_url):
+        '''
+        Takes the URL of a README and returns a dict of the predicted
+        language and its probability
+        '''
+
+        if self.cache is not None:
+            lang, prob = self.cache.predict_url(readme_url)
+        else:
+            import requests
+            response = requests.get(str(readme_url), timeout=30)
+            response.raise_for_status()
+            lang, prob = predict_readme(response.text, self.tfidf, self.model)
+
+        return {'language': lang, 'probability': float(prob)}
+
+    def stats(self):
+        '''
+        Returns a dict of the prediction cache's counters and latency
+        '''
+
+        return {} if self.cache is None else self.cache.summary()
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    '''
+    Serves POST /predict with a JSON body of {"readme": text} or
+    {"url": readme_url}, GET /health and GET /stats, answering in JSON
+    '''
+
+    service = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok'})
+        elif self.path == '/stats':
+            self._send(200, self.service.stats())
+        else:
+            self._send(404, {'error': f'unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send(404, {'error': f'unknown path {self.path}'})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length))
+            url = body.get('url')
+            readme = body['readme'] if url is None else None
+            # null, numbers and lists are neither a README nor a url
+            if not isinstance(url if url is not None else readme, str):
+                raise TypeError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self._send(400, {'error': 'expected a JSON body {"readme": text} '
+                                      'or {"url": readme_url}'})
+            return
+        try:
+            if url is None:
+                prediction = self.service.predict(readme)
+            else:
+                prediction = self.service.predict_url(url)
+        # requests raises its connection and http errors as OSError
+        except OSError as e:
+            if url is None:
+                self._send(500, {'error': f'prediction failed: {e}'})
+            else:
+                self._send(502, {'error': f'could not fetch {url}: {e}'})
+            return
+        # answer every other failure rather than dropping the connection
+        except Exception as e:
+            self._send(500, {'error': f'prediction failed: {e}'})
+            return
+        self._send(200, prediction)
+
+    def _send(self, status, body):
+        body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(service, host='127.0.0.1', port=8000):
+    '''
+    Returns a threaded HTTP server answering predictions from service;
+    pass port 0 to bind any free port
+    '''
+
+    handler = type('Handler', (PredictionHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    return server
+
+
+def start_server(service, host='127.0.0.1', port=0):
+    '''
+    Starts a prediction server in a daemon thread and returns the server
+    and its base url
+    '''
+
+    server = make_server(service, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    return server, f'http://{host}:{server.server_port}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Serve README language predictions over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--tfidf', default='tfidf.pickle')
+    parser.add_argument('--model', default='model.pickle')
+    parser.add_argument('--cache-size', type=int, default=10_000,
+                        help='predictions kept in memory, 0 for no cache')
+    parser.add_argument('--cache', metavar='SQLITE',
+                        help='SQLite file keeping predictions between runs')
+    parser.add_argument('--cache-ttl', type=float,
+                        help='seconds before a cached prediction expires')
+    args = parser.parse_args()
+    service = PredictionService(args.tfidf, args.model, args.cache_size,
+                                args.cache, args.cache_ttl)
+    server = make_server(service, args.host, args.port)
+    print(f'Serving predictions on http://{args.host}:{server.server_port}')
+    server.serve_forever()
@@ -0,0 +1,353 @@
+'''
+Top-k "similar repositories" search over the tf-idf space.
+
+The index holds the L2-normalized tf-idf vector of every prepared README
+as a CSR matrix, one row per repo, and the same matrix transposed as
+postings, one row per term listing the repos that use it. The cosine
+similarity of a query and every repo is then a sparse product:
+
+    search       - one README; the repos sharing its rarest terms give a
+                   lower bound on the k-th score, the terms that can add
+                   the most are read until the rest cannot lift another
+                   repo past it, and only the repos within reach are
+                   scored with every term
+    search_batch - many READMEs, each searched that way, or with
+                   pruned=False blocks of queries multiplied with the
+                   postings and the top k of each row kept
+
+Both return the exact top k. The index is saved as .npy arrays that
+load_index memory maps, so opening it costs little at any size.
+
+    build_github_index()
+    load_index().search(readme, k=10)
+'''
+
+
+# import standard libraries
+import json
+import os
+import pickle
+
+# import data tools
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+# import memory-mapped matrix storage
+from features import load_csr, save_csr
+
+
+INDEX_DIR = 'similarity_index'
+
+
+#################### Top k ####################
+
+
+def _top_k(scores, k):
+    '''
+    Returns the positions of the k largest scores, largest first, ties
+    in position order
+    '''
+
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+
+    return top[np.lexsort((top, -scores[top]))]
+
+
+def _pad(docs, scores, k):
+    '''
+    Returns docs and scores padded to length k with -1 and 0
+    '''
+
+    n = k - len(docs)
+
+    return (np.r_[docs, np.full(n, -1, dtype=np.int64)],
+            np.r_[scores, np.zeros(n, dtype=np.float32)])
+
+
+#################### Index ####################
+
+
+class SimilarityIndex:
+    '''
+    Top-k cosine search over the tf-idf vectors of the indexed repos.
+
+    docs is the (repos, terms) CSR matrix of L2-normalized tf-idf
+    vectors, ids and languages hold the repo name and programming
+    language of each row, and vectorizer is the fitted tfidf that turns
+    queries into vectors.
+    '''
+
+    def __init__(self, docs, ids, languages, vectorizer, postings=None,
+                 max_weight=None):
+        self.docs = docs
+        self.ids = ids
+        self.languages = languages
+        self.vectorizer = vectorizer
+        # the postings of a term are the column of docs, as a CSR row
+        self.postings = docs.T.tocsr() if postings is None else postings
+        if max_weight is None:
+            max_weight = self.postings.max(axis=1).toarray().ravel()
+        self.max_weight = max_weight
+
+    def __len__(self):
+        return self.docs.shape[0]
+
+    def vectorize(self, texts, clean=True):
+        '''
+        Takes a list of README texts and returns their L2-normalized
+        float32 tf-idf CSR matrix, cleaning them the way predict does
+        unless clean is False
+        '''
+
+        if clean:
+            from predict import clean_readme
+            texts = [clean_readme(text) for text in texts]
+
+        return normalize(self.vectorizer.transform(texts)).astype(np.float32)
+
+    def top_k_pruned(self, q, k=10, seeds=256, slack=0.8, max_work=0.2):
+        '''
+        Takes a one row query matrix and returns arrays of the k most
+        similar repo rows and their scores. The repos sharing the query's
+        rarest, strongest terms, at least seeds postings of them, are
+        scored exactly, and the k-th best of those is a lower bound on the
+        final k-th score. Query terms are then added in order of the most
+        they can add until the terms left could add less than slack of
+        that bound, and only the repos whose partial score leaves them
+        within reach are scored exactly. When that would read more than
+        max_work of the query's postings, or score more repos than the
+        postings left hold, every repo is scored from all the query's
+        postings instead
+        '''
+
+        # the most each term can add to any repo's score, largest first
+        bounds = q.data * self.max_weight[q.indices]
+        order = np.argsort(-bounds, kind='stable')
+        terms, weights = q.indices[order], q.data[order]
+        # left[i] is the most the terms after the first i can add: the sum
+        # of their bounds, or, as repo vectors have unit length, the norm
+        # of the query over those terms (Cauchy-Schwarz)
+        tail = np.cumsum(bounds[order][::-1])[::-1]
+        norm = np.sqrt(np.cumsum((weights ** 2)[::-1])[::-1])
+        left = np.r_[np.minimum(tail, norm), 0]
+        # postings read to score the first i terms
+        indptr, indices = self.postings.indptr, self.postings.indices
+        work = np.r_[0, np.cumsum(indptr[terms + 1] - indptr[terms])]
+        budget = max_work * work[-1]
+        # a dense query scores rows with one sparse matrix-vector product
+        dense = np.zeros(q.shape[1], dtype=np.float32)
+        dense[q.indices] = q.data
+        head = min(max(int(np.searchsorted(work, seeds)), 1), len(terms))
+        if len(terms) and work[head] <= budget:
+            seeded = np.unique(np.concatenate(
+                [indices[indptr[t]:indptr[t + 1]] for t in terms[:head]]))
+            exact = self.docs[seeded] @ dense
+            kth = np.partition(exact, len(exact) - k)[-k] \
+                if len(exact) >= k else 0
+            cut = int(np.argmax(left < slack * kth))
+            if kth > 0 and work[cut] <= budget:
+                partial = self.scatter(terms[:cut], weights[:cut])
+                # repos below this cannot reach the k-th score, so the
+                # threshold is above 0 and rules out repos not touched
+                candidates = np.flatnonzero(partial >= kth - left[cut])
+                row_nnz = self.docs.nnz / len(self)
+                if len(candidates) * row_nnz <= work[-1] - work[cut]:
+                    exact = self.docs[candidates] @ dense
+                    top = _top_k(exact, k)
+                    return _pad(candidates[top], exact[top], k)
+        scores = self.scatter(q.indices, q.data)
+        top = _top_k(scores, k)
+        # repos sharing no term are not results
+        top = top[scores[top] > 0]
+
+        return _pad(top, scores[top], k)
+
+    def scatter(self, terms, weights):
+        '''
+        Takes arrays of term columns and their query weights and returns
+        the float32 array of every repo's score over those terms, reading
+        only their postings
+        '''
+
+        # the postings rows transposed are a CSC matrix, whose product with
+        # a dense vector adds each term's postings into one dense array
+        return self.postings[terms].T @ weights
+
+    def top_k_blocked(self, Q, k=10, block_size=256, max_nnz=2**24):
+        '''
+        Takes a query matrix and returns (queries, k) arrays of the most
+        similar repo rows and their scores, multiplying blocks of up to
+        block_size queries with the postings; a block stops growing once
+        its product could hold max_nnz scores, which bounds its memory
+        '''
+
+        docs = np.full((Q.shape[0], k), -1, dtype=np.int64)
+        scores = np.zeros((Q.shape[0], k), dtype=np.float32)
+        # the most repos each query can score: its terms' postings
+        lengths = np.diff(self.postings.indptr).astype(np.float64)
+        costs = np.minimum(Q.astype(bool).astype(np.float64) @ lengths,
+                           len(self))
+        start = 0
+        while start < Q.shape[0]:
+            stop = start + 1
+            total = costs[start]
+            while (stop < Q.shape[0] and stop - start < block_size
+                   and total + costs[stop] <= max_nnz):
+                total += costs[stop]
+                stop += 1
+            block = (Q[start:stop] @ self.postings).tocsr()
+            for i in range(block.shape[0]):
+                row = slice(block.indptr[i], block.indptr[i + 1])
+                top = _top_k(block.data[row], k)
+                docs[start + i], scores[start + i] = _pad(
+                    block.indices[row][top], block.data[row][top], k)
+            start = stop
+
+        return docs, scores
+
+    def _results(self, docs, scores, query=None):
+        '''
+        Returns a DataFrame of the repos of the found rows and their scores
+        '''
+
+        import pandas as pd
+
+        found = docs >= 0
+        df = pd.DataFrame({'repository': self.ids[docs[found]],
+                           'programming_language':
+                               self.languages[docs[found]],
+                           'score': scores[found]})
+        if query is not None:
+            df.insert(0, 'query', query[found])
+
+        return df
+
+    def search(self, readme, k=10, clean=True):
+        '''
+        Takes README text and returns a DataFrame of the k most similar
+        repos, their programming language and cosine similarity
+        '''
+
+        docs, scores = self.top_k_pruned(self.vectorize([readme], clean), k)
+
+        return self._results(docs, scores)
+
+    def search_batch(self, readmes, k=10, clean=True, pruned=True,
+                     block_size=256, max_nnz=2**24):
+        '''
+        Takes a list of README texts and returns a DataFrame of the k most
+        similar repos of each, numbered by the query column. Each query is
+        pruned on its own unless pruned is False, when blocks of queries
+        are multiplied with the postings instead
+        '''
+
+        Q = self.vectorize(readmes, clean)
+        if pruned:
+            found = [self.top_k_pruned(Q[i], k) for i in range(Q.shape[0])]
+            docs = np.array([d for d, _ in found], dtype=np.int64)
+            scores = np.array([s for _, s in found], dtype=np.float32)
+        else:
+            docs, scores = self.top_k_blocked(Q, k, block_size, max_nnz)
+        query = np.repeat(np.arange(len(readmes)), k)
+
+        return self._results(docs.ravel(), scores.ravel(), query)
+
+    def save(self, path=INDEX_DIR):
+        '''
+        Saves the index under the directory path as .npy arrays and the
+        pickled vectorizer
+        '''
+
+        os.makedirs(path, exist_ok=True)
+        save_csr(self.docs, os.path.join(path, 'docs'))
+        save_csr(self.postings, os.path.join(path, 'postings'))
+        np.save(os.path.join(path, 'max_weight.npy'), self.max_weight)
+        np.save(os.path.join(path, 'ids.npy'), self.ids.astype(str))
+        np.save(os.path.join(path, 'languages.npy'),
+                self.languages.astype(str))
+        with open(os.path.join(path, 'vectorizer.pickle'), 'wb') as f:
+            pickle.dump(self.vectorizer, f)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'repos': len(self), 'terms': self.docs.shape[1],
+                       'nnz': int(self.docs.nnz)}, f)
+
+
+#################### Building and Loading ####################
+
+
+def build_index(df, tfidf, column='lemmatized_readme',
+                id_column='repository', chunk_size=100_000):
+    '''
+    Takes the prepared repos DataFrame and the fitted tfidf vectorizer and
+    returns a SimilarityIndex of the column texts, vectorized chunk_size
+    rows at a time
+    '''
+
+    # float32 chunks keep the peak memory near the size of the index
+    docs = sp.vstack([normalize(tfidf.transform(df[column].iloc[i:i + chunk_size]))
+                      .astype(np.float32)
+                      for i in range(0, max(len(df), 1), chunk_size)],
+                     format='csr')
+    docs.sort_indices()
+
+    return SimilarityIndex(docs, df[id_column].to_numpy().astype(str),
+                           df.programming_language.to_numpy().astype(str),
+                           tfidf)
+
+
+def load_index(path=INDEX_DIR, mmap_mode='r'):
+    '''
+    Returns the SimilarityIndex saved under path, its arrays memory mapped
+    read-only by default
+    '''
+
+    with open(os.path.join(path, 'vectorizer.pickle'), 'rb') as f:
+        vectorizer = pickle.load(f)
+    load = lambda name: np.load(os.path.join(path, f'{name}.npy'),
+                                mmap_mode=mmap_mode)
+
+    return SimilarityIndex(load_csr(os.path.join(path, 'docs'), mmap_mode),
+                           load('ids'), load('languages'), vectorizer,
+                           load_csr(os.path.join(path, 'postings'), mmap_mode),
+                           load('max_weight'))
+
+
+def build_github_index(tfidf_path='tfidf.pickle', path=INDEX_DIR):
+    '''
+    Builds the index of the prepared repos with the fitted vectorizer of
+    tfidf_path, saves it under path and returns it
+    '''
+
+    from wrangle import open_repos
+
+    df = open_repos(columns=['repository', 'lemmatized_readme',
+                             'programming_language'])
+    with open(tfidf_path, 'rb') as f:
+        tfidf = pickle.load(f)
+    index = build_index(df, tfidf)
+    index.save(path)
+
+    return index
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Find the indexed repos most similar to a README')
+    parser.add_argument('readme', nargs='?',
+                        help='README file to search with')
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--build', action='store_true',
+                        help='build the index from the prepared repos first')
+    parser.add_argument('--index', default=INDEX_DIR)
+    args = parser.parse_args()
+    index = build_github_index(path=args.index) if args.build \
+        else load_index(args.index)
+    if args.readme:
+        with open(args.readme) as f:
+            print(index.search(f.read(), k=args.k).to_string(index=False))
@@ -0,0 +1,151 @@
+'''
+A content-hash cache for the stages of the wrangle pipeline.
+
+Each stage output is stored under a key hashed from the stage's input data,
+its source code, the source of the modules it depends on and its parameters,
+so changing any of them recomputes that stage and every stage after it while
+unchanged stages are read back from disk.
+'''
+
+
+# import standard libraries
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+
+# pandas and pyarrow are imported by the functions that use them, so
+# importing this module (and wrangle, which imports it) stays fast
+
+
+CACHE_DIR = '.stage_cache'
+# stage keyword arguments that change how, not what, a stage computes
+EXECUTION_PARAMS = ('n_jobs', 'verbose')
+
+# hits, misses and time saved since the last reset
+stats = {'hits': 0, 'misses': 0, 'seconds_saved': 0.0}
+
+
+@lru_cache(maxsize=None)
+def has_pyarrow():
+    '''
+    Returns whether pyarrow is installed, without importing it; parquet
+    needs pyarrow, and without it stages are cached as pickles
+    '''
+
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def hash_value(value, digest):
+    '''
+    Updates a hashlib digest with the content of a stage input
+    '''
+
+    # a DataFrame or Series input means pandas is already imported
+    pd = sys.modules.get('pandas')
+    if pd is None:
+        digest.update(repr(value).encode())
+    elif isinstance(value, pd.DataFrame):
+        digest.update(json.dumps([str(c) for c in value.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True)
+                        .values.tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(str(value.name).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True)
+                        .values.tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+def stage_key(func, args=(), kwargs={}, deps=(), files=()):
+    '''
+    Returns the hex digest keying a stage call on its inputs, code,
+    dependencies and parameters
+    '''
+
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(func).encode())
+    for dep in deps:
+        digest.update(inspect.getsource(dep).encode())
+    for path in files:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    for value in args:
+        hash_value(value, digest)
+    for name in sorted(kwargs):
+        if name not in EXECUTION_PARAMS:
+            digest.update(name.encode())
+            hash_value(kwargs[name], digest)
+
+    return digest.hexdigest()
+
+
+def run_stage(func, *args, deps=(), files=(), cache_dir=CACHE_DIR,
+              enabled=True, **kwargs):
+    '''
+    Returns func(*args, **kwargs), a DataFrame, reading it from cache_dir
+    when a previous call had the same key and storing it otherwise.
+
+    deps: modules or functions whose source the stage depends on
+    files: paths of data files the stage reads
+    '''
+
+    if not enabled:
+        return func(*args, **kwargs)
+    key = stage_key(func, args, kwargs, deps, files)
+    name = func.__name__
+    extension = 'parquet' if has_pyarrow() else 'pickle'
+    path = os.path.join(cache_dir, f'{name}-{key[:16]}.{extension}')
+    meta_path = os.path.join(cache_dir, f'{name}-{key[:16]}.json')
+    if os.path.isfile(path) and os.path.isfile(meta_path):
+        import pandas as pd
+
+        start = time.perf_counter()
+        df = (pd.read_parquet(path) if extension == 'parquet'
+              else pd.read_pickle(path))
+        with open(meta_path) as f:
+            computed = json.load(f)['seconds']
+        saved = max(computed - (time.perf_counter() - start), 0.0)
+        stats['hits'] += 1
+        stats['seconds_saved'] += saved
+        print(f'[stage cache] hit  {name:<24} saved {saved:.2f}s')
+        return df
+    start = time.perf_counter()
+    df = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    os.makedirs(cache_dir, exist_ok=True)
+    if extension == 'parquet':
+        df.to_parquet(path)
+    else:
+        df.to_pickle(path)
+    with open(meta_path, 'w') as f:
+        json.dump({'stage': name, 'key': key, 'seconds': seconds,
+                   'rows': len(df)}, f)
+    stats['misses'] += 1
+    print(f'[stage cache] miss {name:<24} took  {seconds:.2f}s')
+
+    return df
+
+
+def report():
+    '''
+    Prints and returns the hits, misses and time saved so far
+    '''
+
+    print(f"[stage cache] {stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['seconds_saved']:.2f}s saved")
+
+    return dict(stats)
+
+
+def reset_stats():
+    '''
+    Sets the hit, miss and time saved counters back to zero
+    '''
+
+    stats.update({'hits': 0, 'misses': 0, 'seconds_saved': 0.0})
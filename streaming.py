@@ -0,0 +1,140 @@
+'''
+Streaming training for corpora that do not fit in memory.
+
+Records are read from a "data2.jsonl" or "data2.json" style file in chunks, each chunk is
+cleaned and featurized with a fixed-size HashingVectorizer, and the
+classifier is trained incrementally with partial_fit. Peak memory depends
+on the chunk size and the number of hashed features, not on the corpus.
+
+Run from the command line:
+    python streaming.py data2.jsonl --classifier sgd
+'''
+
+
+# import standard libraries
+import time
+
+# import data tools
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+
+# import corpus reader and prepare functions
+import prepare as p
+from corpus import RAW_CORPUS, iter_chunks, iter_json_records
+from labels import LANGUAGES
+
+
+def clean_for_model(text):
+    '''
+    Takes original README text and returns it cleaned and lemmatized the
+    way the lemmatized_readme column is prepared
+    '''
+
+    return p.lemmatize(p.normalize_readme(text))
+
+
+def make_vectorizer(n_features=2**18):
+    '''
+    Returns a stateless HashingVectorizer with non-negative l2-normalized
+    output, usable by both MultinomialNB and SGDClassifier
+    '''
+
+    return HashingVectorizer(n_features=n_features, alternate_sign=False,
+                             norm='l2')
+
+
+def make_classifier(name='nb'):
+    '''
+    Returns a partial_fit capable classifier: 'nb' for MultinomialNB or
+    'sgd' for a logistic-loss SGDClassifier
+    '''
+
+    if name == 'nb':
+        return MultinomialNB()
+    if name == 'sgd':
+        return SGDClassifier(loss='log_loss', random_state=19)
+    raise ValueError(f"Unknown classifier {name!r}, expected 'nb' or 'sgd'")
+
+
+def iter_labeled_chunks(path, chunk_size=1000, languages=LANGUAGES,
+                        text_key='readme_contents', label_key='language'):
+    '''
+    Yields tuples of a list of cleaned texts and a list of their language
+    labels for each chunk of records in path, dropping records without
+    text or with a language outside languages
+    '''
+
+    for chunk in iter_chunks(iter_json_records(path), chunk_size):
+        chunk = [record for record in chunk
+                 if record.get(text_key) and record.get(label_key) in languages]
+        if chunk:
+            yield ([clean_for_model(record[text_key]) for record in chunk],
+                   [record[label_key] for record in chunk])
+
+
+def train_streaming(path, classifier='nb', chunk_size=1000,
+                    n_features=2**18, languages=LANGUAGES, verbose=True):
+    '''
+    Trains a classifier on the records of path one chunk at a time and
+    returns the vectorizer, the fitted classifier and a dict of counts
+    and throughput
+    '''
+
+    vectorizer = make_vectorizer(n_features)
+    model = make_classifier(classifier)
+    classes = np.array(sorted(languages))
+    docs = chunks = 0
+    start = time.perf_counter()
+    for texts, labels in iter_labeled_chunks(path, chunk_size, languages):
+        model.partial_fit(vectorizer.transform(texts), labels,
+                          classes=classes)
+        docs += len(texts)
+        chunks += 1
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f'chunk {chunks}: {docs} docs, '
+                  f'{docs / elapsed:.0f} docs/s')
+    elapsed = time.perf_counter() - start
+    stats = {'docs': docs, 'chunks': chunks, 'seconds': elapsed,
+             'docs_per_second': docs / max(elapsed, 1e-9)}
+
+    return vectorizer, model, stats
+
+
+def score_streaming(path, vectorizer, model, chunk_size=1000,
+                    languages=LANGUAGES):
+    '''
+    Returns the accuracy of a streaming-trained model on the records of
+    path, read one chunk at a time
+    '''
+
+    correct = total = 0
+    for texts, labels in iter_labeled_chunks(path, chunk_size, languages):
+        predictions = model.predict(vectorizer.transform(texts))
+        correct += int((predictions == np.array(labels)).sum())
+        total += len(labels)
+
+    return correct / max(total, 1)
+
+
+if __name__ == '__main__':
+    import argparse
+    import pickle
+
+    parser = argparse.ArgumentParser(
+        description='Train a classifier on a README corpus in chunks')
+    parser.add_argument('path', nargs='?', default=RAW_CORPUS)
+    parser.add_argument('--classifier', choices=['nb', 'sgd'], default='nb')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--n-features', type=int, default=2**18)
+    parser.add_argument('--output', default='streaming_model.pickle')
+    args = parser.parse_args()
+    vectorizer, model, stats = train_streaming(args.path, args.classifier,
+                                               args.chunk_size,
+                                               args.n_features)
+    with open(args.output, 'wb') as f:
+        pickle.dump((vectorizer, model), f)
+    print(f"Trained on {stats['docs']} docs in {stats['seconds']:.1f}s, "
+          f"saved to {args.output}")
@@ -2,24 +2,32 @@
 
 
 # import standard libraries
-import numpy as np
 import pandas as pd
-import re
 
 # import file managers
-from os.path import isfile
+from os.path import getmtime, isfile, join
 import pickle
 
 # import data tools
-import json
-from sklearn.model_selection import train_test_split
+import corpus
+from corpus import RAW_CORPUS, find_corpus, read_frame
 
 # import language detector
-from langdetect import detect
+import langfilter
+from langfilter import MAX_CHARS, detect_languages
 
-# import prepare functions
+# import near-duplicate detection
+import dedupe
+
+# import prepare functions and the language registry
 import prepare as p
-from acquire import get_repo_links, scrape_github_data
+import labels
+from labels import LANGUAGES, encode_languages
+# parquet storage needs pyarrow; without it only pickles are written
+from stage_cache import CACHE_DIR, has_pyarrow, report, reset_stats, \
+                        run_stage, stage_key
+from instrument import stage
+import instrument
 
 
 #################### Pickle Data ####################
@@ -51,38 +59,92 @@ def open_pickles(filename):
     return opened_jar
 
 
+#################### Parquet Data ####################
+
+
+def make_parquet(df, filename):
+    '''
+    Takes in a DataFrame and filename as string and writes the DataFrame
+    to "filename.parquet" with pyarrow, uncompressed so that reads of the
+    memory mapped file skip decompression
+    '''
+
+    # write columnar file, keeping the index
+    df.to_parquet(f'{filename}.parquet', engine='pyarrow', index=True,
+                  compression=None)
+
+
+def open_parquet(filename, columns=None, languages=None, memory_map=True):
+    '''
+    Takes in filename as string of a previously written parquet file and
+    returns it as a DataFrame, reading only the passed columns and rows
+    whose programming_language is in languages; the file is memory
+    mapped instead of read into a buffer first
+    '''
+
+    # push the language filter down to the parquet reader
+    filters = None
+    if languages is not None:
+        filters = [('programming_language', 'in', list(languages))]
+    df = pd.read_parquet(f'{filename}.parquet', engine='pyarrow',
+                         columns=columns, filters=filters,
+                         memory_map=memory_map)
+
+    return df
+
+
+def open_repos(columns=None, languages=None):
+    '''
+    Returns the prepared repos DataFrame from "repos.parquet" when it and
+    pyarrow are available and it is not older than "repos.pickle", else
+    from "repos.pickle", with only the passed columns and languages
+    '''
+
+    if has_pyarrow() and isfile('repos.parquet') and \
+            (not isfile('repos.pickle') or
+             getmtime('repos.parquet') >= getmtime('repos.pickle')):
+        return open_parquet('repos', columns=columns, languages=languages)
+    df = open_pickles('repos')
+    if languages is not None:
+        df = df[df.programming_language.isin(languages)]
+    if columns is not None:
+        df = df[columns]
+
+    return df
+
+
 #################### Wrangle Data ####################
 
 
-def open_json_data():
+def open_json_data(path=None, chunk_size=10_000):
     '''
-    Opens "data2.json" containing nested repo and readme data, deletes
-    null entires, and returns a normalized DataFrame
+    Streams the raw corpus, "data2.jsonl" or the older "data2.json" by
+    default, skipping null entries while parsing, and returns a DataFrame
+    built chunk_size records at a time
     '''
     
-    # open data file and load with json
-    repos = open('data2.json')
-    repos = json.load(repos)
-    # remove null entries
-    for i, repo in enumerate(repos):
-        if repo == None:
-            del(repos[i])
-    # normalize nested json data into DataFrame
-    df = pd.json_normalize(repos, errors='ignore')
+    # read the records in chunks, without loading the whole file
+    path = path or find_corpus()
+    df = read_frame(path, chunk_size=chunk_size)
     # drop duplicate observations and nulls
     df = df.drop_duplicates().dropna()
 
     return df
 
 
-def get_english_only(df):
+def get_english_only(df, n_jobs=1, max_chars=MAX_CHARS, verbose=True):
     '''
     Take argument DataFrame and uses langdetect library to only retain
-    English natural language readme files
+    English natural language readme files; obvious English and repeated
+    readmes skip the detector, which sees only the first max_chars
+    characters and runs in n_jobs processes
     '''
     
     # detect natural language of repo
-    df['natural_language'] = df.readme_contents.apply(lambda row: detect(row))
+    df['natural_language'] = detect_languages(df.readme_contents,
+                                              max_chars=max_chars,
+                                              n_jobs=n_jobs,
+                                              verbose=verbose)
     # filter to only Enlish results
     df = df[df.natural_language == 'en']
     
@@ -95,22 +157,9 @@ def remove_code_snippets(df):
     present in the readme before returning DataFrame
     '''
 
-    # remove HTML and markdown code
-    df['cleaned_readme'] = df.readme_contents\
-                    .apply(lambda row: re.sub(r'(\<.+\>)', '', row))
-    df['cleaned_readme'] = df.cleaned_readme\
-                    .apply(lambda row: re.sub(r'!?(\[.+\])(\(.+\))?', '', row))
-    # remove coded spaces and page breaks
-    df['cleaned_readme'] = df.cleaned_readme\
-                    .apply(lambda row: re.sub(r'(\n+)', ' ', row))
-    df['cleaned_readme'] = df.cleaned_readme\
-                    .apply(lambda row: re.sub(r'(&nbsp;+)', '', row))
-    # remove naked hyperlinks
-    df['cleaned_readme'] = df.cleaned_readme\
-                    .apply(lambda row: re.sub(r'http\S+', '', row))
-    # replaced hyphens with spaces
-    df['cleaned_readme'] = df.cleaned_readme\
-                    .apply(lambda row: re.sub(r'-', ' ', row))
+    # remove HTML and markdown code, page breaks, coded spaces, naked
+    # hyperlinks and hyphens with precompiled patterns in one pass per row
+    df['cleaned_readme'] = df.readme_contents.apply(p.strip_markup)
     
     return df
 
@@ -130,6 +179,25 @@ def extensive_clean(df):
     return df
 
 
+def normalize_readmes(df, vectorized=False, n_jobs=1):
+    '''
+    Performs remove_code_snippets and extensive_clean in a single pass
+    per readme and returns DataFrame with the same cleaned_readme column;
+    set vectorized to True to use pandas string methods instead, or
+    n_jobs to spread the rows over that many processes
+    '''
+
+    # strip markup, clean, tokenize and remove stopwords together
+    if vectorized:
+        df['cleaned_readme'] = p.normalize_readme_series(df.readme_contents)
+    else:
+        df['cleaned_readme'] = p.parallel_apply(p.normalize_readme,
+                                                df.readme_contents,
+                                                n_jobs=n_jobs)
+
+    return df
+
+
 def create_char_counts(df):
     '''
     Appends new columns for character counds of original and cleaned
@@ -137,8 +205,8 @@ def create_char_counts(df):
     '''
     
     # create character counts for original and cleaned text
-    df['original_char_length'] = df.readme_contents.apply(lambda row: len(row))
-    df['cleaned_char_length'] = df.cleaned_readme.apply(lambda row: len(row))
+    df['original_char_length'] = df.readme_contents.str.len()
+    df['cleaned_char_length'] = df.cleaned_readme.str.len()
     
     return df
 
@@ -158,67 +226,87 @@ def create_pct_changed(df):
 
 def filter_language(df):
     '''
-    Filters passed DataFrame for only programmining langauges specifed
-    in the below .isin() method
+    Filters passed DataFrame for only the programming langauges in the
+    labels.LANGUAGES registry
     '''
     
     # filter for programming languges with 10 or more
-    df = df[df.language.isin(['Python',
-                              'JavaScript',
-                              'Jupyter Notebook',
-                              'HTML',
-                              'TypeScript',
-                              'R'])]
+    df = df[df.language.isin(LANGUAGES)]
     
     return df
 
 
-def prep_github_repos():
+def prep_github_repos(n_jobs=1, use_cache=False, cache_dir=CACHE_DIR,
+                      near_duplicates=None):
     '''
     Performs several functions to prepare passed DataFrame and its
     columns to contain no HTML/markup, only containg certain
-    programming languages, and only English natural language
+    programming languages, and only English natural language;
+    n_jobs sets the number of processes used for cleaning, and with
+    use_cache the slow stages are stored in and reused from cache_dir
+    while their input data, code and parameters are unchanged;
+    near_duplicates is a similarity threshold above which READMEs are
+    collapsed to their first repo, None keeps them all
     '''
 
+    cache = {'enabled': use_cache, 'cache_dir': cache_dir}
     # load data into DataFrame
-    df = open_json_data()
+    with stage('open_json_data') as s:
+        df = s.output(run_stage(open_json_data, files=[find_corpus()],
+                                deps=[corpus], **cache))
+    # collapse forks and templated READMEs to one repo each
+    if near_duplicates is not None:
+        with stage('drop_near_duplicates', df) as s:
+            df = s.output(run_stage(dedupe.drop_near_duplicates, df,
+                                    threshold=near_duplicates,
+                                    n_jobs=n_jobs, deps=[dedupe], **cache))
     # filter data to only English results
-    df = get_english_only(df)
-    # remove HTML, markdown, etc.
-    df = remove_code_snippets(df)
-    # remove non-ascii chars and stopwords, tokenize
-    df = extensive_clean(df)
+    with stage('get_english_only', df) as s:
+        df = s.output(run_stage(get_english_only, df, n_jobs=n_jobs,
+                                deps=[langfilter, p], **cache))
+    # remove HTML, markdown, non-ascii chars and stopwords, tokenize
+    with stage('normalize_readmes', df) as s:
+        df = s.output(run_stage(normalize_readmes, df, n_jobs=n_jobs,
+                                deps=[p], **cache))
     # create character count columns
-    df = create_char_counts(df)
+    with stage('create_char_counts', df) as s:
+        df = s.output(create_char_counts(df))
     # create percent change column
-    df = create_pct_changed(df)
+    with stage('create_pct_changed', df) as s:
+        df = s.output(create_pct_changed(df))
     # filter for programming languages
-    df = filter_language(df)
+    with stage('filter_language', df) as s:
+        df = s.output(filter_language(df))
 
     return df
 
 
-def polish_github_repos(df):
+def polish_github_repos(df, n_jobs=1):
     '''
     Performs several functions to create new columns on passed
     DataFrame and rename existing columns to more clearly reflect
-    contents
+    contents; n_jobs sets the number of processes used to lemmatize
     '''
 
     # remove cleaned char count outliers
-    df = df[df.cleaned_char_length.isin(
-                p.filter_iqr_outliers(df.cleaned_char_length))]
+    with stage('filter_outliers', df) as s:
+        df = s.output(df[p.iqr_outlier_mask(df.cleaned_char_length)])
     # create lemmatized cleaned column
-    df['lemmatized_readme'] = df.cleaned_readme.apply(p.lemmatize)
+    with stage('lemmatize', df) as s:
+        df['lemmatized_readme'] = p.parallel_apply(p.lemmatize,
+                                                   df.cleaned_readme,
+                                                   n_jobs=n_jobs)
+        s.output(df)
     # order and rename columns for preference
-    cols = ['repo', 'readme_contents', 'cleaned_readme',
-            'lemmatized_readme', 'original_char_length',
-            'cleaned_char_length', 'pct_char_removed',
-            'natural_language', 'language']
-    df = df[cols].reset_index(drop=True)
-    df = df.rename(columns={'repo':'repository',
-                            'readme_contents':'original_readme',
-                            'language':'programming_language'})
+    with stage('rename_columns', df) as s:
+        cols = ['repo', 'readme_contents', 'cleaned_readme',
+                'lemmatized_readme', 'original_char_length',
+                'cleaned_char_length', 'pct_char_removed',
+                'natural_language', 'language']
+        df = df[cols].reset_index(drop=True)
+        df = s.output(df.rename(columns={'repo':'repository',
+                                         'readme_contents':'original_readme',
+                                         'language':'programming_language'}))
 
     return df
 
@@ -234,23 +322,13 @@ def encode_target(df):
     3 == 'HTML',
     4 == 'R',
     5 == 'TypeScript'
+
+    as registered in labels.LANGUAGES
     '''
 
-    # assign numerical values for each programming language
-    df['target_class'] = np.where(df.programming_language == \
-                                        'Python', 0, -1)
-    df['target_class'] = np.where(df.programming_language == \
-                                        'JavaScript', 1, df.target_class)
-    df['target_class'] = np.where(df.programming_language == \
-                                        'Jupyter Notebook', 2, df.target_class)
-    df['target_class'] = np.where(df.programming_language == \
-                                        'HTML', 3, df.target_class)
-    df['target_class'] = np.where(df.programming_language == \
-                                        'R', 4, df.target_class)
-    df['target_class'] = np.where(df.programming_language == \
-                                        'TypeScript', 5, df.target_class)
-    # set data type as int
-    df.target_class = df.target_class.astype(int)
+    # look up every language's class in one pass; unknown languages are
+    # -1 and raise a warning
+    df['target_class'] = encode_languages(df.programming_language)
 
     return df
 
@@ -261,14 +339,20 @@ def split_data(df):
     test data sets, returns tuple of six prepared DataFrames
     '''
 
+    from sklearn.model_selection import train_test_split
+
     # split test out from DataFrame
-    train_validate, test = train_test_split(df, test_size=0.2,
-                                            random_state=19,
-                                            stratify=df.target_class)
+    with stage('split_test', df) as s:
+        train_validate, test = train_test_split(df, test_size=0.2,
+                                                random_state=19,
+                                                stratify=df.target_class)
+        s.output(train_validate)
     # split train and validate data sets
-    train, validate = train_test_split(train_validate, test_size=0.25,
-                                       random_state=19,
-                                       stratify=train_validate.target_class)
+    with stage('split_validate', train_validate) as s:
+        train, validate = train_test_split(train_validate, test_size=0.25,
+                                           random_state=19,
+                                           stratify=train_validate.target_class)
+        s.output(train)
     # split each into X, y sets
     X_train = train.drop(columns=['programming_language', 'target_class'])
     y_train = train[['programming_language', 'target_class']]
@@ -282,10 +366,52 @@ def split_data(df):
             X_test, y_test)
 
 
+def repos_key(near_duplicates=None):
+    '''
+    Returns the stage cache key of "repos.pickle": a hash of the raw
+    corpus, the code of every stage and the parameters that change them
+    '''
+
+    import sys
+
+    return stage_key(prep_github_repos,
+                     kwargs={'near_duplicates': near_duplicates},
+                     deps=[sys.modules[__name__], corpus, dedupe, langfilter,
+                           p, labels],
+                     files=[find_corpus()])
+
+
+def read_repos_key(filename='repos.key'):
+    '''
+    Returns the key "repos.pickle" was written with, or None
+    '''
+
+    if isfile(filename) == False:
+        return None
+    with open(filename) as f:
+        return f.read().strip()
+
+
+def write_repos_key(key, filename='repos.key'):
+    '''
+    Records the key "repos.pickle" was written with
+    '''
+
+    with open(filename, 'w') as f:
+        f.write(key)
+
+
 def wrangle_github_repos(new_pickles=False, get_new_links=False,
-                                             number_of_pages=25):
+                                             number_of_pages=25,
+                                             cache_path='repo_cache.sqlite',
+                                             n_jobs=1, use_stage_cache=True,
+                                             stage_cache_dir=CACHE_DIR,
+                                             columns=None, languages=None,
+                                             profile=False,
+                                             profile_dir='.profiles',
+                                             near_duplicates=None):
     '''
-    Performs total preparation and reading in of "data2.json" for
+    Performs total preparation and reading in of "data2.jsonl" for
     GitHub repository data and stores within a .pickle file
 
     new_pickles : Set True if need overwriting existing pickle file
@@ -295,29 +421,97 @@ def wrangle_github_repos(new_pickles=False, get_new_links=False,
 
     number_of_pages: int value for the number of pages to parse for
                      repo links; Default == 25
+
+    cache_path: SQLite file caching each scraped repo; cached repos are
+                revalidated with ETags and an interrupted scrape resumes
+
+    n_jobs: number of processes used for preparation, -1 for all cores
+
+    use_stage_cache: Set False to skip the stage cache; when True and
+                     the corpus, the stage code or near_duplicates changed
+                     since "repos.pickle" was first read or written, the
+                     data is prepared again through the cache, so only the
+                     stages that changed rerun
+
+    stage_cache_dir: directory the stage cache is kept in
+
+    columns: list of columns to load, e.g. ['lemmatized_readme']; the
+             programming_language and target_class columns are always
+             loaded for splitting. Default == all columns
+
+    languages: list of programming languages to keep, filtered while
+               reading "repos.parquet". Default == all languages
+
+    profile: Set True to time every stage, with rows, peak memory and a
+             cProfile dump per stage in profile_dir; the table is printed
+             and saved as "stages.json" there
+
+    near_duplicates: similarity threshold, e.g. 0.8, above which READMEs
+                     of forks and templates are collapsed to one repo
+                     before cleaning. Default == None, keep them all
     '''
 
-    if get_new_links == True or isfile('data2.json') == False:
+    if profile:
+        instrument.configure(enabled=True, trace_memory=True,
+                             profile_dir=profile_dir)
+        instrument.reset()
+
+    if get_new_links == True or find_corpus() is None:
         get_new_links = True
+        # the scraper needs env.py credentials, so load it only to scrape
+        from acquire import get_repo_links, scrape_github_data
+        from repo_cache import RepoCache
         get_repo_links(number_of_pages=number_of_pages)
-        data = scrape_github_data()
-        json.dump(data, open('data2.json', 'w'), indent=1)
+        cache = RepoCache(cache_path)
+        scrape_github_data(cache=cache, output=RAW_CORPUS)
+        cache.close()
     # if file does not exist, or is overwritten, read in and pickle
-    if (isfile('repos.pickle') == False or 
+    rebuild = (isfile('repos.pickle') == False or
                     get_new_links == True or
-                    new_pickles == True):
-        df = prep_github_repos()
-        df = polish_github_repos(df)
-        df = encode_target(df)
-        make_pickles(df, 'repos')
+                    new_pickles == True)
+    # an up to date pickle is read as it is; a stale one is prepared again
+    if use_stage_cache == True and rebuild == False:
+        key = repos_key(near_duplicates)
+        if read_repos_key() is None:
+            # repos.key is not committed, so a fresh checkout takes the
+            # pickle as built with the default parameters and from now on
+            # rebuilds it only when they, the corpus or the code change
+            write_repos_key(repos_key())
+        rebuild = read_repos_key() != key
+    if rebuild:
+        reset_stats()
+        with stage('prep_github_repos') as s:
+            df = s.output(prep_github_repos(n_jobs=n_jobs,
+                                            use_cache=use_stage_cache,
+                                            cache_dir=stage_cache_dir,
+                                            near_duplicates=near_duplicates))
+        with stage('polish_github_repos', df) as s:
+            df = s.output(run_stage(polish_github_repos, df, n_jobs=n_jobs,
+                                    deps=[p], cache_dir=stage_cache_dir,
+                                    enabled=use_stage_cache))
+        with stage('encode_target', df) as s:
+            df = s.output(encode_target(df))
+        if use_stage_cache:
+            report()
+        with stage('make_pickles', df):
+            make_pickles(df, 'repos')
+            if has_pyarrow():
+                make_parquet(df, 'repos')
+        write_repos_key(repos_key(near_duplicates))
+    # read only the requested columns and languages
+    if columns is not None:
+        columns = list(dict.fromkeys(list(columns) +
+                                     ['programming_language', 'target_class']))
+    with stage('open_repos') as s:
+        df = s.output(open_repos(columns=columns, languages=languages))
+    with stage('split_data', df):
         X_train, y_train, \
         X_validate, y_validate, \
         X_test, y_test = split_data(df)
-    # if file exists, unpickle
-    df = open_pickles('repos')
-    X_train, y_train, \
-    X_validate, y_validate, \
-    X_test, y_test = split_data(df)
+    if profile:
+        instrument.report()
+        instrument.to_json(join(profile_dir, 'stages.json'))
+        instrument.configure(enabled=False)
 
     return (X_train, y_train,
             X_validate, y_validate,